@@ -0,0 +1 @@
+"""Benchmarks for the demo doc generator (not part of the generator itself)."""
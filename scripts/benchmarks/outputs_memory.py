@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Peak RSS of decoding Terraform outputs: ``json.load`` versus streaming.
+
+Builds synthetic state files (or ``terraform output -json`` payloads) of
+increasing size, then decodes each one in a fresh child process so the
+``ru_maxrss`` it reports belongs to that decode alone.
+
+    python3 scripts/benchmarks/outputs_memory.py --sizes 16 64 256
+    python3 scripts/benchmarks/outputs_memory.py --kind outputs
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from benchmarks import synthetic  # noqa: E402
+from demodoc import jsonstream  # noqa: E402
+
+OUTPUT_KEYS = ("multi_cloud_load_balancing", "reachability", "vpn_endpoint_manifest")
+METHODS = ("baseline", "json.load", "stream")
+
+
+def _resource(index: int) -> str:
+    instance = {
+        "schema_version": 1,
+        "attributes": {
+            "id": f"i-{index:017x}",
+            "arn": f"arn:aws:ec2:us-east-1:123456789012:instance/i-{index:017x}",
+            "tags": {"Name": f"skyforge-{index}", "SkyforgeRole": "benchmark"},
+            "user_data": "#!/bin/bash\\necho skyforge\\n" * 8,
+            "private_ip": f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}",
+        },
+    }
+    return json.dumps(
+        {"mode": "managed", "type": "aws_instance", "name": f"bench_{index}", "instances": [instance]},
+        separators=(",", ":"),
+    )
+
+
+def write_payload(path: pathlib.Path, size_mb: int, kind: str) -> None:
+    target = size_mb << 20
+    outputs = json.dumps(synthetic.generate_outputs(synthetic.PRESETS["demo"]))
+    with path.open("w", encoding="utf-8") as handle:
+        if kind == "state":
+            handle.write('{"version":4,"terraform_version":"1.6.0","serial":1,"lineage":"bench",')
+            handle.write('"outputs":' + outputs + ',"resources":[')
+        else:
+            # Put the bulk ahead of the wanted keys so the reader has to skip it.
+            handle.write('{"aws_transit_gateways":{"type":"list","value":[')
+        index = 0
+        while handle.tell() < target:
+            if index:
+                handle.write(",")
+            handle.write(_resource(index))
+            index += 1
+        if kind == "state":
+            handle.write("]}")
+        else:
+            handle.write("]}," + outputs[1:])
+
+
+def _child(method: str, path: pathlib.Path, kind: str) -> None:
+    started = time.perf_counter()
+    path_keys = ("outputs",) if kind == "state" else ()
+    if method == "json.load":
+        with path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        for key in path_keys:
+            data = data[key]
+        selected = {key: data[key] for key in OUTPUT_KEYS}
+    elif method == "stream":
+        with path.open("rb") as handle:
+            selected = jsonstream.select(handle, OUTPUT_KEYS, path=path_keys)
+    else:
+        selected = {key: None for key in OUTPUT_KEYS}
+    elapsed = time.perf_counter() - started
+    assert set(selected) == set(OUTPUT_KEYS)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"peak_mb": peak_kb / 1024, "seconds": elapsed}))
+
+
+def _measure(method: str, path: pathlib.Path, kind: str) -> Dict[str, float]:
+    cmd = [sys.executable, __file__, "--child", method, "--kind", kind, str(path)]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 128], help="Payload sizes in MiB")
+    parser.add_argument("--kind", choices=("state", "outputs"), default="state")
+    parser.add_argument("--child", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("path", nargs="?", type=pathlib.Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.path, args.kind)
+        return
+
+    print(f"| {args.kind} size | baseline RSS | json.load RSS | json.load s | stream RSS | stream s |")
+    print("|-----------:|-------------:|--------------:|------------:|-----------:|---------:|")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.sizes:
+            path = pathlib.Path(tmp) / f"bench-{size_mb}.json"
+            write_payload(path, size_mb, args.kind)
+            results = {method: _measure(method, path, args.kind) for method in METHODS}
+            actual_mb = path.stat().st_size / (1 << 20)
+            print(
+                f"| {actual_mb:8.1f} MiB "
+                f"| {results['baseline']['peak_mb']:9.1f} MiB "
+                f"| {results['json.load']['peak_mb']:10.1f} MiB | {results['json.load']['seconds']:10.2f} "
+                f"| {results['stream']['peak_mb']:7.1f} MiB | {results['stream']['seconds']:7.2f} |"
+            )
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""Benchmark suite for the demo doc generator.
+
+Each synthetic size preset runs every benchmark in ``BENCHMARKS``:
+
+- decode: outputs through ``json.loads`` versus the streaming reader
+- model: the typed outputs model load
+- render: ``render`` cold and with a warm section cache
+- mesh: the VPN mesh graph analysis
+- reachability: the reachability index build and its queries
+- plan: the streamed plan summary
+- probe: endpoint probes against loopback listeners
+- write: the doc write, changed and unchanged
+- site: the static site build
+- template: the template compile versus its cached code object
+- fragments: the per-cloud and per-region split, and one filtered view
+- vpn_index: one tunnel lookup, manifest JSON scan versus compiled index
+- snapshots: outputs snapshots unchanged and changed, and a cold diff
+- server: doc server throughput and p99 latency
+- memory: peak traced memory of decode, the model, render and the streamed write
+
+Results are compared with a baseline file so regressions show up across
+commits:
+
+    python3 scripts/benchmarks/run.py                   # compare with baseline.json
+    python3 scripts/benchmarks/run.py --save-baseline   # refresh the baseline
+    python3 scripts/benchmarks/run.py --check           # exit 1 on regression
+    python3 scripts/benchmarks/run.py --only render     # a subset of BENCHMARKS
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import io
+import itertools
+import json
+import pathlib
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import generate_demo_doc as gdd  # noqa: E402
+from benchmarks import server_load, synthetic  # noqa: E402
+from demodoc import fragments as docfragments  # noqa: E402
+from demodoc import jsonstream  # noqa: E402
+from demodoc import mesh as docmesh  # noqa: E402
+from demodoc import model as docmodel  # noqa: E402
+from demodoc import plan as docplan  # noqa: E402
+from demodoc import probe as docprobe  # noqa: E402
+from demodoc import reachability as docreach  # noqa: E402
+from demodoc import sections as docsections  # noqa: E402
+from demodoc import snapshots as docsnapshots  # noqa: E402
+from demodoc import server as docserver  # noqa: E402
+from demodoc import templates as doctemplates  # noqa: E402
+from demodoc import vpnindex as docvpn  # noqa: E402
+
+BASELINE_PATH = pathlib.Path(__file__).with_name("baseline.json")
+# Metrics where a larger number is better; everything else is a duration or size.
+HIGHER_IS_BETTER = {"server_rps"}
+# Loopback listeners stood up for the probe benchmark; larger presets probe this many.
+PROBE_LISTENERS = 256
+# Tunnels per mesh link in the VPN manifest benchmark: 12k tunnels for the large preset.
+VPN_TUNNELS_PER_LINK = 6
+
+
+def _best_of(repeat: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _peak_kib(func: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+@dataclasses.dataclass
+class Case:
+    """One preset's inputs and the artifacts its benchmarks share."""
+
+    spec: synthetic.Spec
+    repeat: int
+    server_requests: int
+    outputs: Dict[str, Any]
+    payload: str
+    tmp: pathlib.Path
+    # Warmed by one render of the outputs.
+    cache: docsections.SectionCache
+    chunks: List[str]
+    # The rendered doc, written before the first benchmark runs.
+    doc_path: pathlib.Path
+    counter: Iterator[int] = dataclasses.field(default_factory=itertools.count)
+
+    def best_of(self, func: Callable[[], Any]) -> float:
+        return _best_of(self.repeat, func)
+
+
+def bench_decode(case: Case) -> Dict[str, float]:
+    payload = case.payload
+    return {
+        "decode_json_s": case.best_of(lambda: json.loads(payload)),
+        "decode_stream_s": case.best_of(lambda: jsonstream.select(io.StringIO(payload), gdd.OUTPUT_KEYS)),
+    }
+
+
+def bench_model(case: Case) -> Dict[str, float]:
+    # A shallow copy is a new object, so every run validates and builds the model.
+    return {"model_load_s": case.best_of(lambda: docmodel.load(dict(case.outputs)))}
+
+
+def bench_render(case: Case) -> Dict[str, float]:
+    warm_outputs = json.loads(case.payload)
+    return {
+        "render_cold_s": case.best_of(lambda: gdd.render(json.loads(case.payload), None)),
+        "render_warm_s": case.best_of(lambda: gdd.render(warm_outputs, None, case.cache)),
+    }
+
+
+def bench_mesh(case: Case) -> Dict[str, float]:
+    mesh = case.outputs["vpn_endpoint_manifest"]["value"]["clouds"]["mesh"]
+    return {"mesh_analyse_s": case.best_of(lambda: docmesh.analyse(docmesh.MeshGraph.from_mesh(mesh)))}
+
+
+def bench_reachability(case: Case) -> Dict[str, float]:
+    reachability = case.outputs["reachability"]["value"]
+    # Build plus the word index the first text query adds.
+    results = {"reachability_index_s": case.best_of(lambda: docreach.ReachabilityIndex(reachability).query(q="x"))}
+    index = docreach.ReachabilityIndex(reachability)
+    index.query(q="x")
+    region = next(iter(reachability["aws"]["paths"]))
+    results["reachability_query_s"] = case.best_of(
+        lambda: (
+            index.query("aws", region, offset=100),
+            index.query(q="test-0001"),
+            index.query("gcp", q="analysis 00012"),
+        ),
+    )
+    return results
+
+
+def bench_plan(case: Case) -> Dict[str, float]:
+    plan = json.dumps(synthetic.generate_plan(case.spec)).encode("utf-8")
+    return {
+        "plan_kib": len(plan) / 1024,
+        "plan_summarize_s": case.best_of(lambda: docplan.summarize(io.BytesIO(plan))),
+        "plan_summarize_peak_kib": _peak_kib(lambda: docplan.summarize(io.BytesIO(plan))),
+    }
+
+
+def bench_probe(case: Case) -> Dict[str, float]:
+    # One loopback listener per endpoint the doc names (capped). The kernel
+    # completes the handshakes, so nothing needs to accept them.
+    targets = list(gdd._probe_targets(gdd._build_context(case.outputs)))[:PROBE_LISTENERS]
+    listeners = [socket.create_server(("127.0.0.1", 0), backlog=case.repeat + 1) for _ in targets]
+    try:
+        probe_targets = [docprobe.Target("tcp", "127.0.0.1", listener.getsockname()[1]) for listener in listeners]
+        prober = docprobe.Prober(ttl=0)
+        return {"probe_s": case.best_of(lambda: prober.run(probe_targets))}
+    finally:
+        for listener in listeners:
+            listener.close()
+
+
+def bench_write(case: Case) -> Dict[str, float]:
+    # The streamed write the generator does, fed pre-rendered chunks so
+    # only hashing and writing are timed.
+    def write(chunks: List[str]) -> bool:
+        return docsections.write_chunks_if_changed(case.doc_path, chunks, gdd.VOLATILE_LINES, case.cache)
+
+    results = {"write_changed_s": case.best_of(lambda: write([*case.chunks, f"\n<!-- {next(case.counter)} -->\n"]))}
+    write(case.chunks)
+    results["write_unchanged_s"] = case.best_of(lambda: write(case.chunks))
+    results["doc_kib"] = sum(len(chunk.encode("utf-8")) for chunk in case.chunks) / 1024
+    return results
+
+
+def bench_site(case: Case) -> Dict[str, float]:
+    # Every page written and compressed, into a fresh directory each time.
+    outputs = json.loads(case.payload)
+    return {
+        "site_build_s": case.best_of(
+            lambda: gdd.build_site(outputs, case.tmp / f"site-{next(case.counter)}", case.doc_path)
+        )
+    }
+
+
+def bench_template(case: Case) -> Dict[str, float]:
+    # The doc template parsed and compiled, versus loaded from its cached
+    # code object as a fresh process (or batch variant) would.
+    template_source = gdd.TEMPLATE_PATH.read_text(encoding="utf-8")
+    results = {"template_compile_s": case.best_of(lambda: doctemplates.compile_template(template_source))}
+
+    def cached_load() -> None:
+        doctemplates._loaded.clear()
+        doctemplates.load(gdd.TEMPLATE_PATH, case.tmp / "templates")
+
+    cached_load()
+    results["template_cached_load_s"] = case.best_of(cached_load)
+    return results
+
+
+def bench_fragments(case: Case) -> Dict[str, float]:
+    # Filtered views: every section split into fragments at generation
+    # time, then one view read back by a server that just saw the index.
+    outputs = json.loads(case.payload)
+    results = {
+        "fragments_write_s": case.best_of(
+            lambda: gdd.write_fragments(outputs, case.cache, directory=case.tmp / f"fragments-{next(case.counter)}")
+        )
+    }
+    gdd.write_fragments(outputs, case.cache, directory=case.tmp / "fragments")
+
+    def filtered_view() -> None:
+        view = docfragments.FragmentStore(case.tmp / "fragments").view(["path_catalog"], "aws", "us-east-1")
+        assert view is not None
+        b"".join(view.iter_body())
+
+    results["fragment_view_s"] = case.best_of(filtered_view)
+    return results
+
+
+def bench_vpn_index(case: Case) -> Dict[str, float]:
+    # One tunnel's record: parse and scan the manifest JSON, versus open
+    # the compiled index and look it up, as a separate tool run would.
+    manifest = synthetic.generate_manifest(case.spec, VPN_TUNNELS_PER_LINK)
+    manifest_path = case.tmp / "vpn-endpoints.json"
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    wanted = manifest["clouds"]["mesh"]["cloud_links"][-1]["tunnels"][-1]["id"]
+    results = {"vpn_index_compile_s": case.best_of(lambda: docvpn.compile_index(manifest_path))}
+    results["vpn_index_kib"] = docvpn.default_index_path(manifest_path).stat().st_size / 1024
+
+    def json_scan() -> Any:
+        with manifest_path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        for link in data["clouds"]["mesh"]["cloud_links"]:
+            for tunnel in link["tunnels"]:
+                if tunnel["id"] == wanted:
+                    return tunnel
+        return None
+
+    def index_lookup() -> None:
+        with docvpn.open_index(manifest_path) as index:
+            index.raw("tunnel", wanted).release()
+
+    results["vpn_json_lookup_s"] = case.best_of(json_scan)
+    results["vpn_index_lookup_s"] = case.best_of(index_lookup)
+    return results
+
+
+def bench_snapshots(case: Case) -> Dict[str, float]:
+    store = docsnapshots.SnapshotStore(case.tmp / "snapshots")
+    snapshot = json.loads(case.payload)
+    store.save(snapshot)
+    results = {"snapshot_unchanged_s": case.best_of(lambda: store.save(snapshot))}
+
+    def changed() -> None:
+        # One output value moves; everything else is already stored.
+        snapshot["bench_revision"] = {"value": next(case.counter)}
+        store.save(snapshot)
+
+    results["snapshot_changed_s"] = case.best_of(changed)
+    old, new = (record["id"] for record in store.history()[-2:])
+    results["snapshot_diff_s"] = case.best_of(lambda: list(docsnapshots.SnapshotStore(store.directory).diff(old, new)))
+    return results
+
+
+def bench_server(case: Case) -> Dict[str, float]:
+    with docserver.DocServer(("127.0.0.1", 0), docserver.DocumentCache(case.doc_path)) as httpd:
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+        load = server_load.run_load(url, 8, case.server_requests, {"Accept-Encoding": "gzip"})
+        httpd.shutdown()
+    return {"server_rps": load["rps"], "server_p99_s": load["p99_ms"] / 1000}
+
+
+def bench_memory(case: Case) -> Dict[str, float]:
+    payload = case.payload
+    render_input = json.loads(payload)
+    doc_path = case.tmp / "memory" / "demo-workflow.md"
+    doc_path.parent.mkdir()
+    return {
+        "decode_json_peak_kib": _peak_kib(lambda: json.loads(payload)),
+        "decode_stream_peak_kib": _peak_kib(lambda: jsonstream.select(io.StringIO(payload), gdd.OUTPUT_KEYS)),
+        "model_peak_kib": _peak_kib(lambda: docmodel.load(dict(case.outputs))),
+        "render_peak_kib": _peak_kib(lambda: gdd.render(render_input, None)),
+        "stream_write_peak_kib": _peak_kib(
+            lambda: docsections.write_chunks_if_changed(doc_path, gdd.iter_render(render_input, None), gdd.VOLATILE_LINES)
+        ),
+    }
+
+
+# Run in this order for every preset; see the module docstring.
+BENCHMARKS: Dict[str, Callable[[Case], Dict[str, float]]] = {
+    "decode": bench_decode,
+    "model": bench_model,
+    "render": bench_render,
+    "mesh": bench_mesh,
+    "reachability": bench_reachability,
+    "plan": bench_plan,
+    "probe": bench_probe,
+    "write": bench_write,
+    "site": bench_site,
+    "template": bench_template,
+    "fragments": bench_fragments,
+    "vpn_index": bench_vpn_index,
+    "snapshots": bench_snapshots,
+    "server": bench_server,
+    "memory": bench_memory,
+}
+
+
+def bench_preset(spec: synthetic.Spec, repeat: int, server_requests: int, names: Sequence[str]) -> Dict[str, float]:
+    outputs = synthetic.generate_outputs(spec)
+    payload = json.dumps(outputs)
+    results: Dict[str, float] = {"payload_kib": len(payload) / 1024}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = pathlib.Path(tmp)
+        cache = docsections.SectionCache(tmp_path / "sections.json", gdd.RENDER_SALT)
+        gdd.render(json.loads(payload), None, cache)
+        chunks = list(gdd.iter_render(json.loads(payload), None))
+        doc_path = tmp_path / "demo-workflow.md"
+        docsections.write_chunks_if_changed(doc_path, chunks, gdd.VOLATILE_LINES, cache)
+        case = Case(spec, repeat, server_requests, outputs, payload, tmp_path, cache, chunks, doc_path)
+        for name in names:
+            results.update(BENCHMARKS[name](case))
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regressions = []
+    for preset, metrics in current.items():
+        for metric, value in metrics.items():
+            before = baseline.get(preset, {}).get(metric)
+            if not before or metric.endswith("_kib") and not metric.endswith("peak_kib"):
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = value < before * (1 - threshold)
+            else:
+                worse = value > before * (1 + threshold)
+            if worse:
+                regressions.append(f"{preset}.{metric}: {before:.6g} -> {value:.6g}")
+    return regressions
+
+
+def _format(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> str:
+    metrics = sorted({metric for values in current.values() for metric in values})
+    presets = list(current)
+    rows = ["| metric | " + " | ".join(presets) + " |", "|--------|" + "|".join("---:" for _ in presets) + "|"]
+    for metric in metrics:
+        cells = []
+        for preset in presets:
+            value = current[preset].get(metric)
+            before = baseline.get(preset, {}).get(metric)
+            cell = f"{value:.4g}" if value is not None else "--"
+            if value is not None and before:
+                cell += f" ({(value - before) / before:+.0%})"
+            cells.append(cell)
+        rows.append(f"| {metric} | " + " | ".join(cells) + " |")
+    return "\n".join(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--presets", nargs="+", choices=sorted(synthetic.PRESETS), default=["demo", "medium", "large"])
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats; the best run is kept")
+    parser.add_argument("--server-requests", type=int, default=50, help="Requests per client in the server benchmark")
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative change counted as a regression")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero when a regression is found")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    parser.add_argument(
+        "--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS), help="Run just these benchmarks"
+    )
+    args = parser.parse_args()
+
+    current = {}
+    for name in args.presets:
+        spec = synthetic.PRESETS[name]
+        print(f"benchmarking {name} (~{spec.entries} entries)...", file=sys.stderr)
+        current[name] = bench_preset(spec, args.repeat, args.server_requests, args.only)
+
+    try:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+    except (OSError, json.JSONDecodeError):
+        baseline = {}
+
+    if args.json:
+        print(json.dumps(current, indent=2, sort_keys=True))
+    else:
+        print(_format(current, baseline))
+
+    if args.save_baseline:
+        payload = {"python": platform.python_version(), "machine": platform.machine(), "results": current}
+        args.baseline.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return
+
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print("\nRegressions beyond {:.0%}:".format(args.threshold))
+        for line in regressions:
+            print(f"- {line}")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
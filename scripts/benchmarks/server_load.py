@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Local load test for the demo doc server.
+
+Starts the original single-threaded HTTP/1.0 handler ("legacy") and the
+cached threaded server side by side on a generated document, then drives
+each with concurrent keep-alive clients and reports requests/second and
+p50/p99 latency. Point ``--url`` at a running server to test it instead.
+
+    python3 scripts/benchmarks/server_load.py --clients 32 --requests 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import http.client
+import http.server
+import pathlib
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from demodoc import server as docserver  # noqa: E402
+
+
+def _legacy_server(doc_path: pathlib.Path) -> socketserver.TCPServer:
+    # Mirrors the pre-cache _start_server so "before" numbers stay reproducible.
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path not in ("/", "/index.html"):
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            try:
+                content = doc_path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                content = "# documentation not found\n"
+            body = f"<html><body><pre>{html.escape(content)}</pre></body></html>".encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
+            return
+
+    return socketserver.TCPServer(("127.0.0.1", 0), RequestHandler)
+
+
+def _client(
+    host: str,
+    port: int,
+    path: str,
+    count: int,
+    headers: Dict[str, str],
+    revalidate: bool,
+    latencies: List[float],
+    errors: List[str],
+) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etag: Optional[str] = None
+    try:
+        for _ in range(count):
+            request_headers = dict(headers)
+            if revalidate and etag:
+                request_headers["If-None-Match"] = etag
+            started = time.perf_counter()
+            conn.request("GET", path, headers=request_headers)
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - started)
+            if response.status not in (200, 304):
+                errors.append(str(response.status))
+            etag = response.getheader("ETag") or etag
+    except (OSError, http.client.HTTPException) as exc:
+        errors.append(repr(exc))
+    finally:
+        conn.close()
+
+
+def run_load(
+    url: str, clients: int, requests: int, headers: Dict[str, str], revalidate: bool = False
+) -> Dict[str, float]:
+    parts = urlsplit(url)
+    latencies: List[float] = []
+    errors: List[str] = []
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(parts.hostname, parts.port or 80, parts.path or "/", requests, headers, revalidate, latencies, errors),
+        )
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies) or [0.0]
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+    }
+
+
+def _print_row(label: str, stats: Dict[str, float]) -> None:
+    print(
+        f"| {label:<26} | {stats['requests']:>8.0f} | {stats['errors']:>6.0f} "
+        f"| {stats['rps']:>9.0f} | {stats['p50_ms']:>8.2f} | {stats['p99_ms']:>8.2f} |"
+    )
+
+
+def _serve(httpd: socketserver.TCPServer) -> str:
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{httpd.server_address[1]}/"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent connections")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per connection")
+    parser.add_argument("--doc-kb", type=int, default=256, help="Size of the generated markdown document")
+    parser.add_argument("--url", help="Benchmark an already running server instead")
+    args = parser.parse_args()
+
+    print("| scenario                   | requests | errors |     req/s |  p50 ms |  p99 ms |")
+    print("|----------------------------|---------:|-------:|----------:|--------:|--------:|")
+    identity = {"Accept-Encoding": "identity"}
+    gzip_headers = {"Accept-Encoding": "gzip"}
+
+    if args.url:
+        _print_row("target identity", run_load(args.url, args.clients, args.requests, identity))
+        _print_row("target gzip", run_load(args.url, args.clients, args.requests, gzip_headers))
+        _print_row("target gzip + If-None-Match", run_load(args.url, args.clients, args.requests, gzip_headers, True))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        doc_path = pathlib.Path(tmp) / "demo-workflow.md"
+        line = "| Flow | source → destination <ALB> | TCP 80/443 | Forward Path Search & focus |\n"
+        doc_path.write_text(line * max(1, (args.doc_kb << 10) // len(line)), encoding="utf-8")
+
+        with _legacy_server(doc_path) as legacy:
+            _print_row("legacy (before)", run_load(_serve(legacy), args.clients, args.requests, identity))
+            legacy.shutdown()
+
+        with docserver.DocServer(("127.0.0.1", 0), docserver.DocumentCache(doc_path)) as cached:
+            url = _serve(cached)
+            _print_row("cached identity (after)", run_load(url, args.clients, args.requests, identity))
+            _print_row("cached gzip (after)", run_load(url, args.clients, args.requests, gzip_headers))
+            _print_row("cached 304 (after)", run_load(url, args.clients, args.requests, gzip_headers, True))
+            cached.shutdown()
+
+
+if __name__ == "__main__":
+    main()
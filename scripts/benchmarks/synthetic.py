@@ -0,0 +1,331 @@
+"""Synthetic ``terraform output -json`` payloads (and plans) for benchmarking.
+
+The generator mirrors the shapes the root module emits for
+``multi_cloud_load_balancing``, ``reachability`` and ``vpn_endpoint_manifest``
+and scales each dimension independently: regions per cloud, GWLB firewalls
+per region, reachability paths/analyses/monitors/tests per region, and VPN
+mesh cloud links per AWS region.
+``generate_manifest`` builds the ``vpn_endpoint_manifest`` value on its own,
+with more tunnels per link for the manifest index benchmark.
+``generate_plan`` builds the matching ``terraform show -json`` plan: the
+same regions as module instances with their ALBs, firewalls and VPN links
+to create, plus filler resources and ``planned_values`` for bulk.
+Output is deterministic for a given spec so runs are comparable.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import pathlib
+import string
+from typing import Any, Dict, List
+
+AWS_REGIONS = ("us-east-1", "eu-central-1", "ap-northeast-1", "me-south-1")
+AZURE_REGIONS = ("uswest2", "northeurope", "japaneast")
+GCP_REGIONS = ("us-central1", "europe-west1", "asia-southeast1", "me-west1")
+
+
+@dataclasses.dataclass(frozen=True)
+class Spec:
+    name: str
+    regions: int
+    firewalls_per_region: int
+    tests_per_region: int
+    links_per_region: int = 2
+
+    @property
+    def entries(self) -> int:
+        """Rough count of leaf entries the renderers have to walk."""
+        per_region = self.firewalls_per_region + 4 * self.tests_per_region + self.links_per_region + 5
+        return self.regions * per_region
+
+
+PRESETS = {
+    "demo": Spec("demo", regions=3, firewalls_per_region=2, tests_per_region=3, links_per_region=2),
+    "medium": Spec("medium", regions=12, firewalls_per_region=8, tests_per_region=40, links_per_region=8),
+    # ~10k reachability entries per kind, 2.5k firewalls and 2k mesh links.
+    "large": Spec("large", regions=100, firewalls_per_region=25, tests_per_region=100, links_per_region=20),
+}
+
+
+def _regions(base: tuple, count: int) -> List[str]:
+    names = list(base[:count])
+    index = 0
+    while len(names) < count:
+        names.append(f"{base[index % len(base)]}-x{len(names)}")
+        index += 1
+    return names
+
+
+def _ip(index: int, host: int) -> str:
+    return f"10.{(index >> 8) & 255}.{index & 255}.{host & 255}"
+
+
+def _albs(aws_regions: List[str]) -> Dict[str, Any]:
+    return {
+        region: {
+            "load_balancer_arn": f"arn:aws:elasticloadbalancing:{region}:123456789012:loadbalancer/app/skyforge/{i:016x}",
+            "dns_name": f"skyforge-{region}-alb-{i}.{region}.elb.amazonaws.com",
+            "zone_id": "Z35SXDOTRQ7X7K",
+        }
+        for i, region in enumerate(aws_regions)
+    }
+
+
+def generate_manifest(spec: Spec, tunnels_per_link: int = 2) -> Dict[str, Any]:
+    """The ``vpn_endpoint_manifest`` value, as written to ``outputs/vpn-endpoints.json``."""
+    aws_regions = _regions(AWS_REGIONS, spec.regions)
+    azure_regions = _regions(AZURE_REGIONS, spec.regions)
+    gcp_regions = _regions(GCP_REGIONS, spec.regions)
+    albs = _albs(aws_regions)
+    cloud_links = []
+    link_status = {}
+    for i, region in enumerate(aws_regions):
+        for n in range(spec.links_per_region):
+            cloud, targets, hub = ("azure", azure_regions, "vwan") if n % 2 == 0 else ("gcp", gcp_regions, "ha-vpn")
+            target = targets[(i + n // 2) % len(targets)]
+            link_id = f"aws-{region}__{cloud}-{target}"
+            source_end = {"cloud": "aws", "region": region, "hub_id": f"tgw-{region}"}
+            target_end = {"cloud": cloud, "region": target, "hub_id": f"{hub}-{target}"}
+            cloud_links.append(
+                {
+                    "link_id": link_id,
+                    "source": source_end,
+                    "target": target_end,
+                    "bgp": {"source_asn": 64512, "target_asn": 65515 if cloud == "azure" else 64514},
+                    "tunnels": [
+                        {"id": f"{region}-{cloud}-{target}-{side}", "preferred_proto": "IPv4", "fallback_proto": "IPv6"}
+                        for side in string.ascii_lowercase[:tunnels_per_link]
+                    ],
+                }
+            )
+            link_status[link_id] = {
+                "source": source_end,
+                "target": target_end,
+                "aws": {
+                    "vpn_connection_id": f"vpn-{i:08x}{n:09x}",
+                    **{
+                        f"tunnel{side}": {
+                            "outside_address": f"52.{i & 255}.{n & 255}.{side}",
+                            "inside_cidr": f"169.254.{n & 255}.{side * 4}/30",
+                            "preshared_key": f"psk-{i:04d}-{n:04d}-{side}",
+                        }
+                        for side in (1, 2)
+                    },
+                },
+            }
+    vnf_links = [
+        {
+            "site": f"site_{i:04d}",
+            "cloud": "aws",
+            "region": region,
+            "hub_id": f"tgw-{region}",
+            "bgp_asn": 65200 + i,
+            "tunnel_mode": "route-based",
+            "preferred_proto": "IPv4",
+            "customer_gateway_ipv4": f"198.51.{(i >> 8) & 255}.{i & 255}",
+        }
+        for i, region in enumerate(aws_regions)
+    ]
+    sites = {
+        link["site"]: {
+            "location": link["region"],
+            "device_type": "fortinet",
+            "tunnel_count": 2,
+            "primary_asn": link["bgp_asn"],
+            "connect_to_cloud": True,
+            "preferred_gateway_ip": link["customer_gateway_ipv4"],
+            "pre_shared_key": f"site-psk-{i:04d}",
+        }
+        for i, link in enumerate(vnf_links)
+    }
+    return {
+        "generated_at": "2026-01-01T00:00:00Z",
+        "clouds": {
+            "aws": {region: {"application_stack": {"alb": albs[region]}} for region in aws_regions},
+            "azure": {region: {"vpn_gateway_id": f"vpngw-{region}"} for region in azure_regions},
+            "gcp": {region: {} for region in gcp_regions},
+            "mesh": {"cloud_links": cloud_links, "vnf_links": vnf_links, "link_status": link_status},
+        },
+        "sites": sites,
+    }
+
+
+def generate_outputs(spec: Spec) -> Dict[str, Any]:
+    aws_regions = _regions(AWS_REGIONS, spec.regions)
+    azure_regions = _regions(AZURE_REGIONS, spec.regions)
+    gcp_regions = _regions(GCP_REGIONS, spec.regions)
+    tests = [f"test-{n:05d}" for n in range(spec.tests_per_region)]
+
+    albs = _albs(aws_regions)
+    tgw_connect = {
+        region: {
+            "attachment_id": f"tgw-attach-{i:017x}",
+            "peer_address": _ip(i, 10),
+            "inside_cidr": "169.254.100.0/29",
+            "peer_bgp_asn": 65001,
+            "connector": {
+                "instance_id": f"i-{i:017x}",
+                "management_ip": _ip(i, 4),
+                "private_ip": _ip(i, 5),
+                "admin_credentials": {"username": "admin", "password": f"Fortinet-{i}"},
+            },
+            "inspection_route_table_id": f"tgw-rtb-{i:017x}",
+            "appliance_route_table_id": f"tgw-rtb-{i + 1:017x}",
+        }
+        for i, region in enumerate(aws_regions)
+    }
+    gwlb = {
+        region: {
+            "load_balancer_arn": f"arn:aws:elasticloadbalancing:{region}:123456789012:loadbalancer/gwy/skyforge/{i:016x}",
+            "firewalls": {
+                "instance_ids": [f"i-{i:08x}{n:09x}" for n in range(spec.firewalls_per_region)],
+                "private_ips": [_ip(i, 20 + n) for n in range(spec.firewalls_per_region)],
+                "admin_credentials": {"username": "admin", "password": f"PaloAlto-{i}"},
+            },
+        }
+        for i, region in enumerate(aws_regions)
+    }
+    asa = {
+        region: {
+            "vm_id": f"/subscriptions/0000/resourceGroups/skyforge/providers/Microsoft.Compute/virtualMachines/asa-{region}",
+            "private_ip": _ip(1000 + i, 4),
+            "public_ip": f"20.{i & 255}.1.4",
+            "admin_username": "asaadmin",
+            "admin_password": f"Asa-{i}",
+        }
+        for i, region in enumerate(azure_regions)
+    }
+    checkpoint = {
+        region: {
+            "instance_id": f"projects/skyforge/zones/{region}-a/instances/cp-{region}",
+            "private_ip": _ip(2000 + i, 4),
+            "admin_username": "admin",
+            "admin_password": f"CheckPoint-{i}",
+        }
+        for i, region in enumerate(gcp_regions)
+    }
+
+    reachability = {
+        "aws": {
+            "paths": {region: {name: f"nip-{i:06x}{n:011x}" for n, name in enumerate(tests)} for i, region in enumerate(aws_regions)},
+            "analyses": {region: {name: f"nia-{i:06x}{n:011x}" for n, name in enumerate(tests)} for i, region in enumerate(aws_regions)},
+        },
+        "azure": {region: {name: f"/connectionMonitors/{region}-{name}" for name in tests} for region in azure_regions},
+        "gcp": {region: {name: f"projects/skyforge/locations/global/connectivityTests/{region}-{name}" for name in tests} for region in gcp_regions},
+    }
+
+    return {
+        "multi_cloud_load_balancing": {
+            "sensitive": True,
+            "type": "object",
+            "value": {
+                "aws": {
+                    "transit_gateway_connect": tgw_connect,
+                    "application_albs": albs,
+                    "gateway_load_balancers": gwlb,
+                    "global_application_accelerator": {
+                        "dns_name": "a1b2c3d4e5f6.awsglobalaccelerator.com",
+                        "listener_ports": [80, 443],
+                        "custom_domain": None,
+                        "endpoint_regions": aws_regions,
+                    },
+                },
+                "azure": {"front_door": {}, "asa": asa},
+                "gcp": {"global_http_load_balancers": {}, "checkpoint_firewalls": checkpoint},
+            },
+        },
+        "reachability": {"sensitive": False, "type": "object", "value": reachability},
+        "vpn_endpoint_manifest": {"sensitive": True, "type": "object", "value": generate_manifest(spec)},
+    }
+
+
+def write_state(path: pathlib.Path, outputs: Dict[str, Any], serial: int = 1) -> None:
+    """Write ``outputs`` as a minimal version-4 state file."""
+    state = {
+        "version": 4,
+        "terraform_version": "1.6.0",
+        "serial": serial,
+        "lineage": "skyforge-benchmark",
+        "outputs": outputs,
+        "resources": [],
+    }
+    path.write_text(json.dumps(state), encoding="utf-8")
+
+
+# (module call under a cloud module, its source) as in modules/<cloud>/main.tf.
+_PLAN_MODULES = {
+    "aws": (("app_stack", "./app_stack"), ("gwlb_paloalto", "./gwlb_paloalto"), ("fortinet_connect", "./fortinet_connect")),
+    "azure": (("workloads", "./workloads"),),
+    "gcp": (("workloads", "./workloads"),),
+}
+
+
+def _resource_change(module: str, kind: str, name: str, index: int, after: Dict[str, Any]) -> Dict[str, Any]:
+    address = f"{module}.{kind}.{name}[{index}]" if module else f"{kind}.{name}[{index}]"
+    body = {
+        **after,
+        "tags": {"Project": "skyforge", "Name": f"{name}-{index}"},
+        # Bulk comparable to real bodies (user_data, policies, rule sets).
+        "user_data": "#!/bin/bash\n" + "echo skyforge-bootstrap\n" * 12,
+    }
+    return {
+        "address": address,
+        "module_address": module or None,
+        "mode": "managed",
+        "type": kind,
+        "name": name,
+        "index": index,
+        "provider_name": f"registry.terraform.io/hashicorp/{kind.split('_')[0]}",
+        "change": {"actions": ["create"], "before": None, "after": body, "after_unknown": {"id": True, "arn": True}},
+    }
+
+
+def generate_plan(spec: Spec) -> Dict[str, Any]:
+    changes: List[Dict[str, Any]] = []
+    for cloud, regions in (
+        ("aws", _regions(AWS_REGIONS, spec.regions)),
+        ("azure", _regions(AZURE_REGIONS, spec.regions)),
+        ("gcp", _regions(GCP_REGIONS, spec.regions)),
+    ):
+        for i, region in enumerate(regions):
+            module = f'module.{cloud}["{region}"]'
+            for n in range(10):
+                changes.append(_resource_change(module, f"{cloud}_subnet", "this", n, {"cidr_block": f"10.{i & 255}.{n}.0/24"}))
+            if cloud == "aws":
+                changes.append(_resource_change(f"{module}.module.app_stack[0]", "aws_lb", "app", 0, {"name": f"app-{region}", "load_balancer_type": "application"}))
+                gwlb = f"{module}.module.gwlb_paloalto[0]"
+                changes.append(_resource_change(gwlb, "aws_lb", "this", 0, {"name": f"gwlb-{region}", "load_balancer_type": "gateway"}))
+                for n in range(spec.firewalls_per_region):
+                    changes.append(_resource_change(gwlb, "aws_instance", "firewall", n, {"instance_type": "m5.xlarge"}))
+                changes.append(_resource_change(f"{module}.module.fortinet_connect[0]", "aws_instance", "fortinet", 0, {"instance_type": "c5.xlarge"}))
+                for n in range(spec.links_per_region):
+                    changes.append(_resource_change(module, "aws_vpn_connection", "vnf", n, {"type": "ipsec.1"}))
+            elif cloud == "azure":
+                changes.append(_resource_change(module, "azurerm_linux_virtual_machine", "asa", 0, {"name": f"asa-{region}"}))
+                changes.append(_resource_change(f"{module}.module.workloads[0]", "azurerm_lb", "app", 0, {"name": f"lb-{region}"}))
+            else:
+                changes.append(_resource_change(module, "google_compute_instance", "checkpoint", 0, {"name": f"cp-{region}"}))
+                for n in range(spec.links_per_region):
+                    changes.append(_resource_change(module, "google_compute_vpn_tunnel", "vnf", n, {"name": f"tunnel-{region}-{n}"}))
+    module_calls = {
+        cloud: {
+            "source": f"./modules/{cloud}",
+            "expressions": {"region": {"references": ["each.key"]}},
+            "for_each_expression": {"references": [f"local.{cloud}_regions"]},
+            "module": {
+                "resources": [{"address": "placeholder", "mode": "managed", "type": "null_resource", "name": "x"}],
+                "module_calls": {name: {"source": source, "module": {"resources": []}} for name, source in calls},
+            },
+        }
+        for cloud, calls in _PLAN_MODULES.items()
+    }
+    return {
+        "format_version": "1.2",
+        "terraform_version": "1.6.0",
+        "variables": {"environment": {"value": "demo"}},
+        "planned_values": {"root_module": {"resources": [change["change"]["after"] for change in changes]}},
+        "resource_changes": changes,
+        "configuration": {"provider_config": {}, "root_module": {"module_calls": module_calls}},
+    }
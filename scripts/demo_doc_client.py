@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""Send a request to a running `generate_demo_doc.py --daemon`.
+
+Only the standard library's socket handling is imported, so a refresh
+returns as soon as the daemon answers. See ``demodoc/client.py``.
+"""
+
+from demodoc.client import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
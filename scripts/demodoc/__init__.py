@@ -0,0 +1 @@
+"""Helpers backing ``scripts/generate_demo_doc.py``."""
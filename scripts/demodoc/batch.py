@@ -0,0 +1,158 @@
+"""Generate demo docs for many workspaces or state files in parallel.
+
+Targets are resolved into ``BatchJob`` descriptions up front, then handed to
+a process pool of bounded size. Each job enforces its own deadline on the
+terraform subprocess; the pool is additionally torn down once the batch as a
+whole overruns, so a wedged job cannot hold the run open.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+import multiprocessing
+import pathlib
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .state import default_state_path
+
+# Grace on top of the per-job budget for process start-up and result pickling.
+POOL_GRACE = 5.0
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchJob:
+    name: str
+    source: str
+    doc_path: pathlib.Path
+    state_path: Optional[pathlib.Path] = None
+    workspace: Optional[str] = None
+    workdir: Optional[pathlib.Path] = None
+    timeout: Optional[float] = None
+    use_cache: bool = True
+    template: Optional[pathlib.Path] = None
+
+
+def _target_name(path: pathlib.Path) -> str:
+    if path.is_dir():
+        return path.resolve().name
+    if path.stem == "terraform":
+        # terraform.tfstate.d/<workspace>/terraform.tfstate or <dir>/terraform.tfstate
+        return path.resolve().parent.name
+    return path.stem
+
+
+def resolve_targets(
+    targets: Iterable[str],
+    root: pathlib.Path,
+    output_dir: pathlib.Path,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+    template: Optional[pathlib.Path] = None,
+    template_dir: Optional[pathlib.Path] = None,
+) -> List[BatchJob]:
+    """Turn CLI targets into jobs.
+
+    A target is a state file, a Terraform working directory (its local state
+    is read when present, otherwise ``terraform -chdir`` is used) or the name
+    of a workspace in ``root``. A job renders from ``template_dir/<name>.md``
+    when that file exists, otherwise from ``template`` (None: the default).
+    """
+    jobs: List[BatchJob] = []
+    seen: Dict[str, int] = {}
+    for target in targets:
+        path = pathlib.Path(target)
+        state_path: Optional[pathlib.Path] = None
+        workspace: Optional[str] = None
+        workdir: Optional[pathlib.Path] = None
+        if path.is_file():
+            state_path = path
+            name = _target_name(path)
+        elif path.is_dir():
+            workdir = path
+            state_path = default_state_path(path)
+            name = _target_name(path)
+        else:
+            workspace = target
+            state_path = default_state_path(root, workspace)
+            name = target
+
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        if count > 1:
+            name = f"{name}-{count}"
+        custom = template_dir / f"{name}.md" if template_dir is not None else None
+        jobs.append(
+            BatchJob(
+                name=name,
+                source=target,
+                doc_path=output_dir / f"{name}.md",
+                state_path=state_path,
+                workspace=workspace,
+                workdir=workdir,
+                timeout=timeout,
+                use_cache=use_cache,
+                template=custom if custom is not None and custom.is_file() else template,
+            )
+        )
+    return jobs
+
+
+def run_batch(
+    worker: Callable[[BatchJob], Dict[str, Any]],
+    jobs: List[BatchJob],
+    concurrency: int,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Run ``worker`` over ``jobs`` and return one result dict per job, in order."""
+    if not jobs:
+        return []
+    concurrency = max(1, min(concurrency, len(jobs)))
+    deadline: Optional[float] = None
+    if timeout:
+        waves = math.ceil(len(jobs) / concurrency)
+        deadline = time.monotonic() + timeout * waves + POOL_GRACE
+
+    results: List[Dict[str, Any]] = []
+    # Pool.__exit__ terminates workers, which is what frees a wedged job.
+    with multiprocessing.Pool(processes=concurrency) as pool:
+        pending = [(job, pool.apply_async(worker, (job,))) for job in jobs]
+        for job, handle in pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                results.append(handle.get(remaining))
+            except multiprocessing.TimeoutError:
+                results.append({"name": job.name, "status": "timeout", "error": f"no result within {timeout:g}s"})
+            except Exception as exc:  # noqa: BLE001 - reported in the summary
+                results.append({"name": job.name, "status": "failed", "error": f"{type(exc).__name__}: {exc}"})
+    for job, result in zip(jobs, results):
+        result.setdefault("source", job.source)
+        result.setdefault("doc", str(job.doc_path))
+    return results
+
+
+def format_summary(results: List[Dict[str, Any]], elapsed: float) -> str:
+    rows = ["| Job | Source | Status | Load s | Render + write s | Total s |"]
+    rows.append("|-----|--------|--------|-------:|-----------------:|--------:|")
+
+    def seconds(result: Dict[str, Any], key: str) -> str:
+        value = result.get(key)
+        return f"{value:.2f}" if isinstance(value, (int, float)) else "--"
+
+    busy = 0.0
+    for result in results:
+        status = result.get("status", "?")
+        if result.get("status") == "ok" and not result.get("written", True):
+            status = "ok (unchanged)"
+        rows.append(
+            f"| {result['name']} | {result.get('source', '')} | {status} | {seconds(result, 'load_s')} "
+            f"| {seconds(result, 'render_s')} | {seconds(result, 'total_s')} |"
+        )
+        busy += result.get("total_s") or 0.0
+    rows.append("")
+    rows.append(f"{len(results)} jobs in {elapsed:.2f}s wall ({busy:.2f}s of job time)")
+    for result in results:
+        if result.get("error"):
+            rows.append(f"- {result['name']}: {result['error']}")
+    return "\n".join(rows)
@@ -0,0 +1,587 @@
+"""Path catalog derived from the VPN mesh, ALB endpoints and reachability.
+
+Rows come from the deployment rather than a fixed list: one ingress flow per
+AWS application region, one per TGW Connect overlay, one per mesh
+``cloud_links`` and ``vnf_links`` entry, and one per reachability test joined
+with its tfvars definition for endpoints and ports. The deployed mesh from
+``vpn_endpoint_manifest.clouds.mesh`` wins over the tfvars copy when both are
+present. A few policy flows that exercise security groups and ACLs have no
+single source in outputs and stay in ``POLICY_FLOWS``.
+
+The tfvars only describe outputs applied from this workspace. For any
+other outputs (a batch target, a customer's state file) the catalog is
+built from ``NO_CONFIG``, so tests show the endpoints the outputs carry, if
+any, rather than the demo's.
+
+``CatalogIndex`` builds dictionaries keyed on region, cloud and hub_id once,
+so each flow resolves its lookups in constant time and a mesh with thousands
+of links is rendered in a single linear pass.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .model import Alb
+
+# The var-files the demo is applied with (see the doc's apply commands).
+CONFIG_FILES = {
+    "aws": pathlib.Path("environments/aws/demo.auto.tfvars.json"),
+    "azure": pathlib.Path("environments/azure/demo.auto.tfvars.json"),
+    "gcp": pathlib.Path("environments/gcp/demo.auto.tfvars.json"),
+    "vnfs": pathlib.Path("environments/vnfs/demo.auto.tfvars.json"),
+    "mesh": pathlib.Path("environments/network/demo.mesh.auto.tfvars.json"),
+}
+
+# What load_config returns when none of the files exist.
+NO_CONFIG: Dict[str, Any] = {
+    "aws_regions": {},
+    "reachability_tests": {"aws": {}, "azure": {}, "gcp": {}},
+    "sites": {},
+    "vpn_mesh": {"cloud_links": [], "vnf_links": []},
+}
+
+CLOUD_NAMES = {"aws": "AWS", "azure": "Azure", "gcp": "GCP"}
+HUB_KINDS = {"aws": "Transit Gateway", "azure": "vWAN hub", "gcp": "HA VPN"}
+# Keys of a test definition that say what it checks.
+TEST_FIELDS = {
+    "aws": ("source_vpc", "destination_vpc", "protocol", "destination_port"),
+    "azure": ("source_address", "destination_address", "protocol", "destination_port"),
+    "gcp": ("source_ip", "destination_ip", "protocol", "destination_port"),
+}
+REACHABILITY_TOOLS = {
+    "aws": "AWS Reachability Analyzer",
+    "azure": "Azure Network Watcher",
+    "gcp": "GCP Connectivity Test",
+}
+
+
+# Flows keep endpoints and services as tuples, which are cheap to build for
+# the markdown table; ``flow_record`` expands them into dicts for exports.
+ENDPOINT_FIELDS = ("label", "cloud", "region", "hub_id", "address")
+Endpoint = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]
+Service = Tuple[str, Tuple[int, ...]]
+
+
+def _endpoint(
+    label: str,
+    cloud: Optional[str] = None,
+    region: Optional[str] = None,
+    hub_id: Optional[str] = None,
+    address: Optional[str] = None,
+) -> Endpoint:
+    return (label, cloud, region, hub_id, address)
+
+
+def _port(value: Any) -> Optional[int]:
+    """A tfvars or outputs port as an int, or None when it is not a single port number."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def _service(protocol: str, *ports: Any) -> Service:
+    return (protocol, tuple(int(port) for port in ports))
+
+
+# IKE/NAT-T and ESP for the tunnels, BGP inside them.
+IPSEC_BGP_SERVICES = (_service("udp", 500, 4500), _service("esp"), _service("tcp", 179))
+
+POLICY_FLOWS: Tuple[Dict[str, Any], ...] = (
+    {
+        "kind": "policy",
+        "name": "DMZ to App (us-east-1)",
+        "source": "DMZ frontend subnet",
+        "destination": "Shared-services app subnet",
+        "protocol": "TCP 8080/8443 (ephemeral return)",
+        "focus": "Security group `skyforge-us-east-1-app-sg` + NACL `dmz-frontend-web`",
+        "src": _endpoint("DMZ frontend subnet", "aws", "us-east-1"),
+        "dst": _endpoint("Shared-services app subnet", "aws", "us-east-1"),
+        "services": (_service("tcp", 8080, 8443),),
+    },
+    {
+        "kind": "policy",
+        "name": "Application to Database",
+        "source": "Shared-services app subnet",
+        "destination": "Shared-services data subnet",
+        "protocol": "TCP 5432",
+        "focus": "Forward Path Search – Data-tier ACL `data-tier` enforcement",
+        "src": _endpoint("Shared-services app subnet", "aws"),
+        "dst": _endpoint("Shared-services data subnet", "aws"),
+        "services": (_service("tcp", 5432),),
+    },
+    {
+        "kind": "policy",
+        "name": "Logging Ingest Pipeline",
+        "source": "App/DMZ tier",
+        "destination": "Logging VPC ingest subnet",
+        "protocol": "TCP 6514, UDP 514",
+        "focus": "Security group `logging-ingest` + ACL `logging-ingress-acl`",
+        "src": _endpoint("App/DMZ tier", "aws"),
+        "dst": _endpoint("Logging VPC ingest subnet", "aws"),
+        "services": (_service("tcp", 6514), _service("udp", 514)),
+    },
+    {
+        "kind": "policy",
+        "name": "Lambda Controlled Egress",
+        "source": "Serverless private subnet",
+        "destination": "Internet + internal APIs",
+        "protocol": "TCP 443, TCP 8443",
+        "focus": "Security group `lambda-egress` + NAT/TGW routing",
+        "src": _endpoint("Serverless private subnet", "aws"),
+        "dst": _endpoint("Internet + internal APIs"),
+        "services": (_service("tcp", 443, 8443),),
+    },
+    {
+        "kind": "policy",
+        "name": "Bastion Administration",
+        "source": "Corporate IPs",
+        "destination": "Bastion hosts",
+        "protocol": "TCP 22 / TCP 3389",
+        "focus": "Security group `bastion-admin`, ACL `bastion-acl`",
+        "src": _endpoint("Corporate IPs"),
+        "dst": _endpoint("Bastion hosts", "aws"),
+        "services": (_service("tcp", 22, 3389),),
+    },
+    {
+        "kind": "policy",
+        "name": "PrivateLink SSM Access",
+        "source": "Shared-services app subnet",
+        "destination": "SSM interface endpoint",
+        "protocol": "TCP 443",
+        "focus": "Forward Path Search – PrivateLink interface endpoint coverage",
+        "src": _endpoint("Shared-services app subnet", "aws"),
+        "dst": _endpoint("SSM interface endpoint", "aws"),
+        "services": (_service("tcp", 443),),
+    },
+    {
+        "kind": "policy",
+        "name": "Azure Front Door Path",
+        "source": "Azure Front Door endpoint",
+        "destination": "Azure Application Gateway → App Service",
+        "protocol": "HTTPS 443 (health probes HTTP)",
+        "focus": "Forward Path Search – Azure WAF policy + hub reachability",
+        "src": _endpoint("Azure Front Door endpoint", "azure"),
+        "dst": _endpoint("Azure Application Gateway → App Service", "azure"),
+        "services": (_service("tcp", 443, 80),),
+    },
+    {
+        "kind": "policy",
+        "name": "GCP Global HTTP LB",
+        "source": "GCP HTTPS LB",
+        "destination": "Cloud Run service",
+        "protocol": "HTTPS 443",
+        "focus": "Forward Path Search – GCP firewall rules + Cloud Run IAM",
+        "src": _endpoint("GCP HTTPS LB", "gcp"),
+        "dst": _endpoint("Cloud Run service", "gcp"),
+        "services": (_service("tcp", 443),),
+    },
+    {
+        "kind": "policy",
+        "name": "Blocked Path Sanity Check",
+        "source": "Bastion subnet",
+        "destination": "Logging ops subnet",
+        "protocol": "TCP 22",
+        "focus": "Forward Path Search – detect intentional violation (expect DENY)",
+        "src": _endpoint("Bastion subnet", "aws"),
+        "dst": _endpoint("Logging ops subnet", "aws"),
+        "services": (_service("tcp", 22),),
+    },
+)
+
+
+def _read_json(path: pathlib.Path) -> Dict[str, Any]:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+_loaded: Dict[pathlib.Path, Tuple[Tuple[Any, ...], Dict[str, Any]]] = {}
+
+
+def _signature(root: pathlib.Path) -> Tuple[Any, ...]:
+    signature = []
+    for path in CONFIG_FILES.values():
+        try:
+            st = os.stat(root / path)
+        except OSError:
+            signature.append(None)
+            continue
+        signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(signature)
+
+
+def load_config(root: pathlib.Path) -> Dict[str, Any]:
+    """Read the parts of the demo tfvars the catalog needs.
+
+    Only the fields used for rendering are kept so the result is cheap to
+    hash as a section-cache input. Missing or unreadable files contribute
+    empty values. The result is reused until one of the files' stat
+    signature changes, so watch mode picks up edits without re-parsing on
+    every render.
+    """
+    signature = _signature(root)
+    cached = _loaded.get(root)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    config = _parse_config(root)
+    _loaded[root] = (signature, config)
+    return config
+
+
+def _parse_config(root: pathlib.Path) -> Dict[str, Any]:
+    files = {name: _read_json(root / path) for name, path in CONFIG_FILES.items()}
+    aws = files["aws"]
+
+    regions: Dict[str, Dict[str, Any]] = {}
+    for region, config in _dict(aws.get("aws_regions")).items():
+        config = _dict(config)
+        regions[region] = {
+            "app_stack": bool(_dict(config.get("app_stack")).get("enable")),
+            "network_firewall": bool(config.get("enable_network_firewall")),
+            "gateway_lb": bool(config.get("enable_gateway_lb")),
+            "tgw_connect": bool(_dict(config.get("transit_gateway_connect")).get("enable")),
+        }
+
+    tests: Dict[str, Dict[str, List[Dict[str, Any]]]] = {"aws": {}, "azure": {}, "gcp": {}}
+    for region, config in _dict(aws.get("aws_reachability")).items():
+        tests["aws"][region] = _list(_dict(config).get("paths"))
+    azure = files["azure"]
+    azure_tests = dict(_dict(azure.get("azure_reachability")))
+    # The demo file nests the map under a region; accept either placement.
+    for config in _dict(azure.get("azure_regions")).values():
+        for region, entry in _dict(_dict(config).get("azure_reachability")).items():
+            azure_tests.setdefault(region, entry)
+    for region, config in azure_tests.items():
+        tests["azure"][region] = _list(_dict(config).get("tests"))
+    for region, config in _dict(files["gcp"].get("gcp_reachability")).items():
+        tests["gcp"][region] = _list(_dict(config).get("tests"))
+
+    sites = {
+        name: _dict(site).get("location") or name
+        for name, site in _dict(files["vnfs"].get("vnf_endpoints")).items()
+    }
+    mesh = _dict(files["mesh"].get("vpn_mesh"))
+    return {
+        "aws_regions": regions,
+        "reachability_tests": tests,
+        "sites": sites,
+        "vpn_mesh": {"cloud_links": _list(mesh.get("cloud_links")), "vnf_links": _list(mesh.get("vnf_links"))},
+    }
+
+
+def _cloud(name: Optional[str]) -> str:
+    return CLOUD_NAMES.get(name or "", name or "?")
+
+
+def _hub_text(endpoint: Endpoint) -> str:
+    label, _, _, hub_id, _ = endpoint
+    return f"{label} `{hub_id}`" if hub_id else label
+
+
+def _site_label(name: str) -> str:
+    return name.replace("_", " ").title()
+
+
+class CatalogIndex:
+    """Lookup tables shared by every flow in one catalog build."""
+
+    def __init__(
+        self,
+        cloud_links: Iterable[Dict[str, Any]],
+        vnf_links: Iterable[Dict[str, Any]],
+        albs: Dict[str, Alb],
+        reachability: Dict[str, Any],
+        sites: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.cloud_links = [link for link in cloud_links if isinstance(link, dict)]
+        self.vnf_links = [link for link in vnf_links if isinstance(link, dict)]
+        self.albs = albs
+        self.sites = sites or {}
+        # hub_id -> (cloud, region), from both ends of every link.
+        self.hubs: Dict[str, Tuple[str, str]] = {}
+        for link in self.cloud_links:
+            for end in (_dict(link.get("source")), _dict(link.get("target"))):
+                self._add_hub(end.get("hub_id"), end.get("cloud"), end.get("region"))
+        for link in self.vnf_links:
+            self._add_hub(link.get("hub_id"), link.get("cloud"), link.get("region"))
+        # (cloud, region) -> {test name: resource id}, and the definitions
+        # of tests whose output entry is an object rather than an id.
+        self.tests: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self.definitions: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        reachability = _dict(reachability)
+        aws = _dict(reachability.get("aws"))
+        for region, paths in _dict(aws.get("paths")).items():
+            self._add_tests("aws", region, _dict(paths))
+        for cloud in ("azure", "gcp"):
+            for region, entries in _dict(reachability.get(cloud)).items():
+                self._add_tests(cloud, region, _dict(entries))
+
+    def _add_tests(self, cloud: str, region: str, entries: Dict[str, Any]) -> None:
+        tests = self.tests[(cloud, region)] = {}
+        for name, value in entries.items():
+            if isinstance(value, dict):
+                self.definitions[(cloud, region, name)] = value
+                value = value.get("id") or value.get("name") or ""
+            tests[name] = str(value)
+
+    def _add_hub(self, hub_id: Any, cloud: Any, region: Any) -> None:
+        if hub_id and cloud and region:
+            self.hubs.setdefault(str(hub_id), (str(cloud), str(region)))
+
+    def alb_dns(self, region: str) -> str:
+        alb = self.albs.get(region)
+        return (alb.dns_name if alb is not None else None) or f"ALB {region} (pending)"
+
+    def hub_endpoint(self, hub_id: Any, cloud: Any = None, region: Any = None) -> Endpoint:
+        hub_id = str(hub_id) if hub_id else None
+        if hub_id and hub_id in self.hubs:
+            cloud, region = self.hubs[hub_id]
+        kind = HUB_KINDS.get(cloud or "", "hub")
+        return _endpoint(f"{_cloud(cloud)} {kind} ({region or '?'})", cloud, region, hub_id=hub_id)
+
+    def test_count(self, cloud: str, region: str) -> int:
+        return len(self.tests.get((cloud, region), ()))
+
+    def site_label(self, site: str) -> str:
+        location = self.sites.get(site)
+        return f"VNF {_site_label(site)}" + (f" ({location})" if location and location != site else "")
+
+
+def _ingress_flows(context: Dict[str, Any], config: Dict[str, Any], index: CatalogIndex) -> Iterator[Dict[str, Any]]:
+    accelerator = context["accelerator"]
+    address = accelerator.address if accelerator is not None else None
+    source = address or "Internet client"
+    src = _endpoint(source, "aws", address=address) if address else _endpoint(source)
+    ports = (accelerator.listener_ports if accelerator is not None else ()) or (80, 443)
+    listener = "TCP " + "/".join(str(port) for port in ports)
+    services = (_service("tcp", *ports),)
+    regions = _dict(config.get("aws_regions"))
+    ordered = [region for region, flags in regions.items() if flags.get("app_stack")]
+    ordered += sorted(region for region in index.albs if region not in regions)
+    gwlb = context["gwlb"]
+    for region in ordered:
+        flags = regions.get(region, {})
+        alb = index.alb_dns(region)
+        if flags.get("gateway_lb") or region in gwlb:
+            destination = f"{alb} → GWLB → Palo Alto → EKS service"
+            protocol = f"{listener} → NodePort 30080/30443"
+            focus = "Forward Path Search – GWLB inline firewall + Kubernetes"
+        elif flags.get("network_firewall"):
+            destination = f"{alb} → Web ASG → Network Firewall → PostgreSQL"
+            protocol = f"{listener} → backend 80 → TCP 5432"
+            focus = "Forward Path Search – AWS Network Firewall inspection"
+        else:
+            destination = f"{alb} → Web ASG → PostgreSQL"
+            protocol = f"{listener} → backend 80 → TCP 5432"
+            focus = "Forward Path Search – multi-tier reachability, SGs, NACL"
+        yield {
+            "kind": "ingress",
+            "name": f"Global App Ingress ({region})",
+            "source": source,
+            "destination": destination,
+            "protocol": protocol,
+            "focus": focus,
+            "src": src,
+            "dst": _endpoint(destination, "aws", region, address=index.albs[region].dns_name if region in index.albs else None),
+            "services": services,
+        }
+    if gwlb or any(flags.get("gateway_lb") for flags in regions.values()):
+        yield {
+            "kind": "ingress",
+            "name": "GWLB Inline Inspection",
+            "source": "Internet client",
+            "destination": "Palo Alto → app subnet",
+            "protocol": "TCP 80/443",
+            "focus": "GWLB endpoint chaining + security group `gwlb-management`",
+            "src": _endpoint("Internet client"),
+            "dst": _endpoint("Palo Alto → app subnet", "aws"),
+            "services": (_service("tcp", 80, 443),),
+        }
+
+
+def _tgw_connect_flows(context: Dict[str, Any], config: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    deployed = context["tgw_connect"]
+    configured = [region for region, flags in _dict(config.get("aws_regions")).items() if flags.get("tgw_connect")]
+    for region in configured + sorted(region for region in deployed if region not in configured):
+        connect = deployed.get(region)
+        source = f"Fortinet FortiGate ({region} transport)"
+        yield {
+            "kind": "tgw_connect",
+            "name": f"Transit Gateway Connect Overlay ({region})",
+            "source": source,
+            "destination": "AWS Transit Gateway Connect attachment",
+            "protocol": "GRE 47 + BGP TCP 179",
+            "focus": "Forward Path Search – TGW Connect GRE overlay and BGP route advertisement",
+            "src": _endpoint(source, "aws", region, address=connect.peer_address if connect is not None else None),
+            "dst": _endpoint("AWS Transit Gateway Connect attachment", "aws", region, hub_id=connect.attachment_id if connect is not None else None),
+            "services": (_service("gre"), _service("tcp", 179)),
+        }
+
+
+def _cloud_link_flows(index: CatalogIndex) -> Iterator[Dict[str, Any]]:
+    for link in index.cloud_links:
+        source, target = _dict(link.get("source")), _dict(link.get("target"))
+        tunnels = _list(link.get("tunnels"))
+        protos = sorted({str(_dict(t).get("preferred_proto")) for t in tunnels if _dict(t).get("preferred_proto")})
+        bgp = _dict(link.get("bgp"))
+        tests = index.test_count(str(target.get("cloud")), str(target.get("region")))
+        focus = f"Forward Path Search – cloud VPN mesh, BGP AS{bgp.get('source_asn', '?')} ↔ AS{bgp.get('target_asn', '?')}"
+        if tests:
+            focus += f"; {tests} reachability test{'s' if tests != 1 else ''} at the far end"
+        src = index.hub_endpoint(source.get("hub_id"), source.get("cloud"), source.get("region"))
+        dst = index.hub_endpoint(target.get("hub_id"), target.get("cloud"), target.get("region"))
+        yield {
+            "kind": "cloud_link",
+            "name": (
+                f"{_cloud(source.get('cloud'))} {source.get('region', '?')} ↔ "
+                f"{_cloud(target.get('cloud'))} {target.get('region', '?')}"
+            ),
+            "source": _hub_text(src),
+            "destination": _hub_text(dst),
+            "protocol": f"IPsec/BGP, {len(tunnels)} tunnel{'s' if len(tunnels) != 1 else ''} ({'/'.join(protos) or 'IPv4'})",
+            "focus": focus,
+            "src": src,
+            "dst": dst,
+            "services": IPSEC_BGP_SERVICES,
+        }
+
+
+def _vnf_link_flows(index: CatalogIndex) -> Iterator[Dict[str, Any]]:
+    for link in index.vnf_links:
+        site = str(link.get("site") or "?")
+        cloud, region = link.get("cloud"), link.get("region")
+        mode = link.get("tunnel_mode") or "route-based"
+        proto = link.get("preferred_proto") or "IPv4"
+        gateway = link.get("customer_gateway_ipv6") if proto == "IPv6" else link.get("customer_gateway_ipv4")
+        gateway = gateway or link.get("customer_gateway_ip") or link.get("customer_gateway_ipv4") or link.get("customer_gateway_ipv6")
+        label = index.site_label(site)
+        dst = index.hub_endpoint(link.get("hub_id"), cloud, region)
+        yield {
+            "kind": "vnf_link",
+            "name": f"{_site_label(site)} On-Prem → {_cloud(cloud)} {region or '?'}",
+            "source": label + (f" `{gateway}`" if gateway else ""),
+            "destination": _hub_text(dst),
+            "protocol": f"IPsec/BGP ({mode}, {proto}), tunneled HTTPS",
+            "focus": f"Forward Path Search – VPN manifest, BGP AS{link.get('bgp_asn', '?')} into the {_cloud(cloud)} hub",
+            "src": _endpoint(label, address=str(gateway) if gateway else None),
+            "dst": dst,
+            "services": IPSEC_BGP_SERVICES,
+        }
+
+
+def _test_endpoints(cloud: str, region: str, test: Dict[str, Any]) -> Tuple[Endpoint, Endpoint, str, Service]:
+    """Source and destination endpoints, protocol text and service of one test definition."""
+    if cloud == "aws":
+        source, destination = test.get("source_vpc"), test.get("destination_vpc")
+        src = _endpoint(f"{source} VPC" if source else "?", cloud, region)
+        dst = _endpoint(f"{destination} VPC" if destination else "?", cloud, region)
+    else:
+        keys = ("source_address", "destination_address") if cloud == "azure" else ("source_ip", "destination_ip")
+        source, destination = test.get(keys[0]), test.get(keys[1])
+        src = _endpoint(source or "?", cloud, region, address=source)
+        dst = _endpoint(destination or "?", cloud, region, address=destination)
+    protocol = str(test.get("protocol") or ("Tcp" if cloud == "azure" else "TCP")).upper()
+    port = test.get("destination_port")
+    number = _port(port)
+    # A range or service name is shown as written but exported protocol-only.
+    service = _service(protocol.lower(), number) if number else _service(protocol.lower())
+    return src, dst, f"{protocol} {port}" if port else protocol, service
+
+
+def _reachability_flows(config: Dict[str, Any], index: CatalogIndex) -> Iterator[Dict[str, Any]]:
+    configured = _dict(config.get("reachability_tests"))
+    # Grouped by cloud; within one, the tfvars regions in their own order,
+    # then regions only the outputs have.
+    keys: List[Tuple[str, str]] = []
+    for cloud in CLOUD_NAMES:
+        regions = list(_dict(configured.get(cloud)))
+        regions += sorted(region for key_cloud, region in index.tests if key_cloud == cloud and region not in regions)
+        keys += [(cloud, region) for region in regions]
+
+    for cloud, region in keys:
+        deployed = index.tests.get((cloud, region), {})
+        definitions = [_dict(test) for test in _list(_dict(configured.get(cloud)).get(region)) if _dict(test).get("name")]
+        defined = {test["name"] for test in definitions}
+        definitions += [
+            {**index.definitions.get((cloud, region, name), {}), "name": name} for name in sorted(deployed) if name not in defined
+        ]
+        for test in definitions:
+            name = str(test["name"])
+            if any(key in test for key in TEST_FIELDS[cloud]):
+                src, dst, protocol, service = _test_endpoints(cloud, region, test)
+                source, destination, services = src[0], dst[0], (service,)
+            else:
+                # Only an id in the outputs and no definition to join it with.
+                src = dst = _endpoint("?", cloud, region)
+                source, destination, protocol, services = "not defined in tfvars", "", "?", ()
+            resource = deployed.get(name) or None
+            if resource:
+                status = f"`{resource}`"
+            else:
+                status = "(no id in outputs)" if name in deployed else "(not deployed)"
+            yield {
+                "kind": "reachability",
+                "name": f"{_cloud(cloud)} {region}: {name}",
+                "source": source,
+                "destination": destination,
+                "protocol": protocol,
+                "focus": f"{REACHABILITY_TOOLS[cloud]} {status}",
+                "src": src,
+                "dst": dst,
+                "services": services,
+                "resource": resource,
+            }
+
+
+def build_flows(context: Dict[str, Any], config: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield catalog flows in display order.
+
+    Each flow carries the markdown cells (``name``, ``source``,
+    ``destination``, ``protocol``, ``focus``) plus the structured ``kind``,
+    ``src``/``dst`` endpoints and ``services`` that ``flow_record`` exports.
+    """
+    mesh = _dict(context.get("mesh")) or _dict(config.get("vpn_mesh"))
+    index = CatalogIndex(
+        _list(mesh.get("cloud_links")),
+        _list(mesh.get("vnf_links")),
+        context["application_albs"],
+        context["reachability"],
+        _dict(config.get("sites")),
+    )
+    yield from _ingress_flows(context, config, index)
+    yield from POLICY_FLOWS
+    yield from _tgw_connect_flows(context, config)
+    yield from _cloud_link_flows(index)
+    yield from _vnf_link_flows(index)
+    yield from _reachability_flows(config, index)
+
+
+def flow_record(flow: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain-data view of one flow for the NDJSON/CSV/JSON exports."""
+    return {
+        "kind": flow["kind"],
+        "name": flow["name"],
+        "source": dict(zip(ENDPOINT_FIELDS, flow["src"])),
+        "destination": dict(zip(ENDPOINT_FIELDS, flow["dst"])),
+        "protocol": flow["protocol"],
+        "services": [{"protocol": protocol, "ports": list(ports)} for protocol, ports in flow["services"]],
+        "focus": flow["focus"].replace("`", ""),
+        "resource": flow.get("resource"),
+    }
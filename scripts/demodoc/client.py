@@ -0,0 +1,144 @@
+"""Thin client for the generator daemon (``generate_demo_doc.py --daemon``).
+
+Requests are one JSON object per connection, newline terminated; the
+daemon answers with a JSON header line followed, for ``get-section``, by
+the section text until it closes the connection. This module only needs
+the standard library's socket and json, so a refresh from a pre-commit
+hook or CI step costs an interpreter start and a round trip instead of a
+Terraform read and a full render:
+
+    python3 scripts/demo_doc_client.py regenerate
+    python3 scripts/demo_doc_client.py get-section mesh
+    python3 scripts/demo_doc_client.py status
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import socket
+import sys
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+# Same path as generate_demo_doc.DAEMON_SOCKET; spelled out here so the
+# client does not import the generator.
+DEFAULT_SOCKET = pathlib.Path(__file__).resolve().parents[2] / ".cache" / "generate_demo_doc" / "daemon.sock"
+OPS = ("regenerate", "get-section", "status")
+# Requests are tiny; anything longer is rejected rather than buffered.
+MAX_REQUEST = 64 * 1024
+READ_CHUNK = 64 * 1024
+DEFAULT_TIMEOUT = 300.0
+# Exit status when nothing is listening, so callers can fall back to a
+# one-shot `generate_demo_doc.py` run.
+EXIT_NO_DAEMON = 2
+
+
+class DaemonUnavailable(OSError):
+    """No daemon is listening on the socket."""
+
+
+class _Response:
+    def __init__(self, sock: socket.socket, stream: BinaryIO, header: Dict[str, Any]) -> None:
+        self.header = header
+        self._sock = sock
+        self._stream = stream
+
+    def body(self) -> Iterator[bytes]:
+        try:
+            for chunk in iter(lambda: self._stream.read1(READ_CHUNK), b""):
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stream.close()
+        self._sock.close()
+
+    def __enter__(self) -> "_Response":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def request(
+    op: str,
+    socket_path: pathlib.Path = DEFAULT_SOCKET,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    **params: Any,
+) -> _Response:
+    """Send one request; the response's ``header`` is decoded, its body left unread."""
+    payload = json.dumps({"op": op, **params}).encode("utf-8") + b"\n"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError) as exc:
+        sock.close()
+        raise DaemonUnavailable(f"no generator daemon listening on {socket_path}") from exc
+    try:
+        sock.sendall(payload)
+        sock.shutdown(socket.SHUT_WR)
+        stream = sock.makefile("rb")
+        line = stream.readline(MAX_REQUEST)
+        header = json.loads(line) if line else {"ok": False, "error": "daemon closed the connection"}
+    except BaseException:
+        sock.close()
+        raise
+    return _Response(sock, stream, header)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Talk to a running `generate_demo_doc.py --daemon`")
+    parser.add_argument("--socket", type=pathlib.Path, default=DEFAULT_SOCKET, help=f"Daemon socket (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for the daemon (0 waits forever)")
+    commands = parser.add_subparsers(dest="op", required=True)
+    regenerate = commands.add_parser("regenerate", help="Reload outputs if they changed and rewrite the doc")
+    regenerate.add_argument("--no-reload", action="store_true", help="Render from the outputs the daemon already holds")
+    section = commands.add_parser("get-section", help="Print one rendered doc section")
+    section.add_argument("name", help="Section name, e.g. path_catalog, mesh, address_plan, reachability")
+    commands.add_parser("status", help="Print the daemon's state as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    params: Dict[str, Any] = {}
+    if args.op == "regenerate":
+        params["reload"] = not args.no_reload
+    elif args.op == "get-section":
+        params["name"] = args.name
+    try:
+        response = request(args.op, args.socket, args.timeout or None, **params)
+    except DaemonUnavailable as exc:
+        print(f"{exc}; start one with `./scripts/generate_demo_doc.py --daemon`", file=sys.stderr)
+        return EXIT_NO_DAEMON
+    except (OSError, ValueError) as exc:
+        print(f"daemon request failed: {exc}", file=sys.stderr)
+        return 1
+    with response:
+        header = response.header
+        if not header.get("ok"):
+            print(f"daemon: {header.get('error', 'request failed')}", file=sys.stderr)
+            return 1
+        if args.op == "get-section":
+            out = sys.stdout.buffer
+            for chunk in response.body():
+                out.write(chunk)
+            out.flush()
+        elif args.op == "regenerate":
+            print(_regenerate_summary(header))
+        else:
+            header.pop("ok", None)
+            print(json.dumps(header, indent=2, sort_keys=True))
+    return 0
+
+
+def _regenerate_summary(header: Dict[str, Any]) -> str:
+    verb = "Updated" if header.get("written") else "Unchanged"
+    line = f"{verb} {header.get('doc')} in {header.get('seconds', 0.0) * 1000:.0f}ms"
+    if header.get("error"):
+        line += f" (Terraform outputs unavailable: {header['error']})"
+    return line
+
@@ -0,0 +1,168 @@
+"""Unix domain socket server for ``generate_demo_doc.py --daemon``.
+
+The daemon owns the parsed outputs and the section cache for as long as it
+runs, so a ``regenerate`` request costs a state ``stat`` and a warm render
+rather than an interpreter start, a Terraform read and a cold render.
+Each connection carries one request (see ``client.py`` for the framing);
+handlers return a JSON-able header and optionally an iterable of text that
+is streamed back after it. ``status`` is answered here, without waiting
+for a regeneration in progress.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .client import MAX_REQUEST, READ_CHUNK
+
+Handler = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], Optional[Iterable[str]]]]
+
+
+class DaemonError(RuntimeError):
+    """The daemon socket cannot be claimed."""
+
+
+class RequestError(ValueError):
+    """A request the daemon understood but cannot serve; reported to the client."""
+
+
+def _claim(path: pathlib.Path) -> None:
+    # A socket file left by a daemon that died is removed; a live one is not.
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        path.unlink(missing_ok=True)
+        return
+    except OSError as exc:
+        raise DaemonError(f"cannot use {path}: {exc.strerror or exc}") from exc
+    finally:
+        probe.close()
+    raise DaemonError(f"a daemon is already listening on {path}")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    # Section rows are small; buffer them into socket-sized writes.
+    wbufsize = READ_CHUNK
+    server: "DocDaemon"
+
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST + 1)
+        try:
+            if len(line) > MAX_REQUEST:
+                raise RequestError(f"request exceeds {MAX_REQUEST} bytes")
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("request must be a JSON object")
+        except ValueError as exc:
+            self._reply({"ok": False, "error": f"bad request: {exc}"})
+            return
+        op = request.get("op")
+        self.server.count(op)
+        handler = self.server.handlers.get(op)
+        if handler is None:
+            expected = ", ".join(sorted(self.server.handlers))
+            self._reply({"ok": False, "error": f"unknown op {op!r} (expected one of {expected})"})
+            return
+        try:
+            header, body = handler(request)
+        except RequestError as exc:
+            self._reply({"ok": False, "error": str(exc)})
+            return
+        except Exception as exc:  # noqa: BLE001 - one bad request must not stop the daemon
+            print(f"daemon: {op} failed: {exc!r}", file=sys.stderr)
+            self._reply({"ok": False, "error": f"{op} failed: {exc}"})
+            return
+        self._reply({"ok": True, **header})
+        if body is not None:
+            self._stream(op, body)
+
+    def finish(self) -> None:
+        try:
+            super().finish()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading (e.g. piped into head)
+
+    def _reply(self, header: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(header, default=str).encode("utf-8") + b"\n")
+
+    def _stream(self, op: str, body: Iterable[str]) -> None:
+        try:
+            for chunk in body:
+                self.wfile.write(chunk.encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as exc:  # noqa: BLE001 - the header is out; just cut the body short
+            print(f"daemon: {op} failed mid-stream: {exc!r}", file=sys.stderr)
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+
+class DocDaemon(socketserver.ThreadingUnixStreamServer):
+    """Dispatch one JSON request per connection to ``handlers`` by ``op``."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        handlers: Dict[str, Handler],
+        status: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> None:
+        self.path = path
+        self.handlers = dict(handlers)
+        self.handlers["status"] = self._status
+        self._status_extra = status
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _claim(path)
+        # Owner-only socket: sections include appliance credentials.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(path), _RequestHandler)
+        except OSError as exc:
+            raise DaemonError(f"cannot listen on {path}: {exc.strerror or exc}") from exc
+        finally:
+            os.umask(umask)
+        self._inode = os.stat(path).st_ino
+
+    def count(self, op: Any) -> None:
+        with self._lock:
+            key = op if isinstance(op, str) and op in self.handlers else "invalid"
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def _status(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], None]:
+        with self._lock:
+            requests = dict(self.requests)
+        status = {
+            "pid": os.getpid(),
+            "socket": str(self.path),
+            "uptime_s": round(time.time() - self.started, 3),
+            "requests": requests,
+        }
+        if self._status_extra is not None:
+            status.update(self._status_extra())
+        return status, None
+
+    def server_close(self) -> None:
+        super().server_close()
+        # Only remove the socket if it is still ours and not a successor's.
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                self.path.unlink()
+        except OSError:
+            pass
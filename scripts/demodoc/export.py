@@ -0,0 +1,106 @@
+"""Machine-readable exports of the path catalog.
+
+Every flow from ``catalog.build_flows`` is written as one record with
+structured ``source``/``destination`` endpoints (label, cloud, region,
+hub_id, address) and ``services`` (protocol plus destination ports), ready
+for bulk Forward Path Search without scraping the markdown table. Records
+are serialised one at a time and handed out in ~64 KiB chunks, so exporting
+a catalog with tens of thousands of flows never holds more than one chunk.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from .catalog import ENDPOINT_FIELDS, flow_record
+
+FORMATS = ("ndjson", "csv", "json")
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+}
+CHUNK_SIZE = 64 * 1024
+CSV_COLUMNS = (
+    "kind",
+    "name",
+    *(f"source_{field}" for field in ENDPOINT_FIELDS),
+    *(f"destination_{field}" for field in ENDPOINT_FIELDS),
+    "protocol",
+    "services",
+    "focus",
+    "resource",
+)
+
+
+def _services_text(services: Iterable[Dict[str, Any]]) -> str:
+    # "tcp/6514 udp/514 esp" -- one protocol/port pair per token.
+    tokens = []
+    for service in services:
+        ports = service.get("ports") or ()
+        if ports:
+            tokens.extend(f"{service['protocol']}/{port}" for port in ports)
+        else:
+            tokens.append(service["protocol"])
+    return " ".join(tokens)
+
+
+def _csv_row(record: Dict[str, Any]) -> List[Any]:
+    row: List[Any] = [record["kind"], record["name"]]
+    for side in ("source", "destination"):
+        endpoint = record[side]
+        row.extend(endpoint.get(field) or "" for field in ENDPOINT_FIELDS)
+    row.extend((record["protocol"], _services_text(record["services"]), record["focus"], record.get("resource") or ""))
+    return row
+
+
+def _ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _json(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    separator = "[\n"
+    for record in records:
+        yield separator + json.dumps(record, ensure_ascii=False)
+        separator = ",\n"
+    yield "[]\n" if separator == "[\n" else "\n]\n"
+
+
+def _csv(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    for record in records:
+        writer.writerow(_csv_row(record))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+WRITERS: Dict[str, Callable[[Iterable[Dict[str, Any]]], Iterator[str]]] = {
+    "ndjson": _ndjson,
+    "csv": _csv,
+    "json": _json,
+}
+
+
+def iter_export(flows: Iterable[Dict[str, Any]], fmt: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield ``flows`` serialised as ``fmt`` in chunks of about ``chunk_size`` characters."""
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    pending: List[str] = []
+    size = 0
+    for piece in WRITERS[fmt](flow_record(flow) for flow in flows):
+        pending.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield "".join(pending)
@@ -0,0 +1,341 @@
+"""Doc sections split into per-cloud and per-region fragments for filtered views.
+
+Renderers that know which cloud and region each line is about produce
+``Piece``s; ``split`` turns one section's pieces into fragments keyed
+``(section, cloud, region)``:
+
+- ``(section, None, None)`` is the whole section, exactly as in the doc;
+- ``(section, cloud, None)`` holds every line that touches ``cloud``;
+- ``(section, cloud, region)`` holds the lines about that region.
+
+Headings are pieces too. A heading goes into a fragment only when a line
+under it does, so ``cloud=azure`` does not list the empty AWS headings,
+and a table header goes in before the first row of each fragment.
+
+``write`` stores the fragments of every section at generation time: their
+HTML-escaped text concatenated into one content-hashed blob, and an index
+of offsets and digests next to it. A section whose inputs did not change
+since the last write is copied from the previous blob instead of being
+split again. ``FragmentStore`` is the server side: it opens the index (again
+only when its stat signature changes), answers ``/?section=&cloud=&region=``
+by concatenating fragments, and derives each view's ETag from the digests
+of the fragments it is made of.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import html
+import json
+import os
+import pathlib
+import threading
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+INDEX_VERSION = 1
+INDEX_NAME = "index.json"
+BLOB_PREFIX = "fragments-"
+# Filtered views are only ever a handful per doc; beyond this, the oldest
+# assembled (and gzipped) view is dropped.
+VIEW_CACHE_SIZE = 64
+
+Key = Tuple[str, Optional[str], Optional[str]]
+
+
+class Piece(NamedTuple):
+    """One line (or heading) of a section and the (cloud, region) pairs it is about.
+
+    ``scopes`` is empty for section-wide text (a summary or fallback line,
+    a table header). A region of None means the whole cloud. A heading's
+    first scope names the cloud it heads.
+    """
+
+    text: str
+    scopes: Tuple[Tuple[str, Optional[str]], ...] = ()
+    heading: bool = False
+
+
+def lines(pieces: Iterable[Piece]) -> Iterator[str]:
+    """The section text as chunks: the pieces joined by newlines."""
+    separator = ""
+    for piece in pieces:
+        yield separator + piece.text
+        separator = "\n"
+
+
+def split(section: str, pieces: Iterable[Piece]) -> Dict[Key, str]:
+    """The fragments of one section, each in doc order."""
+    parts: Dict[Key, List[str]] = {}
+    # Headings seen so far and, per fragment, how many of them it has passed.
+    headings: List[Tuple[Optional[str], str]] = []
+    passed: Dict[Key, int] = {}
+    current = -1  # index of the heading of the cloud group being read
+    for piece in pieces:
+        if piece.heading:
+            cloud = piece.scopes[0][0] if piece.scopes else None
+            if cloud is not None:
+                current = len(headings)
+            headings.append((cloud, piece.text))
+            continue
+        keys: List[Key] = [(section, None, None)]
+        for cloud, region in piece.scopes:
+            keys.append((section, cloud, None))
+            if region is not None:
+                keys.append((section, cloud, region))
+        if not piece.scopes:
+            # Summary and fallback lines only make sense for the whole section.
+            keys = keys[:1]
+        for key in dict.fromkeys(keys):
+            fragment = parts.setdefault(key, [])
+            for index in range(passed.get(key, 0), len(headings)):
+                cloud, text = headings[index]
+                # A filtered fragment skips headings of other clouds and
+                # groups of its own cloud that it had no line in.
+                if key[1] is None or cloud is None or (cloud == key[1] and index == current):
+                    fragment.append(text)
+            passed[key] = len(headings)
+            fragment.append(piece.text)
+    # The whole section keeps trailing headings too (a table with no rows).
+    whole = (section, None, None)
+    parts.setdefault(whole, []).extend(text for _, text in headings[passed.get(whole, 0) :])
+    fragments: Dict[Key, str] = {}
+    for key, texts in parts.items():
+        text = "\n".join(texts)
+        # A fragment that starts at a later group keeps no blank line above it.
+        fragments[key] = text if key[1] is None else text.lstrip("\n")
+    return fragments
+
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _read_index(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            index = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return index if isinstance(index, dict) and index.get("version") == INDEX_VERSION else None
+
+
+def write(
+    directory: pathlib.Path,
+    sections: Iterable[Tuple[str, str, Any, Callable[[], Iterable[Piece]]]],
+    salt: str,
+) -> bool:
+    """Store the fragments of ``(name, title, inputs, pieces)`` sections; whether anything changed.
+
+    ``pieces`` is only called for a section whose ``inputs`` (and ``salt``)
+    differ from the previous write.
+    """
+    index_path = directory / INDEX_NAME
+    previous = _read_index(index_path)
+    keyed = [(name, title, _digest(inputs), pieces) for name, title, inputs, pieces in sections]
+    if (
+        previous is not None
+        and previous.get("salt") == salt
+        and [(entry["name"], entry["title"], entry["key"]) for entry in previous.get("sections", ())]
+        == [(name, title, key) for name, title, key, _ in keyed]
+        and (directory / previous["blob"]).is_file()
+    ):
+        # Nothing to split or copy: the common case for a regeneration.
+        return False
+    reusable: Dict[str, Dict[str, Any]] = {}
+    old_blob: Optional[IO[bytes]] = None
+    if previous is not None and previous.get("salt") == salt:
+        reusable = {entry["name"]: entry for entry in previous.get("sections", ())}
+        try:
+            old_blob = (directory / previous["blob"]).open("rb")
+        except (OSError, KeyError):
+            reusable = {}
+    blob: List[bytes] = []
+    offset = 0
+    entries: List[Dict[str, Any]] = []
+    try:
+        for name, title, key, pieces in keyed:
+            records: List[List[Any]] = []
+            entry = reusable.get(name)
+            if entry is not None and entry.get("key") == key and old_blob is not None:
+                for cloud, region, start, length, digest in entry["fragments"]:
+                    data = os.pread(old_blob.fileno(), length, start)
+                    blob.append(data)
+                    records.append([cloud, region, offset, length, digest])
+                    offset += length
+            else:
+                for (_, cloud, region), text in split(name, pieces()).items():
+                    data = html.escape(text).encode("utf-8")
+                    blob.append(data)
+                    records.append([cloud, region, offset, len(data), hashlib.sha256(data).hexdigest()[:32]])
+                    offset += len(data)
+            entries.append({"name": name, "title": title, "key": key, "fragments": records})
+    finally:
+        if old_blob is not None:
+            old_blob.close()
+
+    content = b"".join(blob)
+    blob_name = f"{BLOB_PREFIX}{hashlib.sha256(content).hexdigest()[:16]}.html"
+    index = {"version": INDEX_VERSION, "salt": salt, "blob": blob_name, "sections": entries}
+    if previous == index:
+        return False
+    directory.mkdir(parents=True, exist_ok=True)
+    blob_path = directory / blob_name
+    if not blob_path.exists():
+        tmp = directory / f".{blob_name}.tmp{os.getpid()}"
+        tmp.write_bytes(content)
+        os.replace(tmp, blob_path)
+    tmp = directory / f".{INDEX_NAME}.tmp{os.getpid()}"
+    tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, index_path)
+    # A server still reading an old blob keeps its open handle.
+    for stale in directory.glob(f"{BLOB_PREFIX}*.html"):
+        if stale.name != blob_name:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+    return True
+
+
+@dataclasses.dataclass(frozen=True)
+class Fragment:
+    __slots__ = ("offset", "length", "digest")
+    offset: int
+    length: int
+    digest: str
+
+
+class View:
+    """A filtered doc: literal heading bytes and fragments, in order."""
+
+    def __init__(self, parts: List[Union[bytes, Fragment]], blob: IO[bytes]) -> None:
+        self.parts = parts
+        self.blob = blob
+        self.length = sum(len(part) if isinstance(part, bytes) else part.length for part in parts)
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else part.digest.encode("ascii"))
+            digest.update(b"\0")
+        self.etag = f'"{digest.hexdigest()[:32]}"'
+        self.gzip_etag = f'"{digest.hexdigest()[:32]}-gz"'
+        # Set by the server the first time the view is sent gzipped.
+        self.gzip_body: Optional[bytes] = None
+
+    def iter_body(self) -> Iterator[bytes]:
+        fd = self.blob.fileno()
+        for part in self.parts:
+            yield part if isinstance(part, bytes) else os.pread(fd, part.length, part.offset)
+
+
+class _Loaded:
+    def __init__(self, index: Dict[str, Any], blob: IO[bytes]) -> None:
+        self.blob = blob
+        self.titles: Dict[str, str] = {}
+        # section -> {(cloud, region): fragment}, in doc order
+        self.sections: Dict[str, Dict[Tuple[Optional[str], Optional[str]], Fragment]] = {}
+        for entry in index["sections"]:
+            self.titles[entry["name"]] = entry["title"]
+            self.sections[entry["name"]] = {
+                (cloud, region): Fragment(offset, length, digest) for cloud, region, offset, length, digest in entry["fragments"]
+            }
+        self.views: Dict[Tuple[Any, ...], View] = {}
+
+
+class FragmentStore:
+    """The fragments under ``directory``, reloaded when the index changes."""
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._loaded: Optional[_Loaded] = None
+        # Index reads, view lookups, and the lookups that had to assemble a view.
+        self.loads = 0
+        self.lookups = 0
+        self.builds = 0
+
+    def _load(self) -> Optional[_Loaded]:
+        path = self.directory / INDEX_NAME
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        loaded = self._loaded
+        if loaded is not None and signature == self._signature:
+            return loaded
+        with self._lock:
+            if self._loaded is not None and signature == self._signature:
+                return self._loaded
+            index = _read_index(path)
+            if index is None:
+                return None
+            try:
+                blob = (self.directory / index["blob"]).open("rb")
+            except OSError:
+                # Replaced by a regeneration between the two reads.
+                return self._loaded
+            self.loads += 1
+            # The previous blob closes with its last reference.
+            self._loaded = _Loaded(index, blob)
+            self._signature = signature
+            return self._loaded
+
+    @property
+    def sections(self) -> List[str]:
+        loaded = self._load()
+        return list(loaded.sections) if loaded is not None else []
+
+    def view(
+        self,
+        sections: Optional[List[str]] = None,
+        cloud: Optional[str] = None,
+        region: Optional[str] = None,
+    ) -> Optional[View]:
+        """The doc restricted to ``sections`` (default: all), ``cloud`` and ``region``; None when nothing matches.
+
+        One section is served bare; several get their doc headings.
+        """
+        loaded = self._load()
+        if loaded is None:
+            return None
+        cache_key = (tuple(sections or ()), cloud, region)
+        with self._lock:
+            self.lookups += 1
+            view = loaded.views.get(cache_key)
+        if view is not None:
+            return view
+        names = sections or list(loaded.sections)
+        parts: List[Union[bytes, Fragment]] = []
+        for name in names:
+            fragments = loaded.sections.get(name, {})
+            if region is None:
+                matched = [fragments[(cloud, None)]] if (cloud, None) in fragments else []
+            else:
+                # A region name alone is matched in every cloud.
+                matched = [
+                    fragment
+                    for (fragment_cloud, fragment_region), fragment in fragments.items()
+                    if fragment_region == region and (cloud is None or fragment_cloud == cloud)
+                ]
+            if not matched:
+                continue
+            if len(names) > 1:
+                heading = f"### {loaded.titles[name]}\n\n"
+                parts.append(html.escape(heading if not parts else f"\n\n{heading}").encode("utf-8"))
+            for position, fragment in enumerate(matched):
+                if position:
+                    parts.append(b"\n")
+                parts.append(fragment)
+        if not parts:
+            return None
+        parts.append(b"\n")
+        view = View(parts, loaded.blob)
+        with self._lock:
+            self.builds += 1
+            if len(loaded.views) >= VIEW_CACHE_SIZE:
+                loaded.views.pop(next(iter(loaded.views)))
+            loaded.views[cache_key] = view
+        return view
@@ -0,0 +1,246 @@
+"""Incremental JSON reader that only materialises selected object members.
+
+``json.load`` builds the whole document before we can look at any of it,
+which for a state file means every resource attribute in every region. The
+reader here walks the input in fixed-size chunks, skips values it was not
+asked for by scanning for structural characters, and only hands the raw
+text of wanted members to ``json.loads``. Peak memory is therefore bounded
+by the chunk size plus the size of the selected subtrees.
+
+``select`` covers the common case of picking members out of one object;
+``Reader`` is the cursor underneath for callers that need to walk further,
+e.g. decoding the elements of a huge array one at a time.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+CHUNK_SIZE = 1 << 16
+
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING_BODY = re.compile(r'[^"\\]*')
+# Everything up to the next bracket, swallowing complete strings whole so the
+# Python loop below only runs once per container boundary.
+_SKIP_RUN = re.compile(r'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_SCALAR = re.compile(r"[^,:{}\[\]\s]*")
+_DECODER = json.JSONDecoder()
+# Characters that can follow a complete value; anything else after a number
+# or literal at the end of the decoded text may be more of it.
+_DELIMITERS = frozenset(",:}] \t\n\r")
+
+
+class JSONStreamError(ValueError):
+    """Raised when the input is truncated, malformed or lacks a selected path."""
+
+
+class Reader:
+    """Cursor over a JSON stream.
+
+    ``members`` and ``items`` walk an object or array lazily; each value
+    they stop at must be consumed with ``read_value`` or ``skip_value``
+    before the walk resumes.
+    """
+
+    def __init__(self, stream: IO[Any], chunk_size: int = CHUNK_SIZE) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._capture: Optional[List[str]] = None
+        self._mark = 0
+        self.consumed = 0
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data: Union[str, bytes] = self._stream.read(self._chunk_size)
+        if isinstance(data, bytes):
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+            raw = data
+            data = self._decoder.decode(raw, final=not raw)
+            # A chunk can end inside a multi-byte sequence and decode to "".
+            while not data and raw:
+                raw = self._stream.read(self._chunk_size)
+                data = self._decoder.decode(raw, final=not raw)
+        if not data:
+            self._eof = True
+            return False
+        if self._capture is not None:
+            self._capture.append(self._buf[self._mark : self._pos])
+            self._mark = 0
+        self.consumed += self._pos
+        self._buf = self._buf[self._pos :] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            where = self.consumed + self._pos
+            raise JSONStreamError(f"expected {char!r} at offset {where}, found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def _skip_string_body(self) -> None:
+        # Called just past the opening quote.
+        while True:
+            self._pos = _STRING_BODY.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                if self._buf[self._pos] == '"':
+                    self._pos += 1
+                    return
+                if self._pos + 1 < len(self._buf):
+                    self._pos += 2
+                    continue
+            if not self._fill():
+                raise JSONStreamError("unterminated string")
+
+    def skip_value(self) -> None:
+        char = self.peek()
+        if char == '"':
+            self._pos += 1
+            self._skip_string_body()
+            return
+        if char in ("{", "["):
+            self._pos += 1
+            depth = 1
+            while depth:
+                self._pos = _SKIP_RUN.match(self._buf, self._pos).end()
+                if self._pos == len(self._buf):
+                    if not self._fill():
+                        raise JSONStreamError("unterminated container")
+                    continue
+                token = self._buf[self._pos]
+                self._pos += 1
+                if token == '"':
+                    # A string split across chunks; finish it the slow way.
+                    self._skip_string_body()
+                elif token in ("{", "["):
+                    depth += 1
+                else:
+                    depth -= 1
+            return
+        if not char or char in ",:}]":
+            raise JSONStreamError(f"expected a value at offset {self.consumed + self._pos}")
+        while True:
+            self._pos = _SCALAR.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def read_value(self) -> Any:
+        self.peek()
+        # Most values sit wholly inside the buffer: decode them in place.
+        # A container or string cut off by the end of the buffer fails to
+        # decode; a number or literal decodes only when a delimiter shows it
+        # ended (``12.`` may be ``12.75`` in the next chunk). Anything else is
+        # re-read below.
+        try:
+            value, end = _DECODER.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if (
+                self._buf[self._pos] in '{["'
+                or (end < len(self._buf) and self._buf[end] in _DELIMITERS)
+                or (end == len(self._buf) and self._eof)
+            ):
+                self._pos = end
+                return value
+        self._capture = []
+        self._mark = self._pos
+        try:
+            self.skip_value()
+            self._capture.append(self._buf[self._mark : self._pos])
+            raw = "".join(self._capture)
+        finally:
+            self._capture = None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise JSONStreamError(str(exc)) from exc
+
+    def members(self) -> Iterator[str]:
+        """Yield object keys; the caller must consume each value before resuming."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise JSONStreamError(f"expected an object key at offset {self.consumed + self._pos}")
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise JSONStreamError(f"expected ',' or '}}' at offset {self.consumed + self._pos - 1}")
+
+    def items(self) -> Iterator[int]:
+        """Yield array indexes; the caller must consume each element before resuming."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise JSONStreamError(f"expected ',' or ']' at offset {self.consumed + self._pos - 1}")
+
+
+def select(
+    stream: IO[Any],
+    keys: Optional[Iterable[str]] = None,
+    path: Sequence[str] = (),
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Decode members of the object found at ``path`` inside ``stream``.
+
+    ``path`` names the chain of object keys to descend through (``("outputs",)``
+    for a state file, empty for ``terraform output -json``). Only members
+    listed in ``keys`` are decoded; ``None`` decodes every member of the
+    target object. Reading stops as soon as the target object is complete or
+    every requested key has been found, so anything after it in the stream,
+    such as the ``resources`` array of a state file, is never read.
+    """
+    reader = Reader(stream, chunk_size)
+    for name in path:
+        for key in reader.members():
+            if key == name:
+                break
+            reader.skip_value()
+        else:
+            raise JSONStreamError(f"missing key {name!r}")
+
+    wanted = set(keys) if keys is not None else None
+    selected: Dict[str, Any] = {}
+    for key in reader.members():
+        if wanted is None or key in wanted:
+            selected[key] = reader.read_value()
+            if wanted is not None and len(selected) == len(wanted):
+                break
+        else:
+            reader.skip_value()
+    return selected
@@ -0,0 +1,415 @@
+"""Graph index over the VPN mesh: hubs, on-prem sites and the links between them.
+
+``MeshGraph`` loads ``cloud_links`` (hub to hub) and ``vnf_links`` (site to
+hub) from ``vpn_endpoint_manifest.clouds.mesh`` or the mesh tfvars into a
+compressed adjacency list (CSR offsets plus neighbour/edge arrays), then
+answers the questions the demo keeps asking of the topology:
+
+- which hubs can reach each other (union-find components, ``reachable``
+  for one pair and ``hub_groups`` for the members of each group);
+- what a single tunnel or single hub failure cuts off (bridges and
+  articulation points from one iterative DFS, with the size of every piece
+  that would be stranded);
+- which cross-cloud hub pairs have no direct link;
+- where BGP ASNs collide between peers, hubs or sites.
+
+Hubs of one cloud also reach each other natively (TGW peering, a shared
+vWAN, global VPC routing). That is modelled as a virtual backbone node per
+cloud, which carries no weight in failure counts and is never reported as a
+failure point itself.
+
+Every query is O(nodes + links), or O(output) for the missing pairs, so a
+mesh of thousands of sites analyses in milliseconds.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+SITE_PREFIX = "site:"
+BACKBONE_PREFIX = "backbone:"
+# Tunnels per site link when the mesh does not list them: an AWS VPN
+# connection always brings two; the Azure and GCP site links build one.
+VNF_TUNNELS = {"aws": 2}
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+class MeshGraph:
+    """Undirected multigraph of hubs and sites; edges are mesh links."""
+
+    def __init__(self) -> None:
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cloud: List[Optional[str]] = []
+        self.region: List[Optional[str]] = []
+        # node -> ASNs seen for it across links (normally exactly one).
+        self.asns: List[Set[int]] = []
+        self.edge_src = array("i")
+        self.edge_dst = array("i")
+        self.edge_tunnels = array("i")
+        self.edge_ids: List[str] = []
+        self._offsets: Optional[array] = None
+        self._neighbours = array("i")
+        self._edges = array("i")
+        self._components: Optional[List[int]] = None
+
+    @classmethod
+    def from_mesh(cls, mesh: Dict[str, Any], native_peering: bool = True) -> "MeshGraph":
+        graph = cls()
+        for link in mesh.get("cloud_links") or ():
+            if not isinstance(link, dict):
+                continue
+            source, target = _dict(link.get("source")), _dict(link.get("target"))
+            if not source.get("hub_id") or not target.get("hub_id"):
+                continue
+            bgp = _dict(link.get("bgp"))
+            a = graph._node(str(source["hub_id"]), source.get("cloud"), source.get("region"), bgp.get("source_asn"))
+            b = graph._node(str(target["hub_id"]), target.get("cloud"), target.get("region"), bgp.get("target_asn"))
+            link_id = link.get("link_id") or f"{source['hub_id']}__{target['hub_id']}"
+            graph._edge(a, b, len(link.get("tunnels") or ()), str(link_id))
+        for link in mesh.get("vnf_links") or ():
+            if not isinstance(link, dict) or not link.get("site") or not link.get("hub_id"):
+                continue
+            site = graph._node(SITE_PREFIX + str(link["site"]), None, None, link.get("bgp_asn"))
+            hub = graph._node(str(link["hub_id"]), link.get("cloud"), link.get("region"), None)
+            tunnels = len(link.get("tunnels") or ()) or VNF_TUNNELS.get(str(link.get("cloud")), 1)
+            graph._edge(site, hub, tunnels, f"{link['site']}__{link['hub_id']}")
+        if native_peering:
+            for node in graph.hubs:
+                cloud = graph.cloud[node]
+                if cloud:
+                    backbone = graph._node(BACKBONE_PREFIX + cloud, cloud, None, None)
+                    # Zero tunnels marks a native peering edge rather than a VPN link.
+                    graph._edge(node, backbone, 0, f"{cloud} backbone")
+        graph._build()
+        return graph
+
+    def _node(self, name: str, cloud: Any, region: Any, asn: Any) -> int:
+        node = self.index.get(name)
+        if node is None:
+            node = self.index[name] = len(self.nodes)
+            self.nodes.append(name)
+            self.cloud.append(str(cloud) if cloud else None)
+            self.region.append(str(region) if region else None)
+            self.asns.append(set())
+        if isinstance(asn, int) or (isinstance(asn, str) and asn.isdigit()):
+            self.asns[node].add(int(asn))
+        return node
+
+    def _edge(self, a: int, b: int, tunnels: int, link_id: str) -> None:
+        self.edge_src.append(a)
+        self.edge_dst.append(b)
+        self.edge_tunnels.append(tunnels)
+        self.edge_ids.append(link_id)
+
+    def _build(self) -> None:
+        # Counting sort of edge endpoints into CSR form.
+        count = len(self.nodes)
+        degree = [0] * (count + 1)
+        for a, b in zip(self.edge_src, self.edge_dst):
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        for node in range(count):
+            degree[node + 1] += degree[node]
+        self._offsets = array("i", degree)
+        fill = degree[:count]
+        self._neighbours = array("i", bytes(4 * degree[count]))
+        self._edges = array("i", bytes(4 * degree[count]))
+        for edge, (a, b) in enumerate(zip(self.edge_src, self.edge_dst)):
+            self._neighbours[fill[a]], self._edges[fill[a]] = b, edge
+            fill[a] += 1
+            self._neighbours[fill[b]], self._edges[fill[b]] = a, edge
+            fill[b] += 1
+
+    def is_site(self, node: int) -> bool:
+        return self.nodes[node].startswith(SITE_PREFIX)
+
+    def is_virtual(self, node: int) -> bool:
+        return self.nodes[node].startswith(BACKBONE_PREFIX)
+
+    def label(self, node: int) -> str:
+        name = self.nodes[node]
+        return f"site {name[len(SITE_PREFIX):]}" if name.startswith(SITE_PREFIX) else name
+
+    def neighbours(self, node: int) -> Iterator[Tuple[int, int]]:
+        """(neighbour, edge) pairs for ``node``."""
+        assert self._offsets is not None
+        for slot in range(self._offsets[node], self._offsets[node + 1]):
+            yield self._neighbours[slot], self._edges[slot]
+
+    @property
+    def hubs(self) -> List[int]:
+        return [node for node in range(len(self.nodes)) if not self.is_site(node) and not self.is_virtual(node)]
+
+    @property
+    def sites(self) -> List[int]:
+        return [node for node in range(len(self.nodes)) if self.is_site(node)]
+
+    # -- reachability ---------------------------------------------------
+
+    def components(self) -> List[int]:
+        """Component id (a representative node) for every node, via union-find.
+
+        Computed once; the graph does not change after ``from_mesh``.
+        """
+        if self._components is not None:
+            return self._components
+        parent = list(range(len(self.nodes)))
+
+        def find(node: int) -> int:
+            root = node
+            while parent[root] != root:
+                root = parent[root]
+            while parent[node] != root:
+                parent[node], node = root, parent[node]
+            return root
+
+        for a, b in zip(self.edge_src, self.edge_dst):
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+        self._components = [find(node) for node in range(len(self.nodes))]
+        return self._components
+
+    def reachable(self, a: str, b: str) -> bool:
+        """Whether hubs or sites ``a`` and ``b`` (node names) are connected."""
+        if a not in self.index or b not in self.index:
+            return False
+        components = self.components()
+        return components[self.index[a]] == components[self.index[b]]
+
+    def hub_groups(self) -> List[List[int]]:
+        """Hubs grouped by connected component, largest group first."""
+        components = self.components()
+        groups: Dict[int, List[int]] = {}
+        for node in self.hubs:
+            groups.setdefault(components[node], []).append(node)
+        return sorted(groups.values(), key=lambda group: (-len(group), group[0]))
+
+    # -- failure impact -------------------------------------------------
+
+    def failure_impact(self) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """Bridges and articulation points, each with the nodes a failure strands.
+
+        Returns ``(bridges, cut_nodes)``: ``(edge, stranded)`` for every link
+        whose loss splits its component and ``(node, stranded)`` for every
+        hub or site whose loss does. ``stranded`` counts the nodes left
+        outside the largest surviving piece. Parallel links between the same
+        pair are not bridges, since the DFS skips only the edge it came in on.
+        Backbone nodes and native peering edges are never reported.
+        """
+        count = len(self.nodes)
+        assert self._offsets is not None
+        offsets, neighbours, edges = self._offsets, self._neighbours, self._edges
+        order = [0] * count
+        low = [0] * count
+        size = [0 if self.is_virtual(node) else 1 for node in range(count)]
+        visited = [False] * count
+        components = self.components()
+        component_size: Dict[int, int] = {}
+        for node, root in enumerate(components):
+            component_size[root] = component_size.get(root, 0) + size[node]
+        # node -> sizes of the child subtrees a removal would split off.
+        pieces: Dict[int, List[int]] = {}
+        bridges: List[Tuple[int, int]] = []
+        counter = 0
+        for start in range(count):
+            if visited[start]:
+                continue
+            visited[start] = True
+            order[start] = low[start] = counter
+            counter += 1
+            # Frames: (node, edge we arrived by, next adjacency slot).
+            stack = [[start, -1, offsets[start]]]
+            while stack:
+                frame = stack[-1]
+                node, via, slot = frame
+                if slot < offsets[node + 1]:
+                    frame[2] = slot + 1
+                    nxt, edge = neighbours[slot], edges[slot]
+                    if edge == via:
+                        continue
+                    if visited[nxt]:
+                        if order[nxt] < low[node]:
+                            low[node] = order[nxt]
+                        continue
+                    visited[nxt] = True
+                    order[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append([nxt, edge, offsets[nxt]])
+                    continue
+                stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1][0]
+                size[parent] += size[node]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+                if low[node] > order[parent] and self.edge_tunnels[via]:
+                    total = component_size[components[node]]
+                    bridges.append((via, min(size[node], total - size[node])))
+                if low[node] >= order[parent] and size[node]:
+                    pieces.setdefault(parent, []).append(size[node])
+
+        cut_nodes: List[Tuple[int, int]] = []
+        for node, split in pieces.items():
+            if self.is_virtual(node):
+                continue
+            total = component_size[components[node]]
+            rest = total - 1 - sum(split)
+            # A DFS root is only a cut node with two or more child pieces.
+            if rest == 0 and len(split) < 2:
+                continue
+            parts = split + ([rest] if rest else [])
+            cut_nodes.append((node, total - 1 - max(parts)))
+        return bridges, cut_nodes
+
+    def single_tunnel_links(self) -> List[int]:
+        return [edge for edge, tunnels in enumerate(self.edge_tunnels) if tunnels == 1]
+
+    # -- coverage and BGP -----------------------------------------------
+
+    def missing_pair_count(self) -> int:
+        """Cross-cloud hub pairs with no direct link (intra-cloud hubs peer natively)."""
+        per_cloud: Dict[Optional[str], int] = {}
+        for node in self.hubs:
+            per_cloud[self.cloud[node]] = per_cloud.get(self.cloud[node], 0) + 1
+        total = sum(per_cloud.values())
+        possible = (total * total - sum(n * n for n in per_cloud.values())) // 2
+        return possible - len(self._linked_pairs())
+
+    def missing_pairs(self, limit: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Yield missing cross-cloud hub pairs in hub order, at most ``limit``."""
+        linked = self._linked_pairs()
+        hubs = sorted(self.hubs, key=lambda node: (self.cloud[node] or "", self.nodes[node]))
+        emitted = 0
+        for position, a in enumerate(hubs):
+            for b in hubs[position + 1:]:
+                if self.cloud[a] == self.cloud[b] or (min(a, b), max(a, b)) in linked:
+                    continue
+                yield a, b
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+
+    def _linked_pairs(self) -> Set[Tuple[int, int]]:
+        return {
+            (min(a, b), max(a, b))
+            for a, b, tunnels in zip(self.edge_src, self.edge_dst, self.edge_tunnels)
+            if tunnels and not self.is_site(a) and not self.is_site(b) and self.cloud[a] != self.cloud[b]
+        }
+
+    def asn_conflicts(self) -> List[Tuple[str, str]]:
+        """``(kind, detail)`` for ASN problems that break or bend BGP sessions."""
+        conflicts: List[Tuple[str, str]] = []
+        for node, asns in enumerate(self.asns):
+            if len(asns) > 1:
+                listed = ", ".join(f"AS{asn}" for asn in sorted(asns))
+                conflicts.append(("inconsistent", f"`{self.label(node)}` is announced as {listed}"))
+        seen: Set[Tuple[int, int]] = set()
+        for edge, (a, b) in enumerate(zip(self.edge_src, self.edge_dst)):
+            shared = self.asns[a] & self.asns[b]
+            if shared and (min(a, b), max(a, b)) not in seen:
+                seen.add((min(a, b), max(a, b)))
+                conflicts.append(
+                    ("peer", f"`{self.label(a)}` and `{self.label(b)}` peer over `{self.edge_ids[edge]}` with the same AS{min(shared)}")
+                )
+        owners: Dict[Tuple[bool, int], List[int]] = {}
+        for node, asns in enumerate(self.asns):
+            for asn in asns:
+                owners.setdefault((self.is_site(node), asn), []).append(node)
+        for (is_site, asn), nodes in sorted(owners.items()):
+            if len(nodes) < 2:
+                continue
+            kind = "site" if is_site else "hub"
+            names = ", ".join(f"`{self.label(node)}`" for node in nodes[:5])
+            more = f" and {len(nodes) - 5} more" if len(nodes) > 5 else ""
+            # AS-path loop prevention drops routes transiting another node with the same ASN.
+            conflicts.append((kind, f"AS{asn} is shared by {len(nodes)} {kind}s: {names}{more}"))
+        return conflicts
+
+
+def analyse(graph: MeshGraph, limit: int = 20) -> Dict[str, Any]:
+    """Summary of every query, with each list capped at ``limit`` entries."""
+    components = graph.components()
+    hubs = graph.hubs
+    hub_components = {components[node] for node in hubs}
+    groups = graph.hub_groups()
+    bridges, cut_nodes = graph.failure_impact()
+    single = graph.single_tunnel_links()
+    single_set = set(single)
+    bridge_impact = dict(bridges)
+    return {
+        "hubs": len(hubs),
+        "sites": len(graph.sites),
+        "links": sum(1 for tunnels in graph.edge_tunnels if tunnels),
+        "hub_components": len(hub_components),
+        # Members of each group, only worth listing when the hubs are split.
+        "hub_groups": [[graph.label(node) for node in group] for group in groups[:limit]] if len(groups) > 1 else [],
+        "isolated_sites": sum(1 for node in graph.sites if components[node] not in hub_components),
+        "single_tunnel": len(single),
+        # A lone tunnel only matters for reachability when its link is a bridge.
+        "single_tunnel_bridges": sorted(
+            ((bridge_impact[edge], graph.edge_ids[edge]) for edge in single_set if edge in bridge_impact),
+            key=lambda item: (-item[0], item[1]),
+        )[:limit],
+        "bridges": len(bridges),
+        "cut_nodes": sorted(
+            ((stranded, graph.label(node)) for node, stranded in cut_nodes), key=lambda item: (-item[0], item[1])
+        )[:limit],
+        "cut_node_count": len(cut_nodes),
+        "missing_pairs": graph.missing_pair_count(),
+        "missing_examples": [(graph.label(a), graph.label(b)) for a, b in graph.missing_pairs(limit)],
+        "asn_conflicts": graph.asn_conflicts(),
+    }
+
+
+def _count(number: int, noun: str) -> str:
+    return f"{number} {noun}{'' if number == 1 else 's'}"
+
+
+def render_report(analysis: Dict[str, Any], limit: int = 20) -> Iterable[str]:
+    """Markdown lines for the doc's mesh section."""
+    if not analysis["links"]:
+        yield "VPN mesh unavailable (no `cloud_links` or `vnf_links` in outputs or tfvars)."
+        return
+    yield (
+        f"- **Topology** – {_count(analysis['hubs'], 'hub')}, {_count(analysis['sites'], 'on-prem site')}, "
+        f"{_count(analysis['links'], 'link')}; hubs form {_count(analysis['hub_components'], 'connected group')}"
+        + (f", {_count(analysis['isolated_sites'], 'site')} cannot reach any hub" if analysis["isolated_sites"] else "")
+        + "."
+    )
+    for number, group in enumerate(analysis["hub_groups"], 1):
+        names = ", ".join(f"`{label}`" for label in group[:limit])
+        more = f" and {len(group) - limit} more" if len(group) > limit else ""
+        yield f"  - group {number}: {names}{more}"
+    if analysis["hub_components"] > len(analysis["hub_groups"]) > 0:
+        yield f"  - … {analysis['hub_components'] - len(analysis['hub_groups'])} more groups"
+    yield (
+        f"- **Single-tunnel failure** – {_count(analysis['single_tunnel'], 'link')} with one tunnel; "
+        f"{len(analysis['single_tunnel_bridges'])} of them {'is' if len(analysis['single_tunnel_bridges']) == 1 else 'are'} "
+        "the only path for part of the mesh."
+    )
+    for stranded, link_id in analysis["single_tunnel_bridges"]:
+        yield f"  - `{link_id}` strands {_count(stranded, 'node')} if its tunnel drops"
+    yield (
+        f"- **Single-hub failure** – losing any one of {analysis['cut_node_count']} hubs/sites splits the mesh; "
+        f"{_count(analysis['bridges'], 'link')} with no alternative path."
+    )
+    for stranded, label in analysis["cut_nodes"]:
+        yield f"  - `{label}` strands {_count(stranded, 'node')}"
+    yield f"- **Full-mesh coverage** – {_count(analysis['missing_pairs'], 'cross-cloud hub pair')} with no direct link."
+    for a, b in analysis["missing_examples"]:
+        yield f"  - `{a}` ↔ `{b}`"
+    if analysis["missing_pairs"] > len(analysis["missing_examples"]):
+        yield f"  - … {analysis['missing_pairs'] - len(analysis['missing_examples'])} more"
+    conflicts = analysis["asn_conflicts"]
+    yield f"- **BGP ASN conflicts** – {len(conflicts) or 'none'}{' found' if conflicts else ''}."
+    for kind, detail in conflicts[:limit]:
+        yield f"  - {kind}: {detail}"
+    if len(conflicts) > limit:
+        yield f"  - … {len(conflicts) - limit} more"
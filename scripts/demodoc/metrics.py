@@ -0,0 +1,265 @@
+"""Phase timings for a doc regeneration and a small Prometheus registry.
+
+``PhaseTimings`` records wall time for the named phases of one run (loading
+outputs, each terraform candidate tried, render, write) and serialises them
+as JSON for ``--timings``. ``Registry`` holds counters, gauges and
+histograms for the embedded server and renders them in the Prometheus text
+exposition format on ``/metrics``; it has no dependencies so scraping works
+in a bare demo environment.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import datetime as _dt
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Request latencies for a page served from memory sit well under 10ms.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class PhaseTimings:
+    """Ordered wall-clock timings for the phases of one run.
+
+    Phases are listed in the order they started; nested phases use dotted
+    names (``load.terraform.stream``) so the breakdown stays a flat list.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = _dt.datetime.now(_dt.timezone.utc)
+        self.phases: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **detail: Any) -> Iterator[Dict[str, Any]]:
+        """Time the block; the yielded dict takes extra fields such as an outcome."""
+        entry: Dict[str, Any] = {"phase": name, **detail}
+        self.phases.append(entry)
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(time.perf_counter() - started, 6)
+
+    def seconds(self, name: str) -> float:
+        return sum(entry.get("seconds", 0.0) for entry in self.phases if entry["phase"] == name)
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_seconds": round(self.total, 6),
+            "phases": self.phases,
+        }
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1 << 53:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Family:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], lock: threading.Lock) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames and self.kind != "histogram":
+            # Unlabelled series are exported as 0 before their first update.
+            self._values[()] = 0.0
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def total(self, **labels: Any) -> float:
+        """Sum of the samples whose labels match ``labels`` (a subset of labelnames)."""
+        wanted = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            return sum(
+                value for key, value in self._values.items() if all(key[index] == match for index, match in wanted)
+            )
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: Any) -> None:
+        """Mirror a total that is maintained elsewhere (e.g. a cache's hit count)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:  # noqa: A003
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        lock: threading.Lock,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Thread-safe set of metric families rendered in Prometheus text format.
+
+    Values owned by other objects (cache hit counts, for instance) are
+    copied in by collectors registered with ``on_collect``, which run at the
+    start of every scrape.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._families: Dict[str, _Family] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _family(self, cls: type, name: str, documentation: str, labelnames: Sequence[str], **kwargs: Any) -> Any:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = cls(name, documentation, labelnames, self._lock, **kwargs)
+        if not isinstance(family, cls):
+            raise ValueError(f"{name} is already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._family(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._family(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._family(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        with self._lock:
+            for name, family in sorted(self._families.items()):
+                lines.append(f"# HELP {name} {_escape(family.documentation)}")
+                lines.append(f"# TYPE {name} {family.kind}")
+                lines.extend(family.samples())
+        return "\n".join(lines) + "\n"
+
+
+def observe_cache(registry: Registry, cache: str, hits: int, misses: int) -> None:
+    """Export a cache's cumulative hit/miss counts and its hit ratio."""
+    registry.counter("skyforge_doc_cache_hits_total", "Cache lookups answered from the cache", ("cache",)).set_total(hits, cache=cache)
+    registry.counter("skyforge_doc_cache_misses_total", "Cache lookups that had to be computed", ("cache",)).set_total(misses, cache=cache)
+    lookups = hits + misses
+    ratio = registry.gauge("skyforge_doc_cache_hit_ratio", "Share of cache lookups answered from the cache", ("cache",))
+    ratio.set(hits / lookups if lookups else 0.0, cache=cache)
+
+
+def observe_regeneration(registry: Registry, timings: PhaseTimings, written: Optional[bool]) -> None:
+    """Record the outcome and phase durations of the latest regeneration."""
+    result = "unchanged" if written is False else "written"
+    registry.counter("skyforge_doc_regenerations_total", "Doc regenerations by outcome", ("result",)).inc(result=result)
+    registry.gauge("skyforge_doc_last_regeneration_seconds", "Wall time of the latest regeneration").set(timings.total)
+    registry.gauge(
+        "skyforge_doc_last_regeneration_timestamp_seconds", "Unix time the latest regeneration started"
+    ).set(timings.started_at.timestamp())
+    phases = registry.gauge(
+        "skyforge_doc_last_regeneration_phase_seconds", "Per-phase wall time of the latest regeneration", ("phase",)
+    )
+    phases.clear()
+    totals: Dict[str, float] = {}
+    for entry in timings.phases:
+        totals[entry["phase"]] = totals.get(entry["phase"], 0.0) + entry.get("seconds", 0.0)
+    for name, seconds in totals.items():
+        phases.set(seconds, phase=name)
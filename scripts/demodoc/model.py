@@ -0,0 +1,301 @@
+"""Typed view of the Terraform outputs the doc renders.
+
+``load`` walks the raw outputs once, checks the shape of every value the
+renderers read and builds small ``__slots__`` dataclasses from them, so the
+renderers use plain attributes instead of repeating ``isinstance`` checks
+and ``.get(...) or {}`` chains:
+
+- a value Terraform leaves null (an appliance not deployed yet, an address
+  not allocated) is ``None``, and a disabled region is kept with a ``None``
+  entry, as in the outputs;
+- a value of the wrong type raises ``OutputsError`` naming its path, e.g.
+  ``multi_cloud_load_balancing.aws.gateway_load_balancers["us-east-1"].firewalls.private_ips``,
+  rather than rendering as "pending";
+- region keys are interned, so the many per-region maps of a large
+  multi-region deployment share one string per region.
+
+The reachability tests and the VPN mesh are kept as loaded; their own
+modules index them.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import sys
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_JSON_TYPES = {
+    dict: "object",
+    list: "array",
+    str: "string",
+    int: "number",
+    float: "number",
+    bool: "boolean",
+    type(None): "null",
+}
+
+
+class OutputsError(ValueError):
+    """Raised when an output value does not have the shape Terraform gives it."""
+
+
+def _fail(path: str, expected: str, value: Any) -> OutputsError:
+    got = _JSON_TYPES.get(type(value), type(value).__name__)
+    return OutputsError(f"malformed outputs: {path}: expected {expected}, got {got}")
+
+
+@dataclasses.dataclass(frozen=True)
+class Credentials:
+    __slots__ = ("username", "password")
+    username: Optional[str]
+    password: Optional[str]
+
+
+@dataclasses.dataclass(frozen=True)
+class Alb:
+    __slots__ = ("dns_name", "zone_id")
+    dns_name: Optional[str]
+    zone_id: Optional[str]
+
+
+@dataclasses.dataclass(frozen=True)
+class Accelerator:
+    __slots__ = ("dns_name", "custom_domain", "listener_ports")
+    dns_name: Optional[str]
+    custom_domain: Optional[str]
+    listener_ports: Tuple[int, ...]
+
+    @property
+    def address(self) -> Optional[str]:
+        """The name clients use: the custom domain when there is one."""
+        return self.custom_domain or self.dns_name
+
+
+@dataclasses.dataclass(frozen=True)
+class FortinetConnector:
+    __slots__ = ("instance_id", "management_ip", "private_ip", "credentials")
+    instance_id: Optional[str]
+    management_ip: Optional[str]
+    private_ip: Optional[str]
+    credentials: Optional[Credentials]
+
+
+@dataclasses.dataclass(frozen=True)
+class TgwConnect:
+    __slots__ = ("attachment_id", "peer_address", "inspection_route_table_id", "appliance_route_table_id", "connector")
+    attachment_id: Optional[str]
+    peer_address: Optional[str]
+    inspection_route_table_id: Optional[str]
+    appliance_route_table_id: Optional[str]
+    connector: Optional[FortinetConnector]
+
+
+@dataclasses.dataclass(frozen=True)
+class Gwlb:
+    __slots__ = ("private_ips", "credentials")
+    private_ips: Tuple[str, ...]
+    credentials: Optional[Credentials]
+
+
+@dataclasses.dataclass(frozen=True)
+class Asa:
+    __slots__ = ("vm_id", "private_ip", "public_ip", "credentials")
+    vm_id: Optional[str]
+    private_ip: Optional[str]
+    public_ip: Optional[str]
+    credentials: Credentials
+
+
+@dataclasses.dataclass(frozen=True)
+class CheckPoint:
+    __slots__ = ("instance_id", "private_ip", "credentials")
+    instance_id: Optional[str]
+    private_ip: Optional[str]
+    credentials: Credentials
+
+
+@dataclasses.dataclass(frozen=True)
+class Outputs:
+    __slots__ = ("accelerator", "albs", "tgw_connect", "gwlb", "asa", "checkpoint", "reachability", "mesh")
+    accelerator: Optional[Accelerator]
+    albs: Dict[str, Alb]
+    tgw_connect: Dict[str, Optional[TgwConnect]]
+    gwlb: Dict[str, Optional[Gwlb]]
+    asa: Dict[str, Optional[Asa]]
+    checkpoint: Dict[str, Optional[CheckPoint]]
+    reachability: Dict[str, Any]
+    mesh: Optional[Dict[str, Any]]
+
+
+EMPTY = Outputs(None, {}, {}, {}, {}, {}, {}, None)
+
+
+def _object(value: Any, path: str) -> Dict[str, Any]:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise _fail(path, "an object", value)
+    return value
+
+
+def _string(value: Any, path: str) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value or None
+    raise _fail(path, "a string", value)
+
+
+def _strings(value: Any, path: str) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if not isinstance(value, list):
+        raise _fail(path, "a list of strings", value)
+    for position, item in enumerate(value):
+        if not isinstance(item, str):
+            raise _fail(f"{path}[{position}]", "a string", item)
+    return tuple(value)
+
+
+def _ports(value: Any, path: str) -> Tuple[int, ...]:
+    if value is None:
+        return ()
+    if not isinstance(value, list):
+        raise _fail(path, "a list of ports", value)
+    for position, item in enumerate(value):
+        if not isinstance(item, int) or isinstance(item, bool):
+            raise _fail(f"{path}[{position}]", "a port number", item)
+    return tuple(value)
+
+
+def _credentials(value: Any, path: str) -> Optional[Credentials]:
+    if value is None:
+        return None
+    data = _object(value, path)
+    return Credentials(_string(data.get("username"), f"{path}.username"), _string(data.get("password"), f"{path}.password"))
+
+
+def _by_region(value: Any, path: str, entry: Callable[[Dict[str, Any], str], T]) -> Dict[str, Optional[T]]:
+    # Empty or null entries are regions without the resource.
+    regions: Dict[str, Optional[T]] = {}
+    for region, data in _object(value, path).items():
+        where = f'{path}["{region}"]'
+        regions[sys.intern(region)] = entry(_object(data, where), where) if data else None
+    return regions
+
+
+def _alb(data: Dict[str, Any], path: str) -> Alb:
+    return Alb(_string(data.get("dns_name"), f"{path}.dns_name"), _string(data.get("zone_id"), f"{path}.zone_id"))
+
+
+def _accelerator(data: Dict[str, Any], path: str) -> Accelerator:
+    return Accelerator(
+        _string(data.get("dns_name"), f"{path}.dns_name"),
+        _string(data.get("custom_domain"), f"{path}.custom_domain"),
+        _ports(data.get("listener_ports"), f"{path}.listener_ports"),
+    )
+
+
+def _connector(data: Dict[str, Any], path: str) -> FortinetConnector:
+    return FortinetConnector(
+        _string(data.get("instance_id"), f"{path}.instance_id"),
+        _string(data.get("management_ip"), f"{path}.management_ip"),
+        _string(data.get("private_ip"), f"{path}.private_ip"),
+        _credentials(data.get("admin_credentials"), f"{path}.admin_credentials"),
+    )
+
+
+def _tgw_connect(data: Dict[str, Any], path: str) -> TgwConnect:
+    connector = data.get("connector")
+    return TgwConnect(
+        _string(data.get("attachment_id"), f"{path}.attachment_id"),
+        _string(data.get("peer_address"), f"{path}.peer_address"),
+        _string(data.get("inspection_route_table_id"), f"{path}.inspection_route_table_id"),
+        _string(data.get("appliance_route_table_id"), f"{path}.appliance_route_table_id"),
+        _connector(_object(connector, f"{path}.connector"), f"{path}.connector") if connector else None,
+    )
+
+
+def _gwlb(data: Dict[str, Any], path: str) -> Gwlb:
+    firewalls = _object(data.get("firewalls"), f"{path}.firewalls")
+    return Gwlb(
+        _strings(firewalls.get("private_ips"), f"{path}.firewalls.private_ips"),
+        _credentials(firewalls.get("admin_credentials"), f"{path}.firewalls.admin_credentials"),
+    )
+
+
+def _asa(data: Dict[str, Any], path: str) -> Asa:
+    return Asa(
+        _string(data.get("vm_id"), f"{path}.vm_id"),
+        _string(data.get("private_ip"), f"{path}.private_ip"),
+        _string(data.get("public_ip"), f"{path}.public_ip"),
+        Credentials(
+            _string(data.get("admin_username"), f"{path}.admin_username"),
+            _string(data.get("admin_password"), f"{path}.admin_password"),
+        ),
+    )
+
+
+def _checkpoint(data: Dict[str, Any], path: str) -> CheckPoint:
+    return CheckPoint(
+        _string(data.get("instance_id"), f"{path}.instance_id"),
+        _string(data.get("private_ip"), f"{path}.private_ip"),
+        Credentials(
+            _string(data.get("admin_username"), f"{path}.admin_username"),
+            _string(data.get("admin_password"), f"{path}.admin_password"),
+        ),
+    )
+
+
+def _value(outputs: Dict[str, Any], key: str) -> Any:
+    # `terraform output -json` wraps each value as {"value": ..., "type": ...}.
+    block = outputs.get(key)
+    if isinstance(block, dict) and "value" in block:
+        return block["value"]
+    return block
+
+
+def _build(outputs: Dict[str, Any]) -> Outputs:
+    lb_path = "multi_cloud_load_balancing"
+    multi_lb = _object(_value(outputs, lb_path), lb_path)
+    aws = _object(multi_lb.get("aws"), f"{lb_path}.aws")
+    azure = _object(multi_lb.get("azure"), f"{lb_path}.azure")
+    gcp = _object(multi_lb.get("gcp"), f"{lb_path}.gcp")
+    accelerator = aws.get("global_application_accelerator")
+    accelerator_path = f"{lb_path}.aws.global_application_accelerator"
+    manifest = _object(_value(outputs, "vpn_endpoint_manifest"), "vpn_endpoint_manifest")
+    clouds = _object(manifest.get("clouds"), "vpn_endpoint_manifest.clouds")
+    mesh = clouds.get("mesh")
+    return Outputs(
+        _accelerator(_object(accelerator, accelerator_path), accelerator_path) if accelerator else None,
+        {
+            region: alb
+            for region, alb in _by_region(aws.get("application_albs"), f"{lb_path}.aws.application_albs", _alb).items()
+            if alb is not None
+        },
+        _by_region(aws.get("transit_gateway_connect"), f"{lb_path}.aws.transit_gateway_connect", _tgw_connect),
+        _by_region(aws.get("gateway_load_balancers"), f"{lb_path}.aws.gateway_load_balancers", _gwlb),
+        _by_region(azure.get("asa"), f"{lb_path}.azure.asa", _asa),
+        _by_region(gcp.get("checkpoint_firewalls"), f"{lb_path}.gcp.checkpoint_firewalls", _checkpoint),
+        _object(_value(outputs, "reachability"), "reachability"),
+        _object(mesh, "vpn_endpoint_manifest.clouds.mesh") if mesh is not None else None,
+    )
+
+
+# The last outputs object loaded and its model; render, probes and the
+# catalog all load the same outputs in one regeneration.
+_loaded: Optional[Tuple[Any, Outputs]] = None
+
+
+def load(outputs: Optional[Dict[str, Any]]) -> Outputs:
+    """The validated model of ``outputs`` (raw or ``terraform output -json``), built once per object."""
+    global _loaded
+    if not outputs:
+        return EMPTY
+    cached = _loaded
+    if cached is not None and cached[0] is outputs:
+        return cached[1]
+    model = _build(_object(outputs, "outputs"))
+    # The outputs stay referenced so their id cannot be reused.
+    _loaded = (outputs, model)
+    return model
@@ -0,0 +1,276 @@
+"""Pre-apply summary of a saved Terraform plan.
+
+``terraform show -json plan.out`` for the full configuration runs to
+hundreds of MB, most of it ``planned_values``, ``prior_state`` and the
+before/after bodies of every change. ``summarize`` makes one pass over the
+stream with ``jsonstream.Reader``:
+
+- ``resource_changes`` is decoded one element at a time and folded into
+  per-module counters, keeping a bounded sample of the resources the doc
+  names (load balancers, firewalls, mesh links);
+- ``configuration`` is walked only far enough to learn each module call's
+  source, so counts roll up to ``modules/aws/app_stack`` rather than to
+  every instance address;
+- everything else is skipped without being decoded.
+
+Memory is bounded by the largest single resource change plus the summary.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import posixpath
+import re
+from typing import IO, Any, Dict, Iterator, Optional, Set, Tuple
+
+from . import jsonstream
+
+# Bump when the summary shape changes so cached summaries are rebuilt.
+SUMMARY_VERSION = 1
+ROOT_MODULE = "."
+ACTIONS = ("create", "update", "replace", "delete")
+# (key, heading, resource types) for the resources the doc lists by address.
+# Every VM this configuration builds is a firewall appliance (Palo Alto,
+# Fortinet, Cisco ASA, Check Point), so instances count as firewalls.
+CATEGORIES = (
+    (
+        "load_balancers",
+        "Load balancers",
+        frozenset(
+            {
+                "aws_lb",
+                "aws_globalaccelerator_accelerator",
+                "azurerm_lb",
+                "azurerm_application_gateway",
+                "google_compute_global_forwarding_rule",
+            }
+        ),
+    ),
+    (
+        "firewalls",
+        "Firewalls",
+        frozenset(
+            {
+                "aws_networkfirewall_firewall",
+                "azurerm_firewall",
+                "aws_instance",
+                "azurerm_linux_virtual_machine",
+                "google_compute_instance",
+            }
+        ),
+    ),
+    (
+        "mesh_links",
+        "Mesh links",
+        frozenset(
+            {
+                "aws_vpn_connection",
+                "aws_ec2_transit_gateway_peering_attachment",
+                "aws_ec2_transit_gateway_connect_peer",
+                "azurerm_vpn_gateway_connection",
+                "google_compute_vpn_tunnel",
+            }
+        ),
+    ),
+)
+ITEM_LIMIT = 50
+_CATEGORY_OF = {kind: key for key, _, kinds in CATEGORIES for kind in kinds}
+# `[0]` or `["us-east-1"]` after a module name.
+_INSTANCE_KEY = re.compile(r'\[(?:\d+|"(?:[^"\\]|\\.)*")\]')
+
+
+class PlanError(ValueError):
+    """Raised when a stream is not ``terraform show -json`` plan output."""
+
+
+def is_json(path: pathlib.Path) -> bool:
+    """True for plan JSON; a saved binary plan is a zip archive."""
+    with path.open("rb") as handle:
+        return handle.read(64).lstrip()[:1] == b"{"
+
+
+def cache_key(path: pathlib.Path) -> str:
+    """Cache key for the summary of ``path``, from its location and stat signature."""
+    st = os.stat(path)
+    signature = f"{SUMMARY_VERSION}:{path.resolve()}:{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+    return "plan-" + hashlib.sha256(signature.encode("utf-8")).hexdigest()[:32]
+
+
+def _action(actions: Any) -> str:
+    if not isinstance(actions, list) or not actions:
+        return "no-op"
+    if len(actions) == 2 and set(actions) == {"create", "delete"}:
+        return "replace"
+    return str(actions[0])
+
+
+def _note(kind: str, change: Dict[str, Any]) -> str:
+    body = change.get("after") or change.get("before")
+    if not isinstance(body, dict):
+        return ""
+    name = body.get("name")
+    parts = []
+    if kind == "aws_lb":
+        parts.append(str(body.get("load_balancer_type") or "application"))
+    if isinstance(name, str) and name:
+        parts.append(f"`{name}`")
+    return " ".join(parts)
+
+
+class _Summary:
+    def __init__(self) -> None:
+        self.meta: Dict[str, Any] = {}
+        # Module call path without instance keys -> (parent call, source).
+        self.calls: Dict[str, Tuple[Optional[str], str]] = {}
+        # Module path without instance keys -> instance addresses, counters.
+        self.instances: Dict[str, Set[str]] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.categories: Dict[str, Dict[str, Any]] = {key: {"count": 0, "items": []} for key, _, _ in CATEGORIES}
+
+    def add_change(self, resource: Any) -> None:
+        if not isinstance(resource, dict) or resource.get("mode") == "data":
+            return
+        change = resource.get("change") if isinstance(resource.get("change"), dict) else {}
+        action = _action(change.get("actions"))
+        address = str(resource.get("module_address") or "")
+        module = _INSTANCE_KEY.sub("", address) if address else ROOT_MODULE
+        self.instances.setdefault(module, set()).add(address)
+        counts = self.counts.setdefault(module, {})
+        counts["resources"] = counts.get("resources", 0) + 1
+        counts[action] = counts.get(action, 0) + 1
+        kind = str(resource.get("type") or "")
+        category = _CATEGORY_OF.get(kind)
+        if category is not None and action != "delete":
+            entry = self.categories[category]
+            entry["count"] += 1
+            if len(entry["items"]) < ITEM_LIMIT:
+                entry["items"].append([str(resource.get("address")), action, _note(kind, change)])
+
+    def read_calls(self, reader: jsonstream.Reader, parent: Optional[str]) -> None:
+        # Walks a `module_calls` object; bodies are skipped except for
+        # `source` and the nested calls under `module`.
+        for name in reader.members():
+            call = f"{parent}.module.{name}" if parent else f"module.{name}"
+            source = ""
+            for key in reader.members():
+                if key == "source":
+                    value = reader.read_value()
+                    source = value if isinstance(value, str) else ""
+                elif key == "module":
+                    for inner in reader.members():
+                        if inner == "module_calls":
+                            self.read_calls(reader, call)
+                        else:
+                            reader.skip_value()
+                else:
+                    reader.skip_value()
+            self.calls[call] = (parent, source)
+
+    def directory(self, module: str, resolved: Dict[str, str]) -> str:
+        if module == ROOT_MODULE:
+            return ROOT_MODULE
+        if module in resolved:
+            return resolved[module]
+        parent, source = self.calls.get(module, (None, ""))
+        if not source:
+            # No configuration block: fall back to the module address.
+            directory = module
+        elif source.startswith(("./", "../")):
+            base = self.directory(parent, resolved) if parent else ROOT_MODULE
+            directory = posixpath.normpath(posixpath.join(base, source))
+        else:
+            directory = source
+        resolved[module] = directory
+        return directory
+
+    def result(self) -> Dict[str, Any]:
+        resolved: Dict[str, str] = {}
+        modules: Dict[str, Dict[str, Any]] = {}
+        for module, counts in self.counts.items():
+            row = modules.setdefault(self.directory(module, resolved), {"instances": 0, "resources": 0})
+            row["instances"] += len(self.instances[module])
+            for key, value in counts.items():
+                row[key] = row.get(key, 0) + value
+        totals: Dict[str, int] = {}
+        for row in modules.values():
+            for key, value in row.items():
+                if key != "instances":
+                    totals[key] = totals.get(key, 0) + value
+        return {
+            **self.meta,
+            "totals": totals,
+            "modules": [{"source": source, **modules[source]} for source in sorted(modules)],
+            "categories": self.categories,
+        }
+
+
+def summarize(stream: IO[Any], chunk_size: int = jsonstream.CHUNK_SIZE) -> Dict[str, Any]:
+    """Resource counts per module source and the notable planned resources, in one pass."""
+    summary = _Summary()
+    reader = jsonstream.Reader(stream, chunk_size)
+    keys: Set[str] = set()
+    try:
+        for key in reader.members():
+            keys.add(key)
+            if key == "resource_changes":
+                for _ in reader.items():
+                    summary.add_change(reader.read_value())
+            elif key == "configuration":
+                for section in reader.members():
+                    if section != "root_module":
+                        reader.skip_value()
+                        continue
+                    for inner in reader.members():
+                        if inner == "module_calls":
+                            summary.read_calls(reader, None)
+                        else:
+                            reader.skip_value()
+            elif key in ("format_version", "terraform_version", "errored"):
+                summary.meta[key] = reader.read_value()
+            else:
+                reader.skip_value()
+    except jsonstream.JSONStreamError as exc:
+        raise PlanError(f"malformed plan JSON: {exc}") from exc
+    # `resource_changes` is omitted from a plan with no changes, but
+    # `planned_values` is always there; a shown state has `values` instead.
+    if "format_version" not in keys or not keys & {"planned_values", "resource_changes"}:
+        raise PlanError("not `terraform show -json` output for a plan")
+    return summary.result()
+
+
+def render_plan(summary: Optional[Dict[str, Any]]) -> Iterator[str]:
+    """Markdown lines for the doc's planned resources section."""
+    if not summary:
+        yield (
+            "No saved plan loaded. Run `./bin/terraform plan -out plan.out ...` and "
+            "`./scripts/generate_demo_doc.py --plan plan.out` to document the environment before applying."
+        )
+        return
+    totals = summary["totals"]
+    actions = ", ".join(f"{totals.get(action, 0)} to {action}" for action in ACTIONS)
+    version = f", Terraform {summary['terraform_version']}" if summary.get("terraform_version") else ""
+    yield f"Plan `{summary.get('path', 'plan')}`{version}: {totals.get('resources', 0)} resources ({actions})."
+    if summary.get("errored"):
+        yield ""
+        yield "**The plan errored**; it may be incomplete."
+    if summary["modules"]:
+        yield ""
+        yield "| Module | Instances | Resources | " + " | ".join(action.capitalize() for action in ACTIONS) + " |"
+        yield "|---|---:|---:|" + "---:|" * len(ACTIONS)
+        for row in summary["modules"]:
+            source = "(root module)" if row["source"] == ROOT_MODULE else f"`{row['source']}`"
+            counts = " | ".join(str(row.get(action, 0)) for action in ACTIONS)
+            yield f"| {source} | {row['instances']} | {row['resources']} | {counts} |"
+    yield ""
+    for key, heading, _ in CATEGORIES:
+        entry = summary["categories"][key]
+        if not entry["count"]:
+            yield f"- **{heading}** – none planned."
+            continue
+        yield f"- **{heading}** – {entry['count']} planned:"
+        for address, action, note in entry["items"]:
+            yield f"  - `{address}` ({action}{', ' + note if note else ''})"
+        if entry["count"] > len(entry["items"]):
+            yield f"  - … {entry['count'] - len(entry['items'])} more"
@@ -0,0 +1,321 @@
+"""Offline CIDR overlap checker for the environment tfvars.
+
+Every address allocation in ``environments/*/*.tfvars.json`` (region,
+VPC and VNet CIDRs, hub prefixes, on-prem site ranges) goes into a
+``PrefixIndex``: integer ranges sorted by (first address, -last address)
+per IP version. CIDR blocks either nest or are disjoint, so one sweep with a stack
+of enclosing prefixes finds every overlap in O(n log n). Scanning every pair
+would be quadratic.
+
+Nesting is expected when the outer prefix belongs to an enclosing object in
+the same file (a VPC inside its region's ``cidr_block``). Any other overlap
+is a collision: two VPCs sharing space, a cloud region overlapping another
+cloud or an on-prem site. Prefixes that only reference address space
+(security group rules, ACLs, firewall policies, advertised routes) are not
+allocations and are skipped, as are link-local ranges such as TGW Connect
+inside CIDRs, which never leave their attachment.
+
+Files are parsed in a process pool once the set is large enough to pay for
+it; results are memoised on the files' stat signatures like the catalog
+config.
+"""
+
+from __future__ import annotations
+
+import bisect
+import ipaddress
+import json
+import multiprocessing
+import os
+import pathlib
+import re
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+ENVIRONMENTS = pathlib.Path("environments")
+PATTERN = "*/*.tfvars.json"
+# Keys whose values allocate address space rather than reference it.
+ALLOCATION_KEYS = frozenset(
+    {
+        "cidr_block",
+        "address_space",
+        "address_prefixes",
+        "ip_cidr_range",
+        "ipv4_cidr",
+        "ipv6_prefix",
+        "virtual_hub_address_prefix",
+    }
+)
+# Below this many bytes of tfvars, process start-up costs more than parsing.
+PARALLEL_MIN_BYTES = 4 << 20
+
+# (file, owning object path, key, value, parsed) as extracted in a worker.
+RawPrefix = Tuple[str, Tuple[str, ...], str, str, Optional[Tuple[int, int, int, int]]]
+# (version, first address, prefix length) identifies a network.
+NetworkKey = Tuple[int, int, int]
+BITS = {4: 32, 6: 128}
+_OCTET = r"(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IPV4_CIDR = re.compile(rf"{_OCTET}\.{_OCTET}\.{_OCTET}\.{_OCTET}/(3[0-2]|[12]?\d)")
+
+
+class Prefix(NamedTuple):
+    version: int
+    first: int
+    last: int
+    prefixlen: int
+    file: str
+    path: Tuple[str, ...]
+    key: str
+
+    @property
+    def network(self) -> NetworkKey:
+        return (self.version, self.first, self.prefixlen)
+
+    @property
+    def cidr(self) -> str:
+        address = ipaddress.IPv4Address(self.first) if self.version == 4 else ipaddress.IPv6Address(self.first)
+        return f"{address}/{self.prefixlen}"
+
+    @property
+    def label(self) -> str:
+        return f"{self.file}:{'.'.join((*self.path, self.key))}"
+
+    @property
+    def link_local(self) -> bool:
+        if self.version == 4:
+            return self.prefixlen >= 16 and self.first >> 16 == 0xA9FE
+        return self.prefixlen >= 10 and self.first >> 118 == 0x3FA
+
+
+def parse(value: str) -> Optional[Tuple[int, int, int, int]]:
+    """(version, first, last, prefixlen) for a CIDR string, host bits cleared.
+
+    Dotted-quad IPv4 goes through one regex match, several times faster
+    than building ``ipaddress`` objects; anything else uses ``ipaddress``.
+    """
+    text = value.strip()
+    match = _IPV4_CIDR.fullmatch(text)
+    if match:
+        a, b, c, d, bits = map(int, match.groups())
+        host = (1 << (32 - bits)) - 1
+        first = ((a << 24) | (b << 16) | (c << 8) | d) & ~host
+        return 4, first, first | host, bits
+    try:
+        network = ipaddress.ip_network(text, strict=False)
+    except ValueError:
+        return None
+    first = int(network.network_address)
+    return network.version, first, first | int(network.hostmask), network.prefixlen
+
+
+def _walk(value: Any, path: Tuple[str, ...], found: List[Tuple[Tuple[str, ...], str, str]]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in ALLOCATION_KEYS:
+                if isinstance(item, str):
+                    found.append((path, key, item))
+                elif isinstance(item, list):
+                    found.extend((path, f"{key}[{n}]", entry) for n, entry in enumerate(item) if isinstance(entry, str))
+                continue
+            _walk(item, (*path, str(key)), found)
+    elif isinstance(value, list):
+        for n, item in enumerate(value):
+            _walk(item, (*path, str(n)), found)
+
+
+def extract(path: pathlib.Path, name: str) -> Tuple[List[RawPrefix], Optional[str]]:
+    """Parsed allocations in one tfvars file, or an error message."""
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, json.JSONDecodeError) as exc:
+        return [], f"{name}: {exc}"
+    found: List[Tuple[Tuple[str, ...], str, str]] = []
+    _walk(data, (), found)
+    return [(name, owner, key, value, parse(value)) for owner, key, value in found], None
+
+
+def _extract_job(args: Tuple[str, str]) -> Tuple[List[RawPrefix], Optional[str]]:
+    return extract(pathlib.Path(args[0]), args[1])
+
+
+def environment_files(root: pathlib.Path) -> List[pathlib.Path]:
+    return sorted((root / ENVIRONMENTS).glob(PATTERN))
+
+
+def load_raw(files: Sequence[pathlib.Path], root: pathlib.Path, jobs: Optional[int] = None) -> Tuple[List[RawPrefix], List[str]]:
+    names = [str(path.relative_to(root / ENVIRONMENTS)) for path in files]
+    total = 0
+    for path in files:
+        try:
+            total += path.stat().st_size
+        except OSError:
+            pass
+    jobs = jobs or min(len(files), os.cpu_count() or 1)
+    if jobs > 1 and total >= PARALLEL_MIN_BYTES:
+        with multiprocessing.get_context("spawn").Pool(jobs) as pool:
+            results = pool.map(_extract_job, [(str(path), name) for path, name in zip(files, names)])
+    else:
+        results = [extract(path, name) for path, name in zip(files, names)]
+    raw: List[RawPrefix] = []
+    errors: List[str] = []
+    for found, error in results:
+        raw.extend(found)
+        if error:
+            errors.append(error)
+    return raw, errors
+
+
+class PrefixIndex:
+    """Allocations sorted by range so overlaps and lookups avoid pairwise scans."""
+
+    def __init__(self, prefixes: Sequence[Prefix]) -> None:
+        # Identical networks collapse into one node holding every owner, so
+        # the sweep stack never grows past the number of prefix lengths.
+        groups: Dict[NetworkKey, List[Prefix]] = {}
+        for prefix in prefixes:
+            groups.setdefault((prefix.version, prefix.first, prefix.prefixlen), []).append(prefix)
+        self.groups = groups
+        self.networks: Dict[int, List[NetworkKey]] = {4: [], 6: []}
+        for network in groups:
+            self.networks[network[0]].append(network)
+        self._starts: Dict[int, List[int]] = {}
+        for version, networks in self.networks.items():
+            # Same first address: the shorter prefix (the container) first.
+            networks.sort(key=lambda net: (net[1], net[2]))
+            self._starts[version] = [net[1] for net in networks]
+
+    def __len__(self) -> int:
+        return sum(len(owners) for owners in self.groups.values())
+
+    def overlaps(self) -> Iterator[Tuple[Prefix, Prefix]]:
+        """Yield (outer, inner) owner pairs for every overlapping allocation.
+
+        Identical networks come out as pairs too; the caller decides which
+        nestings are expected.
+        """
+        for networks in self.networks.values():
+            stack: List[List[Prefix]] = []
+            ends: List[int] = []
+            for network in networks:
+                owners = self.groups[network]
+                while ends and ends[-1] < network[1]:
+                    ends.pop()
+                    stack.pop()
+                for n, inner in enumerate(owners):
+                    for outer in owners[:n]:
+                        yield outer, inner
+                for enclosing in stack:
+                    for outer in enclosing:
+                        for inner in owners:
+                            yield outer, inner
+                stack.append(owners)
+                ends.append(owners[0].last)
+
+    def find(self, value: str) -> List[Prefix]:
+        """Every allocation overlapping ``value``: its supernets, itself and its subnets."""
+        parsed = parse(value)
+        if parsed is None:
+            raise ValueError(f"{value!r} is not a CIDR")
+        version, first, last, prefixlen = parsed
+        bits = BITS[version]
+        found: List[Prefix] = []
+        for length in range(prefixlen + 1):
+            masked = first & ~((1 << (bits - length)) - 1)
+            found.extend(self.groups.get((version, masked, length), ()))
+        networks, starts = self.networks[version], self._starts[version]
+        position = bisect.bisect_left(starts, first)
+        while position < len(networks) and starts[position] <= last:
+            candidate = networks[position]
+            if candidate[2] > prefixlen:
+                found.extend(self.groups[candidate])
+            position += 1
+        return found
+
+
+def build_index(raw: Sequence[RawPrefix]) -> Tuple[PrefixIndex, List[str]]:
+    prefixes: List[Prefix] = []
+    invalid: List[str] = []
+    for name, owner, key, value, parsed in raw:
+        if parsed is None:
+            invalid.append(f"{name}:{'.'.join((*owner, key))} = {value!r}")
+            continue
+        prefix = Prefix(*parsed, name, owner, key)
+        if not prefix.link_local:
+            prefixes.append(prefix)
+    return PrefixIndex(prefixes), invalid
+
+
+def _expected(outer: Prefix, inner: Prefix) -> bool:
+    # A prefix nests inside allocations of its own object or an ancestor
+    # object in the same file; a sibling key of the same object (a hub
+    # prefix under the region block) counts as nested too.
+    if outer.file != inner.file or inner.path[: len(outer.path)] != outer.path:
+        return False
+    if outer.network == inner.network:
+        return len(inner.path) > len(outer.path)
+    return True
+
+
+_checked: Dict[pathlib.Path, Tuple[Tuple[Any, ...], Dict[str, Any]]] = {}
+
+
+def _stat(path: pathlib.Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def check(root: pathlib.Path, limit: int = 25, jobs: Optional[int] = None) -> Dict[str, Any]:
+    """Overlap report for the environment tfvars under ``root``, memoised on their stat signatures."""
+    files = environment_files(root)
+    signature = tuple(_stat(path) for path in files)
+    cached = _checked.get(root)
+    if cached is not None and cached[0] == signature and cached[1]["limit"] == limit:
+        return cached[1]
+    raw, errors = load_raw(files, root, jobs)
+    index, invalid = build_index(raw)
+    collisions = []
+    count = 0
+    for outer, inner in index.overlaps():
+        if _expected(outer, inner):
+            continue
+        count += 1
+        if len(collisions) < limit:
+            relation = "duplicates" if outer.network == inner.network else "contains"
+            collisions.append((outer.cidr, outer.label, relation, inner.cidr, inner.label))
+    report = {
+        "limit": limit,
+        "files": len(files),
+        "prefixes": len(index),
+        "collision_count": count,
+        "collisions": collisions,
+        "invalid": invalid[:limit],
+        "errors": errors,
+    }
+    _checked[root] = (signature, report)
+    return report
+
+
+def render_report(report: Dict[str, Any]) -> Iterator[str]:
+    """Markdown lines for the doc's address plan section."""
+    if not report["files"]:
+        yield "No environment tfvars found under `environments/`."
+        return
+    yield (
+        f"Checked {report['prefixes']} address allocations in {report['files']} environment files "
+        "(nesting inside the owning region or VPC is expected and not listed)."
+    )
+    for error in report["errors"]:
+        yield f"- **Unreadable** – {error}"
+    if not report["collision_count"]:
+        yield "- **Overlaps** – none."
+    else:
+        yield f"- **Overlaps** – {report['collision_count']} found:"
+        for outer_net, outer, relation, inner_net, inner in report["collisions"]:
+            yield f"  - `{outer_net}` ({outer}) {relation} `{inner_net}` ({inner})"
+        if report["collision_count"] > len(report["collisions"]):
+            yield f"  - … {report['collision_count'] - len(report['collisions'])} more"
+    for entry in report["invalid"]:
+        yield f"- **Not a CIDR** – {entry}"
@@ -0,0 +1,175 @@
+"""Live checks of the endpoints the doc lists.
+
+``Prober.run`` resolves and connects to every target concurrently on one
+asyncio loop: ``tcp`` targets pass once the connection opens, and ``http``
+targets also need an HTTP status line back from a ``HEAD /``. A semaphore
+bounds the probes in flight and each probe has its own deadline, covering
+resolution, connect and response. With enough slots, a run takes about as
+long as the slowest probe rather than the sum of them all.
+
+Results are cached on disk for ``ttl`` seconds, so back-to-back
+regenerations (watch mode, the daemon, a re-run after an edit) reuse them
+instead of probing again.
+
+asyncio is imported by the functions that probe, so a doc generated
+without ``--probe`` only pays for the constants and ``note``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import pathlib
+import socket
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TTL = 60.0
+USER_AGENT = "skyforge-demo-doc-probe"
+
+
+class Target(NamedTuple):
+    kind: str  # "tcp" or "http"
+    host: str
+    port: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}://{self.host}:{self.port}"
+
+
+class Result(NamedTuple):
+    status: str  # "up", "down", "timeout" or "unresolved"
+    latency_ms: Optional[int]
+    detail: str
+    checked_at: float
+
+
+async def _check(target: Target) -> Result:
+    import asyncio
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        addresses = await loop.getaddrinfo(target.host, target.port, type=socket.SOCK_STREAM)
+    except socket.gaierror as exc:
+        return Result("unresolved", None, exc.strerror or str(exc), time.time())
+    family, _, _, _, address = addresses[0]
+    try:
+        reader, writer = await asyncio.open_connection(address[0], target.port, family=family)
+    except OSError as exc:
+        # asyncio folds the per-address errors into one message; the errno reads better.
+        reason = os.strerror(exc.errno) if exc.errno else str(exc) or type(exc).__name__
+        return Result("down", None, reason, time.time())
+    try:
+        detail = f"connected to {address[0]}"
+        if target.kind == "http":
+            request = f"HEAD / HTTP/1.1\r\nHost: {target.host}\r\nUser-Agent: {USER_AGENT}\r\nConnection: close\r\n\r\n"
+            writer.write(request.encode("ascii"))
+            await writer.drain()
+            status_line = (await reader.readline()).split()
+            if len(status_line) < 2 or not status_line[0].startswith(b"HTTP/"):
+                return Result("down", None, "no HTTP response", time.time())
+            detail = f"HTTP {status_line[1].decode('ascii', 'replace')}"
+        latency = round((time.perf_counter() - started) * 1000)
+        return Result("up", latency, detail, time.time())
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+
+class Prober:
+    """Concurrent endpoint checks with bounded concurrency, deadlines and a TTL cache."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        ttl: float = DEFAULT_TTL,
+        cache_path: Optional[pathlib.Path] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.probed = 0
+        self.reused = 0
+
+    def _load(self) -> Dict[str, Result]:
+        if self.cache_path is None:
+            return {}
+        try:
+            with self.cache_path.open("r", encoding="utf-8") as handle:
+                stored = json.load(handle)
+            return {key: Result(*value) for key, value in stored.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def _save(self, results: Dict[str, Result]) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(f".tmp{os.getpid()}")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(results, handle, separators=(",", ":"))
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            return
+
+    async def _probe(self, target: Target, slots: asyncio.Semaphore) -> Result:
+        # The deadline starts once a slot is free, so queueing never counts
+        # against a probe.
+        import asyncio
+
+        async with slots:
+            try:
+                return await asyncio.wait_for(_check(target), self.timeout)
+            except asyncio.TimeoutError:
+                return Result("timeout", None, f"no answer in {self.timeout:g}s", time.time())
+
+    async def _run(self, targets: List[Target]) -> List[Result]:
+        import asyncio
+
+        slots = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._probe(target, slots) for target in targets))
+
+    def run(self, targets: Iterable[Target]) -> Dict[str, Result]:
+        """Results keyed by ``Target.key``; fresh cached results are not probed again."""
+        wanted = {target.key: target for target in targets}
+        cached = self._load()
+        now = time.time()
+        results = {key: cached[key] for key in wanted if key in cached and now - cached[key].checked_at < self.ttl}
+        stale = [target for key, target in wanted.items() if key not in results]
+        if stale:
+            import asyncio
+
+            results.update(zip((target.key for target in stale), asyncio.run(self._run(stale))))
+            # Keep other targets' fresh entries (another stream's doc, say).
+            fresh = {key: value for key, value in cached.items() if now - value.checked_at < self.ttl}
+            self._save({**fresh, **results})
+        self.probed += len(stale)
+        self.reused += len(wanted) - len(stale)
+        return results
+
+
+def note(results: Optional[Dict[str, Result]], target: Target) -> str:
+    """Inline annotation for a doc row, or "" when probing is off."""
+    if results is None:
+        return ""
+    result = results.get(target.key)
+    if result is None:
+        return ""
+    if result.status == "up":
+        return f" [up {result.latency_ms} ms]"
+    if result.status == "timeout":
+        return " [timeout]"
+    return f" [{result.status}: {result.detail}]"
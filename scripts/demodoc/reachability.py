@@ -0,0 +1,262 @@
+"""Inverted index over the reachability outputs.
+
+The ``reachability`` output maps cloud and region to AWS Reachability
+Analyzer paths and analyses, Azure Network Watcher connection monitors and
+GCP connectivity tests by name. ``ReachabilityIndex`` sorts each region's
+names once, which is all the doc section needs. On the first query it also
+lays every test out in (cloud, region, kind, name) order, so a cloud or a
+region is a contiguous id range. Names, kinds and the source/destination
+attributes of the matching tfvars definitions are split into words with
+sorted posting lists. A lookup therefore costs O(results): a range slice
+for a scope, posting-list intersections for a query. Nothing is scanned.
+
+The doc's reachability section and ``/api/reachability`` share one index
+per outputs object (a new object only arrives when the outputs change).
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# (cloud, kind, label in the doc) in display order.
+KINDS = (
+    ("aws", "path", "paths"),
+    ("aws", "analysis", "analyses"),
+    ("azure", "monitor", "monitors"),
+    ("gcp", "test", "tests"),
+)
+# tfvars keys holding each cloud's test endpoints.
+ENDPOINT_KEYS = {
+    "aws": ("source_vpc", "destination_vpc"),
+    "azure": ("source_address", "destination_address"),
+    "gcp": ("source_ip", "destination_ip"),
+}
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class Test(NamedTuple):
+    cloud: str
+    region: str
+    kind: str
+    name: str
+    resource: Optional[str]
+    source: Optional[str]
+    destination: Optional[str]
+    protocol: Optional[str]
+    port: Optional[int]
+    description: Optional[str]
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _deployed(reachability: Dict[str, Any]) -> Iterator[Tuple[str, str, str, Any]]:
+    # (cloud, kind, region, {name: resource}); non-dict regions yield None.
+    aws = _dict(reachability.get("aws"))
+    for cloud, kind, _ in KINDS:
+        if cloud == "aws":
+            regions = _dict(aws.get("paths" if kind == "path" else "analyses"))
+        else:
+            regions = _dict(reachability.get(cloud))
+        for region, entries in regions.items():
+            yield cloud, kind, str(region), entries if isinstance(entries, dict) else None
+
+
+def _resource_id(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("id") or value.get("name")
+    return str(value) if isinstance(value, (str, int)) and value != "" else None
+
+
+def _definitions(tests: Dict[str, Any]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    found = {}
+    for cloud, regions in _dict(tests).items():
+        for region, entries in _dict(regions).items():
+            for entry in entries if isinstance(entries, list) else ():
+                if isinstance(entry, dict) and entry.get("name"):
+                    found[(cloud, region, str(entry["name"]))] = entry
+    return found
+
+
+class Page(NamedTuple):
+    total: int
+    offset: int
+    limit: int
+    results: List[Test]
+
+
+class ReachabilityIndex:
+    """Deployed reachability tests with sorted names, scope ranges and a word index.
+
+    Sorted names per region are all the doc section needs, so they are
+    built eagerly. The records, ranges and posting lists behind ``query``
+    are built on the first query, once per index.
+    """
+
+    def __init__(self, reachability: Dict[str, Any], tests: Optional[Dict[str, Any]] = None) -> None:
+        self._tests = tests or {}
+        # (cloud, kind) -> sorted regions, including ones with no usable map.
+        self.regions: Dict[Tuple[str, str], List[str]] = {}
+        # (cloud, region, kind) -> sorted names, and the {name: resource} map.
+        self._names: Dict[Tuple[str, str, str], List[str]] = {}
+        self._deployed: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for cloud, kind, region, deployed in _deployed(_dict(reachability)):
+            self.regions.setdefault((cloud, kind), []).append(region)
+            # Output map keys are always strings; sorting them is the only per-render cost.
+            self._names[(cloud, region, kind)] = sorted(deployed or ())
+            self._deployed[(cloud, region, kind)] = deployed or {}
+        for regions in self.regions.values():
+            regions.sort()
+        self._lock = threading.Lock()
+        self._entries: Optional[List[Test]] = None
+        # Contiguous id ranges per (cloud, None) and (cloud, region).
+        self._ranges: Dict[Tuple[str, Optional[str]], Tuple[int, int]] = {}
+        # Region names are per cloud, but a region-only query may span clouds.
+        self._region_scopes: Dict[str, List[Tuple[int, int]]] = {}
+        self._words: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(names) for names in self._names.values())
+
+    def names(self, cloud: str, region: str, kind: str) -> List[str]:
+        return self._names.get((cloud, region, kind), [])
+
+    def _build(self) -> List[Test]:
+        # Walking clouds, regions, kinds and names in sorted order yields the
+        # records already ordered, so every scope is one id range.
+        with self._lock:
+            if self._entries is not None:
+                return self._entries
+            definitions = _definitions(self._tests)
+            entries: List[Test] = []
+            postings: Dict[str, List[int]] = {}
+            for cloud in sorted({cloud for cloud, _ in self.regions}):
+                kinds = [kind for kind_cloud, kind, _ in KINDS if kind_cloud == cloud]
+                source_key, destination_key = ENDPOINT_KEYS[cloud]
+                cloud_start = len(entries)
+                for region in sorted({region for kind in kinds for region in self.regions.get((cloud, kind), ())}):
+                    region_start = len(entries)
+                    for kind in kinds:
+                        deployed = self._deployed.get((cloud, region, kind), {})
+                        for name in self._names.get((cloud, region, kind), ()):
+                            definition = definitions.get((cloud, region, name), {})
+                            port = definition.get("destination_port")
+                            test = Test(
+                                cloud,
+                                region,
+                                kind,
+                                name,
+                                _resource_id(deployed[name]),
+                                definition.get(source_key),
+                                definition.get(destination_key),
+                                definition.get("protocol"),
+                                port if isinstance(port, int) else None,
+                                definition.get("description"),
+                            )
+                            text = " ".join(filter(None, (name, kind, test.source, test.destination, test.description)))
+                            for word in set(words(text)):
+                                postings.setdefault(word, []).append(len(entries))
+                            entries.append(test)
+                    self._ranges[(cloud, region)] = (region_start, len(entries))
+                    self._region_scopes.setdefault(region, []).append((region_start, len(entries)))
+                self._ranges[(cloud, None)] = (cloud_start, len(entries))
+            self._postings = postings
+            self._words = sorted(postings)
+            self._entries = entries
+            return entries
+
+    def _scope(self, cloud: Optional[str], region: Optional[str]) -> List[Tuple[int, int]]:
+        if cloud is None and region is None:
+            return [(0, len(self._build()))]
+        if cloud is None:
+            assert region is not None
+            return self._region_scopes.get(region, [])
+        scope = self._ranges.get((cloud, region))
+        return [scope] if scope is not None else []
+
+    def _matching(self, prefix: str) -> Set[int]:
+        # Every query word matches as a prefix, so "data-ti" finds "data-tier".
+        vocabulary = self._words
+        position = bisect.bisect_left(vocabulary, prefix)
+        found: Set[int] = set()
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            found.update(self._postings[vocabulary[position]])
+            position += 1
+        return found
+
+    def query(
+        self,
+        cloud: Optional[str] = None,
+        region: Optional[str] = None,
+        q: str = "",
+        offset: int = 0,
+        limit: int = DEFAULT_LIMIT,
+    ) -> Page:
+        """One page of tests in ``cloud``/``region`` whose words match every word of ``q``."""
+        offset = max(0, offset)
+        limit = max(1, min(limit, MAX_LIMIT))
+        entries = self._build()
+        scopes = self._scope(cloud or None, region or None)
+        terms = words(q)
+        if not terms:
+            total = sum(end - start for start, end in scopes)
+            results: List[Test] = []
+            skip = offset
+            for start, end in scopes:
+                if len(results) >= limit:
+                    break
+                if skip >= end - start:
+                    skip -= end - start
+                    continue
+                stop = min(end, start + skip + limit - len(results))
+                results.extend(entries[start + skip : stop])
+                skip = 0
+            return Page(total, offset, limit, results)
+
+        candidates = sorted((self._matching(term) for term in terms), key=len)
+        scope_size = sum(end - start for start, end in scopes)
+        if scope_size <= len(candidates[0]):
+            # A small region: walk it and test membership.
+            ids: Iterable[int] = (position for start, end in scopes for position in range(start, end))
+            rest: Sequence[Set[int]] = candidates
+        else:
+            ids = sorted(candidates[0])
+            rest = candidates[1:]
+            if len(scopes) != 1 or scopes[0] != (0, len(entries)):
+                ids = [position for position in ids if any(start <= position < end for start, end in scopes)]
+        matches = [position for position in ids if all(position in other for other in rest)]
+        return Page(len(matches), offset, limit, [entries[position] for position in matches[offset : offset + limit]])
+
+
+# The doc section indexes the outputs alone, the API with the tfvars
+# definitions too; a few slots keep both warm.
+INDEX_SLOTS = 4
+_indexed: Dict[Tuple[int, int], Tuple[Any, Any, ReachabilityIndex]] = {}
+# Server threads look indexes up while watch mode swaps in new outputs.
+_lock = threading.Lock()
+
+
+def index_for(reachability: Any, tests: Any = None) -> ReachabilityIndex:
+    """The index for these output and config objects, built once per pair."""
+    key = (id(reachability), id(tests))
+    with _lock:
+        cached = _indexed.get(key)
+        if cached is not None and cached[0] is reachability and cached[1] is tests:
+            return cached[2]
+        index = ReachabilityIndex(_dict(reachability), _dict(tests))
+        while len(_indexed) >= INDEX_SLOTS:
+            del _indexed[next(iter(_indexed))]
+        # The objects are kept alive with the index so their ids cannot be reused.
+        _indexed[key] = (reachability, tests, index)
+        return index
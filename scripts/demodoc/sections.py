@@ -0,0 +1,228 @@
+"""Persistent memo of rendered doc sections and skip-unchanged doc writes.
+
+Each section is stored with a key hashed from the output subtree it reads
+(plus a salt that changes whenever the renderer code does), so a repeat run
+against the same outputs reuses the stored text. The document itself is
+only rewritten when its content, ignoring volatile lines such as the
+generation timestamp, differs from what was last written, which keeps its
+mtime stable for anything watching it.
+
+Documents are written from an iterable of chunks: the chunks go to a
+temporary file next to the target while being hashed, and the file is
+swapped in only if the digest moved, so a large document never has to be
+held in memory as one string.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Pattern
+
+CACHE_VERSION = 1
+# Sections larger than this are streamed through without being memoized, so
+# a huge catalog does not end up held in memory (and in the cache file).
+SECTION_LIMIT = 1 << 20
+# Chunks are coalesced into blocks of about this many characters before
+# they are hashed and written.
+WRITE_BLOCK = 64 * 1024
+
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SectionCache:
+    """Section text keyed by ``(salt, section inputs)``, persisted as JSON."""
+
+    def __init__(self, path: pathlib.Path, salt: str) -> None:
+        self.path = path
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._sections: Dict[str, Dict[str, str]] = {}
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                stored = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(stored, dict) and stored.get("version") == CACHE_VERSION and stored.get("salt") == salt:
+            self._sections = stored.get("sections") or {}
+            self._documents = stored.get("documents") or {}
+
+    def stream(
+        self,
+        name: str,
+        inputs: Any,
+        build: Callable[[], Iterable[str]],
+        limit: int = SECTION_LIMIT,
+    ) -> Iterator[str]:
+        """Yield a section's chunks, memoizing it only while it stays under ``limit``.
+
+        A section that last overflowed the limit is not hashed up front (it
+        could not be a hit); its key is computed only if it now fits.
+        """
+        entry = self._sections.get(name)
+        oversize = entry is not None and entry.get("oversize")
+        key = None if oversize else _digest(inputs)
+        if entry is not None and key is not None and entry.get("key") == key:
+            self.hits += 1
+            yield entry["text"]
+            return
+        self.misses += 1
+        kept: Optional[List[str]] = []
+        size = 0
+        for chunk in build():
+            if kept is not None:
+                size += len(chunk)
+                if size > limit:
+                    kept = None
+                else:
+                    kept.append(chunk)
+            yield chunk
+        if kept is None:
+            self._sections[name] = {"oversize": True}
+        else:
+            self._sections[name] = {"key": key if key is not None else _digest(inputs), "text": "".join(kept)}
+        self._dirty = True
+
+    def document_state(self, doc_path: pathlib.Path) -> Optional[Dict[str, Any]]:
+        return self._documents.get(str(doc_path))
+
+    def record_document(self, doc_path: pathlib.Path, digest: str) -> None:
+        try:
+            st = os.stat(doc_path)
+        except OSError:
+            return
+        self._documents[str(doc_path)] = {"digest": digest, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        payload = {
+            "version": CACHE_VERSION,
+            "salt": self.salt,
+            "sections": self._sections,
+            "documents": self._documents,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+            # Sections include appliance credentials; keep them owner-only.
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            return
+        self._dirty = False
+
+
+class _StableDigest:
+    """SHA-256 of text with ``volatile`` lines removed, fed in arbitrary pieces.
+
+    The volatile pattern is line-anchored, so only complete lines are
+    filtered; a trailing partial line is carried over to the next update.
+    """
+
+    def __init__(self, volatile: Pattern[str]) -> None:
+        self._volatile = volatile
+        self._hash = hashlib.sha256()
+        self._pending = ""
+
+    def update(self, text: str) -> None:
+        text = self._pending + text
+        cut = text.rfind("\n") + 1
+        self._pending = text[cut:]
+        if cut:
+            self._hash.update(self._volatile.sub("", text[:cut]).encode("utf-8"))
+
+    def hexdigest(self) -> str:
+        digest = self._hash.copy()
+        digest.update(self._volatile.sub("", self._pending).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def _blocks(chunks: Iterable[str], size: int = WRITE_BLOCK) -> Iterator[str]:
+    buffered: List[str] = []
+    length = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffered)
+            buffered, length = [], 0
+    if buffered:
+        yield "".join(buffered)
+
+
+def _file_digest(doc_path: pathlib.Path, volatile: Pattern[str]) -> Optional[str]:
+    digest = _StableDigest(volatile)
+    try:
+        with doc_path.open("r", encoding="utf-8") as handle:
+            for block in iter(lambda: handle.read(WRITE_BLOCK), ""):
+                digest.update(block)
+    except (OSError, UnicodeDecodeError):
+        return None
+    return digest.hexdigest()
+
+
+def write_chunks_if_changed(
+    doc_path: pathlib.Path,
+    chunks: Iterable[str],
+    volatile: Pattern[str],
+    cache: Optional[SectionCache] = None,
+) -> bool:
+    """Stream ``chunks`` to ``doc_path`` unless only lines matching ``volatile`` differ.
+
+    Returns ``True`` when the file was replaced. Peak memory is one block,
+    however large the document.
+    """
+    try:
+        st: Optional[os.stat_result] = os.stat(doc_path)
+    except OSError:
+        st = None
+    digest = _StableDigest(volatile)
+    tmp = doc_path.with_name(f".{doc_path.name}.tmp{os.getpid()}")
+    mode = (st.st_mode & 0o7777) if st is not None else 0o666
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as handle:
+            for block in _blocks(chunks):
+                digest.update(block)
+                handle.write(block)
+        new_digest = digest.hexdigest()
+
+        unchanged = False
+        known = cache.document_state(doc_path) if cache is not None else None
+        if known is not None and st is not None:
+            # The file is untouched since we last wrote it; trust the stored digest.
+            if (st.st_mtime_ns, st.st_size) == (known.get("mtime_ns"), known.get("size")):
+                unchanged = known.get("digest") == new_digest
+        elif st is not None:
+            unchanged = _file_digest(doc_path, volatile) == new_digest
+            if unchanged and cache is not None:
+                cache.record_document(doc_path, new_digest)
+        if unchanged:
+            return False
+        os.replace(tmp, doc_path)
+    finally:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+    if cache is not None:
+        cache.record_document(doc_path, new_digest)
+    return True
+
+
+def volatile_lines(*patterns: str) -> Pattern[str]:
+    """Compile full-line ``patterns`` into a single multiline regex."""
+    return re.compile("|".join(f"^(?:{pattern})$" for pattern in patterns), re.MULTILINE)
@@ -0,0 +1,648 @@
+"""Threaded HTTP/1.1 server for the generated demo workflow document.
+
+The rendered page is kept in memory together with a pre-gzipped copy and is
+only rebuilt when the markdown file's stat signature and content hash
+change, so a room full of attendees loading the page at once costs one
+``stat`` per request rather than a read, escape and encode. In watch mode
+``/events`` pushes regenerated content to open pages over Server-Sent Events.
+``/metrics`` reports request counts and latencies, cache hit ratios and the
+last regeneration in Prometheus text format. ``/catalog.ndjson`` streams the
+path catalog as one JSON record per flow, and ``/api/reachability`` pages
+through the indexed reachability tests (``cloud``, ``region``, ``q``,
+``offset``, ``limit``). ``/?section=security&cloud=azure`` (any of
+``section``, repeatable or comma-separated, ``cloud`` and ``region``) serves
+the doc filtered down to those sections, cloud and region, concatenated
+from the fragments written at generation time, each view with its own
+ETag. With a static site build, ``/site/`` serves its
+prebuilt pages straight from disk with ``sendfile``: the encoding is picked
+from the files that exist (brotli, gzip, identity), and content-hashed page
+URLs are cached for a year.
+
+Documents above ``STREAM_THRESHOLD`` are not held in memory at all: the gzip
+variant is built once into an anonymous temporary file, and identity
+requests stream the markdown from disk through the HTML escape with chunked
+transfer encoding.
+"""
+
+from __future__ import annotations
+
+import codecs
+import gzip
+import hashlib
+import html
+import http.server
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import zlib
+from http import HTTPStatus
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .export import CONTENT_TYPES as EXPORT_CONTENT_TYPES
+from .export import iter_export
+from .fragments import FragmentStore, View
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from .metrics import Registry, observe_cache
+from .reachability import DEFAULT_LIMIT, ReachabilityIndex
+from .site import ENCODINGS as SITE_ENCODINGS
+from .site import StaticSite
+
+MISSING_DOC = "# documentation not found\n"
+INDEX_PATHS = ("/", "/index.html")
+EVENTS_PATH = "/events"
+# Markdown larger than this is streamed from disk per request.
+STREAM_THRESHOLD = 4 << 20
+STREAM_CHUNK = 64 * 1024
+METRICS_PATH = "/metrics"
+CATALOG_PATH = "/catalog.ndjson"
+REACHABILITY_PATH = "/api/reachability"
+SITE_PREFIX = "/site/"
+# Content-hashed site pages never change under their URL.
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Query parameters that select a filtered view of the doc.
+VIEW_PARAMS = ("section", "cloud", "region")
+# Comment frames keep idle SSE connections (and any proxy between) open.
+EVENTS_KEEPALIVE = 15.0
+
+LIVE_RELOAD_SCRIPT = """<script>
+new EventSource("/events").addEventListener("update", function (event) {
+  var update = JSON.parse(event.data);
+  if (update.reload) {
+    location.reload();
+  } else {
+    document.getElementById("doc").textContent = update.markdown;
+  }
+});
+</script>"""
+PAGE_HEAD = '<html><body><pre id="doc">'
+PAGE_TAIL = "</pre>{script}</body></html>"
+
+
+class RenderedDocument:
+    """An immutable HTML rendering of the markdown and its gzip variant."""
+
+    streamed = False
+
+    def __init__(self, markdown: str, digest: str, live_reload: bool = False) -> None:
+        script = LIVE_RELOAD_SCRIPT if live_reload else ""
+        self.body = (PAGE_HEAD + html.escape(markdown) + PAGE_TAIL.format(script=script)).encode("utf-8")
+        self.digest = digest
+        # mtime=0 keeps the gzip bytes, and therefore the ETag, reproducible.
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = f'"{self.digest[:32]}"'
+        self.gzip_etag = f'"{self.digest[:32]}-gz"'
+
+
+class StreamedDocument:
+    """A document too large to keep rendered in memory.
+
+    The identity body is escaped from the markdown file on each request.
+    The gzip body is compressed once, in the same pass that hashes the file,
+    into an anonymous temporary file; requests read it with ``pread`` so they
+    do not share a file position, and it disappears with the last reference.
+    """
+
+    streamed = True
+
+    def __init__(self, doc_path: pathlib.Path, digest: str, gzip_file: BinaryIO, tail: str) -> None:
+        self.doc_path = doc_path
+        self.digest = digest
+        self.gzip_file = gzip_file
+        self.gzip_size = os.fstat(gzip_file.fileno()).st_size
+        self.tail = tail
+        self.etag = f'"{self.digest[:32]}"'
+        self.gzip_etag = f'"{self.digest[:32]}-gz"'
+
+    @classmethod
+    def build(cls, doc_path: pathlib.Path, handle: BinaryIO, live_reload: bool = False) -> "StreamedDocument":
+        tail = PAGE_TAIL.format(script=LIVE_RELOAD_SCRIPT if live_reload else "")
+        digest = hashlib.sha256()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        # wbits=31 writes a gzip container with mtime 0, so the bytes are stable.
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        out = tempfile.TemporaryFile(prefix="skyforge-doc-", suffix=".html.gz")
+        try:
+            out.write(compressor.compress(PAGE_HEAD.encode("utf-8")))
+            for block in iter(lambda: handle.read(STREAM_CHUNK), b""):
+                digest.update(block)
+                out.write(compressor.compress(html.escape(decoder.decode(block)).encode("utf-8")))
+            last = html.escape(decoder.decode(b"", final=True)) + tail
+            out.write(compressor.compress(last.encode("utf-8")))
+            out.write(compressor.flush())
+            out.flush()
+        except BaseException:
+            out.close()
+            raise
+        return cls(doc_path, digest.hexdigest(), out, tail)
+
+    def iter_body(self, handle: TextIO) -> Iterator[bytes]:
+        """Yield the HTML page for the open markdown ``handle`` in chunks."""
+        yield PAGE_HEAD.encode("utf-8")
+        for text in iter(lambda: handle.read(STREAM_CHUNK), ""):
+            yield html.escape(text).encode("utf-8")
+        yield self.tail.encode("utf-8")
+
+    def iter_gzip(self) -> Iterator[bytes]:
+        fd = self.gzip_file.fileno()
+        offset = 0
+        while offset < self.gzip_size:
+            data = os.pread(fd, min(STREAM_CHUNK, self.gzip_size - offset), offset)
+            if not data:
+                break
+            offset += len(data)
+            yield data
+
+
+class DocumentCache:
+    """Serve ``doc_path`` from memory, reloading when the file changes."""
+
+    def __init__(self, doc_path: pathlib.Path, live_reload: bool = False) -> None:
+        self.doc_path = doc_path
+        self.live_reload = live_reload
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._document: Optional[Union[RenderedDocument, StreamedDocument]] = None
+        # Reads of the markdown file; every other lookup is served from memory.
+        self.loads = 0
+
+    @property
+    def signature(self) -> Optional[Tuple[int, int, int]]:
+        """Stat signature of the file the current document was built from."""
+        return self._signature
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.doc_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get(self) -> Union[RenderedDocument, StreamedDocument]:
+        signature = self._stat_signature()
+        document = self._document
+        if document is not None and signature == self._signature:
+            return document
+        with self._lock:
+            if self._document is not None and signature == self._signature:
+                return self._document
+            self.loads += 1
+            if signature is not None and signature[1] > STREAM_THRESHOLD:
+                streamed = self._load_streamed()
+                if streamed is not None:
+                    return streamed
+            try:
+                markdown = self.doc_path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                markdown = MISSING_DOC
+            digest = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+            # A touch without a content change keeps the existing ETag.
+            if self._document is None or self._document.digest != digest or self._document.streamed:
+                self._document = RenderedDocument(markdown, digest, self.live_reload)
+            self._signature = signature
+            return self._document
+
+    def _load_streamed(self) -> Optional[StreamedDocument]:
+        try:
+            with self.doc_path.open("rb") as handle:
+                st = os.fstat(handle.fileno())
+                document = StreamedDocument.build(self.doc_path, handle, self.live_reload)
+        except FileNotFoundError:
+            return None
+        current = self._document
+        # A touch without a content change keeps the existing ETag.
+        if not (isinstance(current, StreamedDocument) and current.digest == document.digest):
+            self._document = document
+        # The signature of the handle that was hashed, not the earlier stat.
+        self._signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        return self._document  # type: ignore[return-value]
+
+
+class EventBroker:
+    """Latest-value fan-out for Server-Sent Events.
+
+    Subscribers remember the version they last sent; a slow client simply
+    skips to the newest event instead of queueing every intermediate one.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._version = 0
+        self._event: Optional[Tuple[str, str]] = None
+
+    @property
+    def version(self) -> int:
+        with self._cond:
+            return self._version
+
+    def publish(self, event: str, data: str) -> None:
+        with self._cond:
+            self._version += 1
+            self._event = (event, data)
+            self._cond.notify_all()
+
+    def wait(self, seen: int, timeout: float) -> Tuple[int, Optional[Tuple[str, str]]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != seen, timeout)
+            if self._version == seen:
+                return seen, None
+            return self._version, self._event
+
+
+def _accepts_gzip(header: str) -> bool:
+    return _accepts(header, ("gzip", "x-gzip"))
+
+
+def _accepts(header: str, codings: Tuple[str, ...]) -> bool:
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() not in (*codings, "*"):
+            continue
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _view_gzip(view: View, head: bytes, tail: bytes) -> bytes:
+    # Compressed once per view; concurrent first requests may both build it.
+    if view.gzip_body is None:
+        view.gzip_body = gzip.compress(b"".join((head, *view.iter_body(), tail)), compresslevel=9, mtime=0)
+    return view.gzip_body
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class DocRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Idle keep-alive connections are dropped after this many seconds.
+    timeout = 30
+    # Headers and a small gzip body go out as separate writes; without
+    # TCP_NODELAY they stall on delayed ACKs on a reused connection.
+    disable_nagle_algorithm = True
+    server: "DocServer"
+    _status = 0
+
+    def do_GET(self) -> None:  # noqa: N802
+        route = urlsplit(self.path).path
+        if route == EVENTS_PATH and self.server.events is not None:
+            self.server.requests.inc(route=EVENTS_PATH, method="GET", code=HTTPStatus.OK.value)
+            self._serve_events(self.server.events)
+            return
+        self._timed(route, send_body=True)
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        self._timed(urlsplit(self.path).path, send_body=False)
+
+    def _timed(self, route: str, send_body: bool) -> None:
+        started = time.perf_counter()
+        if route == METRICS_PATH:
+            self._serve_metrics(send_body)
+        elif route == CATALOG_PATH and self.server.catalog is not None:
+            self._serve_catalog(self.server.catalog, send_body)
+        elif route == REACHABILITY_PATH and self.server.reachability is not None:
+            self._serve_reachability(self.server.reachability(), send_body)
+        elif route.startswith(SITE_PREFIX) and self.server.site is not None:
+            self._serve_site(self.server.site, route[len(SITE_PREFIX) :], send_body)
+        else:
+            self._serve_document(route, send_body)
+        # Unknown paths share one label so scanners cannot blow up cardinality.
+        label = route if route in INDEX_PATHS or route in (METRICS_PATH, CATALOG_PATH, REACHABILITY_PATH) else "other"
+        if route.startswith(SITE_PREFIX) and self.server.site is not None:
+            label = SITE_PREFIX
+        self.server.requests.inc(route=label, method=self.command, code=self._status)
+        self.server.latency.observe(time.perf_counter() - started, route=label)
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self._status = int(code)
+        super().send_response(code, message)
+
+    def _serve_document(self, route: str, send_body: bool) -> None:
+        if route not in INDEX_PATHS:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        params = parse_qs(urlsplit(self.path).query)
+        if self.server.fragments is not None and any(params.get(name) for name in VIEW_PARAMS):
+            self.server.view_requests.inc()
+            self._serve_view(self.server.fragments, params, send_body)
+            return
+        document = self.server.documents.get()
+        use_gzip = _accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        etag = document.gzip_etag if use_gzip else document.etag
+
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+
+        if document.streamed:
+            self._stream_document(document, use_gzip, etag, send_body)
+            return
+
+        body = document.gzip_body if use_gzip else document.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _serve_view(self, fragments: FragmentStore, params: Dict[str, List[str]], send_body: bool) -> None:
+        sections = [name for value in params.get("section", ()) for name in value.split(",") if name] or None
+        known = fragments.sections
+        unknown = [name for name in sections or () if name not in known]
+        if unknown:
+            self.send_error(HTTPStatus.NOT_FOUND, f"unknown section {unknown[0]!r} (expected one of {', '.join(known)})")
+            return
+        view = fragments.view(sections, params.get("cloud", [""])[-1] or None, params.get("region", [""])[-1] or None)
+        if view is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "nothing in the doc matches this section, cloud and region")
+            return
+        use_gzip = _accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        etag = view.gzip_etag if use_gzip else view.etag
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+        head, tail = PAGE_HEAD.encode("utf-8"), PAGE_TAIL.format(script="").encode("utf-8")
+        if use_gzip:
+            body = _view_gzip(view, head, tail)
+            length = len(body)
+        else:
+            length = len(head) + view.length + len(tail)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(length))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if not send_body:
+            return
+        try:
+            if use_gzip:
+                self.wfile.write(body)
+            else:
+                # Fragments are read from the blob as they are written out.
+                for chunk in (head, *view.iter_body(), tail):
+                    self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _stream_document(self, document: StreamedDocument, use_gzip: bool, etag: str, send_body: bool) -> None:
+        if use_gzip:
+            self._send_gzip_sidecar(document, etag, send_body)
+            return
+        try:
+            handle = document.doc_path.open("r", encoding="utf-8", newline="")
+        except OSError:
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "document is being regenerated")
+            return
+        with handle:
+            # The doc may have been replaced since get(); only claim the
+            # cached ETag for the inode it was computed from.
+            st = os.fstat(handle.fileno())
+            current = self.server.documents.signature == (st.st_mtime_ns, st.st_size, st.st_ino)
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            chunked = self._start_stream()
+            if current:
+                self._send_cache_headers(etag)
+            else:
+                self.send_header("Vary", "Accept-Encoding")
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self._write_body(document.iter_body(handle), chunked)
+
+    def _start_stream(self) -> bool:
+        """Choose chunked encoding, or close-delimited bodies for HTTP/1.0."""
+        if self.request_version != "HTTP/1.0":
+            self.send_header("Transfer-Encoding", "chunked")
+            return True
+        # HTTP/1.0 has no chunked encoding; the body ends at close.
+        self.send_header("Connection", "close")
+        self.close_connection = True
+        return False
+
+    def _write_body(self, chunks: Iterable[bytes], chunked: bool) -> None:
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if chunked:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _send_gzip_sidecar(self, document: StreamedDocument, etag: str, send_body: bool) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(document.gzip_size))
+        self.send_header("Content-Encoding", "gzip")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if not send_body:
+            return
+        try:
+            for chunk in document.iter_gzip():
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _serve_site(self, site: StaticSite, name: str, send_body: bool) -> None:
+        asset = site.get(name)
+        if asset is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        accept = self.headers.get("Accept-Encoding", "")
+        encoding, suffix = next(
+            ((encoding, suffix) for encoding, suffix in SITE_ENCODINGS if encoding in asset.variants and _accepts(accept, (encoding,))),
+            ("identity", ""),
+        )
+        etag = f'"{asset.sha256[:32]}{suffix.replace(".", "-")}"'
+        cache_control = IMMUTABLE if asset.immutable else "no-cache"
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag, cache_control)
+            self.end_headers()
+            return
+        try:
+            handle = (site.directory / asset.variants[encoding]["file"]).open("rb")
+        except OSError:
+            # Removed by a rebuild since the manifest was read.
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        with handle:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(os.fstat(handle.fileno()).st_size))
+            if encoding != "identity":
+                self.send_header("Content-Encoding", encoding)
+            self._send_cache_headers(etag, cache_control)
+            self.end_headers()
+            if not send_body:
+                return
+            try:
+                # Zero-copy from the page cache to the socket.
+                self.connection.sendfile(handle)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+    def _serve_metrics(self, send_body: bool) -> None:
+        body = self.server.metrics.render().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _serve_catalog(self, catalog: Callable[[], Iterable[Dict[str, Any]]], send_body: bool) -> None:
+        # Flows are built from the latest outputs on every request and
+        # written as they are produced; nothing is cached here.
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", EXPORT_CONTENT_TYPES["ndjson"])
+        self.send_header("Cache-Control", "no-store")
+        chunked = self._start_stream()
+        self.end_headers()
+        if send_body:
+            self._write_body((chunk.encode("utf-8") for chunk in iter_export(catalog(), "ndjson")), chunked)
+
+    def _serve_reachability(self, index: ReachabilityIndex, send_body: bool) -> None:
+        params = {key: values[-1] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        try:
+            offset = int(params.get("offset", 0))
+            limit = int(params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST, "offset and limit must be integers")
+            return
+        page = index.query(params.get("cloud"), params.get("region"), params.get("q", ""), offset, limit)
+        payload: Dict[str, Any] = {
+            "total": page.total,
+            "offset": page.offset,
+            "limit": page.limit,
+            "results": [test._asdict() for test in page.results],
+            "next": None,
+        }
+        if page.offset + page.limit < page.total:
+            params.update(offset=str(page.offset + page.limit), limit=str(page.limit))
+            payload["next"] = f"{REACHABILITY_PATH}?{urlencode(params)}"
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _serve_events(self, events: EventBroker) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # No Content-Length: the stream ends when either side hangs up.
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        seen = events.version
+        self.server.event_clients.inc()
+        try:
+            while True:
+                seen, event = events.wait(seen, EVENTS_KEEPALIVE)
+                if event is None:
+                    frame = ": keepalive\n\n"
+                else:
+                    name, data = event
+                    frame = f"event: {name}\ndata: {data}\n\n"
+                self.wfile.write(frame.encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        finally:
+            self.server.event_clients.dec()
+
+    def _send_cache_headers(self, etag: str, cache_control: str = "no-cache") -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        # The doc changes on regeneration, so by default always revalidate (cheap via 304).
+        self.send_header("Cache-Control", cache_control)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
+        return
+
+
+class DocServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        documents: DocumentCache,
+        handler: type = DocRequestHandler,
+        events: Optional[EventBroker] = None,
+        metrics: Optional[Registry] = None,
+        catalog: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None,
+        reachability: Optional[Callable[[], ReachabilityIndex]] = None,
+        site: Optional[StaticSite] = None,
+        fragments: Optional[FragmentStore] = None,
+    ) -> None:
+        self.documents = documents
+        self.events = events
+        # Returns the current catalog flows; /catalog.ndjson is 404 without it.
+        self.catalog = catalog
+        # Returns the index for the current outputs; same for /api/reachability.
+        self.reachability = reachability
+        # The static site build served under /site/, if any.
+        self.site = site
+        # Fragments for filtered views; without them the query is ignored.
+        self.fragments = fragments
+        self.metrics = metrics if metrics is not None else Registry()
+        self.requests = self.metrics.counter(
+            "skyforge_doc_http_requests_total", "HTTP requests by route, method and status", ("route", "method", "code")
+        )
+        self.latency = self.metrics.histogram(
+            "skyforge_doc_http_request_duration_seconds", "Time to serve a request, excluding /events streams", ("route",)
+        )
+        self.event_clients = self.metrics.gauge("skyforge_doc_event_clients", "Open /events connections")
+        self.view_requests = self.metrics.counter(
+            "skyforge_doc_view_requests_total", "Filtered /?section=&cloud=&region= requests, served from fragments"
+        )
+        self.metrics.on_collect(self._collect)
+        super().__init__(server_address, handler)
+
+    def _collect(self) -> None:
+        # Every unfiltered document request does one lookup; only ``loads``
+        # touched the file. Filtered views are the fragment store's.
+        views = int(self.view_requests.total())
+        lookups = int(sum(self.requests.total(route=route) for route in INDEX_PATHS)) - views
+        loads = self.documents.loads
+        observe_cache(self.metrics, "document", max(0, lookups - loads), loads)
+        if self.fragments is not None:
+            builds = self.fragments.builds
+            observe_cache(self.metrics, "fragments", max(0, self.fragments.lookups - builds), builds)
@@ -0,0 +1,272 @@
+"""Static multi-page build of the demo workflow document.
+
+``SiteBuilder`` writes one HTML page per doc section (and the path catalog
+per cloud) plus an index and ``manifest.json``. Every page is written once
+per content change, next to its ``.gz`` variant (and ``.br`` when the
+``brotli`` module is installed), so serving it costs no CPU:
+
+- page files are named after their content hash (``<slug>.<hash>.html``),
+  so an unchanged page is not rewritten or recompressed, and a URL always
+  names the same bytes and can be cached for a year;
+- ``index.html`` links to the hashed names and is the only page that has to
+  be revalidated;
+- the files of the previous build are kept until the next one, so a reader
+  holding the old index still gets its pages.
+
+``StaticSite`` is the server side: it maps request paths to prebuilt files
+from the manifest, reloading it when it changes.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import html
+import json
+import os
+import pathlib
+import re
+import threading
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional: without it only gzip and identity are written
+    brotli = None
+
+MANIFEST = "manifest.json"
+INDEX = "index.html"
+MANIFEST_VERSION = 1
+CHUNK = 64 * 1024
+# Encodings in server preference order, with the suffix of their files.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+HASH_LENGTH = 12
+_SLUG = re.compile(r"[^a-z0-9]+")
+_HASHED = re.compile(r"\.[0-9a-f]{%d}\.html(?:\.gz|\.br)?$" % HASH_LENGTH)
+
+PAGE_TEMPLATE = (
+    '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title></head>\n'
+    '<body><nav><a href="{index}">Contents</a></nav>\n<pre>'
+)
+PAGE_END = "</pre></body></html>\n"
+INDEX_HEAD = '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title></head>\n<body><h1>{title}</h1>\n<ul>\n'
+
+
+def slugify(title: str) -> str:
+    return _SLUG.sub("-", title.lower()).strip("-") or "page"
+
+
+def _compress(source: pathlib.Path, target: pathlib.Path, compressor: Any, finish: Callable[[], bytes]) -> int:
+    tmp = target.with_name(f".{target.name}.tmp{os.getpid()}")
+    with source.open("rb") as src, tmp.open("wb") as out:
+        for block in iter(lambda: src.read(CHUNK), b""):
+            out.write(compressor(block))
+        out.write(finish())
+    os.replace(tmp, target)
+    return target.stat().st_size
+
+
+def _write_variants(path: pathlib.Path) -> Dict[str, Dict[str, Any]]:
+    """Compressed copies of ``path`` beside it; existing ones are content-addressed and kept."""
+    variants = {"identity": {"file": path.name, "bytes": path.stat().st_size}}
+    for encoding, suffix in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        target = path.with_name(path.name + suffix)
+        if target.exists() and _HASHED.search(path.name):
+            size = target.stat().st_size
+        elif encoding == "gzip":
+            # wbits=31 writes a gzip container with mtime 0, so the bytes are stable.
+            gz = zlib.compressobj(9, zlib.DEFLATED, 31)
+            size = _compress(path, target, gz.compress, gz.flush)
+        else:
+            br = brotli.Compressor(quality=11)
+            size = _compress(path, target, br.process, br.finish)
+        variants[encoding] = {"file": target.name, "bytes": size}
+    return variants
+
+
+class _PageWriter:
+    # Streams one page's HTML to a temporary file while hashing it.
+    def __init__(self, directory: pathlib.Path, slug: str, title: str) -> None:
+        self.tmp = directory / f".{slug}.html.tmp{os.getpid()}"
+        self.handle = self.tmp.open("wb")
+        self.digest = hashlib.sha256()
+        self._put(PAGE_TEMPLATE.format(title=html.escape(title), index=INDEX))
+
+    def _put(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        self.handle.write(data)
+
+    def write(self, markdown: str) -> None:
+        self._put(html.escape(markdown, quote=False))
+
+    def close(self) -> str:
+        self._put(PAGE_END)
+        self.handle.close()
+        return self.digest.hexdigest()
+
+
+class SiteBuilder:
+    """Write pages into ``directory`` and, on ``finish``, the index and manifest."""
+
+    def __init__(self, directory: pathlib.Path, title: str, source: Optional[Dict[str, Any]] = None) -> None:
+        self.directory = directory
+        self.title = title
+        self.source = source or {}
+        self.pages: List[Dict[str, Any]] = []
+        self.written = 0
+        self._slugs: Dict[str, int] = {}
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _slug(self, title: str) -> str:
+        slug = slugify(title)
+        count = self._slugs.get(slug, 0) + 1
+        self._slugs[slug] = count
+        return slug if count == 1 else f"{slug}-{count}"
+
+    @contextlib.contextmanager
+    def page(self, title: str, group: Optional[str] = None) -> Iterator[Callable[[str], None]]:
+        """Yield a ``write(markdown)`` for one page; the page is installed when the block exits."""
+        slug = self._slug(title)
+        writer = _PageWriter(self.directory, slug, f"{title} – {self.title}")
+        # Pages are listed in the order they were opened, even when several
+        # are written at once.
+        position = len(self.pages)
+        self.pages.append({})
+        try:
+            yield writer.write
+        except BaseException:
+            writer.handle.close()
+            writer.tmp.unlink(missing_ok=True)
+            raise
+        sha256 = writer.close()
+        path = self.directory / f"{slug}.{sha256[:HASH_LENGTH]}.html"
+        if path.exists():
+            writer.tmp.unlink()
+        else:
+            os.replace(writer.tmp, path)
+            self.written += 1
+        self.pages[position] = {
+            "slug": slug,
+            "title": title,
+            "group": group,
+            "sha256": sha256,
+            "variants": _write_variants(path),
+        }
+
+    def _write_index(self) -> Dict[str, Any]:
+        lines = [INDEX_HEAD.format(title=html.escape(self.title))]
+        # Pages with a group are listed under the ungrouped page before them.
+        item = nested = False
+        for page in self.pages:
+            href = html.escape(page["variants"]["identity"]["file"])
+            link = f'<a href="{href}">{html.escape(page["title"])}</a>'
+            if page["group"] is not None and item:
+                if not nested:
+                    lines.append("\n<ul>\n")
+                    nested = True
+                lines.append(f"<li>{link}</li>\n")
+                continue
+            if nested:
+                lines.append("</ul>")
+                nested = False
+            if item:
+                lines.append("</li>\n")
+            lines.append(f"<li>{link}")
+            item = True
+        if nested:
+            lines.append("</ul>")
+        if item:
+            lines.append("</li>\n")
+        lines.append("</ul></body></html>\n")
+        body = "".join(lines).encode("utf-8")
+        path = self.directory / INDEX
+        tmp = path.with_name(f".{INDEX}.tmp{os.getpid()}")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        return {"sha256": hashlib.sha256(body).hexdigest(), "variants": _write_variants(path)}
+
+    def finish(self) -> Dict[str, Any]:
+        """Write the index and manifest, then drop files neither this build nor the last one uses."""
+        manifest_path = self.directory / MANIFEST
+        previous = load_manifest(manifest_path)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "title": self.title,
+            "source": self.source,
+            "index": self._write_index(),
+            "pages": self.pages,
+        }
+        tmp = manifest_path.with_name(f".{MANIFEST}.tmp{os.getpid()}")
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, manifest_path)
+        keep = _files(manifest) | _files(previous)
+        for path in self.directory.iterdir():
+            if _HASHED.search(path.name) and path.name not in keep:
+                path.unlink(missing_ok=True)
+        return manifest
+
+
+def _files(manifest: Optional[Dict[str, Any]]) -> set:
+    if not manifest:
+        return set()
+    return {variant["file"] for page in manifest.get("pages", ()) for variant in page["variants"].values()}
+
+
+def load_manifest(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and manifest.get("version") == MANIFEST_VERSION else None
+
+
+class Asset(NamedTuple):
+    """A prebuilt page: its variants by encoding and whether the URL names fixed content."""
+
+    sha256: str
+    variants: Dict[str, Dict[str, Any]]
+    immutable: bool
+
+
+class StaticSite:
+    """Request path (relative to the site root) to prebuilt files, from ``manifest.json``."""
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._routes: Dict[str, Asset] = {}
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.directory / MANIFEST)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def routes(self) -> Dict[str, Asset]:
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return self._routes
+        with self._lock:
+            if signature != self._signature:
+                manifest = load_manifest(self.directory / MANIFEST) or {}
+                routes: Dict[str, Asset] = {}
+                index = manifest.get("index")
+                if index:
+                    routes[""] = routes[INDEX] = Asset(index["sha256"], index["variants"], False)
+                for page in manifest.get("pages", ()):
+                    variants = page["variants"]
+                    routes[variants["identity"]["file"]] = Asset(page["sha256"], variants, True)
+                    # The stable name always serves the current build.
+                    routes[f"{page['slug']}.html"] = Asset(page["sha256"], variants, False)
+                self._routes = routes
+                self._signature = signature
+            return self._routes
+
+    def get(self, name: str) -> Optional[Asset]:
+        return self.routes().get(name)
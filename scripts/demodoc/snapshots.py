@@ -0,0 +1,353 @@
+"""Content-addressed history of Terraform outputs.
+
+Every outputs payload is stored as a Merkle tree. Each object or array is
+encoded canonically, hashed with SHA-256 and written once under
+``objects/<2 hex>/<62 hex>`` (zlib-compressed, owner-only), with children
+referenced by hash. Subtrees under ``LEAF_LIMIT`` bytes are stored whole
+as one leaf, and ones under ``INLINE_LIMIT`` stay inline in their parent,
+so the store holds a few thousand files rather than one per value. A new
+snapshot only writes the nodes on the paths that changed, so thousands of
+near-identical snapshots share almost all of their storage.
+
+Snapshots are recorded per stream (the default doc, or one per batch
+target) as JSON lines in ``streams/<name>.jsonl``. Each record carries a
+digest of the whole canonical payload and a summary of its changes since
+the record before it, so re-saving unchanged outputs costs one
+``json.dumps``: no tree walk and no diff.
+
+``diff`` compares two trees by hash. Equal children are skipped without
+being read, so the cost is proportional to what changed rather than to
+the size of the outputs.
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import json
+import os
+import pathlib
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# Containers that encode to less than this stay inline in their parent.
+INLINE_LIMIT = 256
+# Containers up to this size are stored as one leaf node and diffed in memory.
+LEAF_LIMIT = 8 * 1024
+DEFAULT_STREAM = "default"
+# Changes kept in each record for the doc; ``diff`` lists all of them.
+CHANGES_LIMIT = 25
+# Decoded nodes kept in memory between diffs.
+NODE_CACHE_SIZE = 4096
+# Values under keys like these are never printed in a diff.
+SECRET_KEYS = re.compile(r"password|secret|psk|pre_shared|private_key|token|shared_key", re.IGNORECASE)
+_STREAM_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+# A child is (0, literal value) or (1, hash of a stored node).
+Entry = Tuple[int, Any]
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot reference cannot be resolved or read."""
+
+
+class Change(NamedTuple):
+    path: Tuple[str, ...]
+    kind: str  # "added", "removed" or "changed"
+    old: Optional[str]
+    new: Optional[str]
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _display(path: Tuple[str, ...], value: Any) -> str:
+    if isinstance(value, dict):
+        return f"{{{len(value)} key{'s' if len(value) != 1 else ''}}}"
+    if isinstance(value, list):
+        return f"[{len(value)} item{'s' if len(value) != 1 else ''}]"
+    if any(SECRET_KEYS.search(part) for part in path):
+        return "(redacted)"
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= 120 else text[:117] + "…"
+
+
+def type_block(path: Tuple[str, ...]) -> bool:
+    """True for an output's ``type`` description, which moves with every value change."""
+    return len(path) == 2 and path[1] == "type"
+
+
+class SnapshotStore:
+    """Deduplicated snapshot objects plus one JSON-lines history per stream."""
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = directory
+        self.objects = directory / "objects"
+        self.streams = directory / "streams"
+        self.written = 0
+        self._known: Set[str] = set()
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        # (outputs object, stream, summary) of the last record() call.
+        self._recorded: Optional[Tuple[Any, str, Dict[str, Any]]] = None
+
+    # -- writing ---------------------------------------------------------
+
+    def _object_path(self, digest: str) -> pathlib.Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def _write(self, digest: str, data: bytes) -> None:
+        if digest in self._known:
+            return
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(zlib.compress(data, 6))
+            os.replace(tmp, path)
+            self.written += 1
+        self._known.add(digest)
+
+    def _store(self, value: Any, data: Optional[bytes] = None, inline: bool = True) -> Entry:
+        if not isinstance(value, (dict, list)):
+            return (0, value)
+        if data is None:
+            data = _canonical(value)
+        if inline and len(data) < INLINE_LIMIT:
+            return (0, value)
+        if len(data) <= LEAF_LIMIT:
+            # Canonical {"v": value}, without encoding the value twice.
+            node = b'{"v":' + data + b"}"
+        elif isinstance(value, dict):
+            node = _canonical({"d": [[str(key), self._store(item)] for key, item in sorted(value.items())]})
+        else:
+            node = _canonical({"l": [self._store(item) for item in value]})
+        digest = hashlib.sha256(node).hexdigest()
+        self._write(digest, node)
+        return (1, digest)
+
+    def put(self, value: Dict[str, Any], data: Optional[bytes] = None) -> str:
+        """Store ``value`` and return its root hash."""
+        self.objects.mkdir(parents=True, exist_ok=True)
+        # Outputs include credentials and PSKs; keep the store owner-only.
+        os.chmod(self.directory, 0o700)
+        return self._store(value, data, inline=False)[1]
+
+    def _log(self, stream: str) -> pathlib.Path:
+        return self.streams / f"{_STREAM_NAME.sub('_', stream)}.jsonl"
+
+    def history(self, stream: str = DEFAULT_STREAM) -> List[Dict[str, Any]]:
+        try:
+            with self._log(stream).open("r", encoding="utf-8") as handle:
+                lines = handle.readlines()
+        except OSError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and isinstance(record.get("id"), str):
+                records.append(record)
+        return records
+
+    def save(self, outputs: Dict[str, Any], stream: str = DEFAULT_STREAM) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Store ``outputs``; return the stream's latest record and its history.
+
+        A payload identical to the latest snapshot adds no record. A new
+        record holds its change ``count`` against the previous snapshot and
+        the first ``CHANGES_LIMIT`` changes as ``(path, kind, old, new)``.
+        """
+        data = _canonical(outputs)
+        digest = hashlib.sha256(data).hexdigest()
+        history = self.history(stream)
+        if history and history[-1].get("digest") == digest:
+            return history[-1], history
+        root = self.put(outputs, data)
+        record: Dict[str, Any] = {"id": root, "digest": digest, "at": _dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")}
+        if history:
+            changes: List[List[Any]] = []
+            count = 0
+            for change in self.diff(history[-1]["id"], root):
+                count += 1
+                if len(changes) < CHANGES_LIMIT:
+                    changes.append([list(change.path), change.kind, change.old, change.new])
+            record.update(count=count, changes=changes)
+        self.streams.mkdir(parents=True, exist_ok=True)
+        with self._log(stream).open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+        history.append(record)
+        return record, history
+
+    def record(self, outputs: Dict[str, Any], stream: str = DEFAULT_STREAM) -> Dict[str, Any]:
+        """Save ``outputs`` and summarise what changed since the stream's previous snapshot.
+
+        The summary is plain data (it becomes a doc section input):
+        ``current``/``previous`` as ``{id, at}``, the snapshot count and the
+        latest record's ``count`` and ``changes``.
+        """
+        cached = self._recorded
+        if cached is not None and cached[0] is outputs and cached[1] == stream:
+            return cached[2]
+        current, history = self.save(outputs, stream)
+        previous = history[-2] if len(history) > 1 else None
+        summary = {
+            "stream": stream,
+            "current": {"id": current["id"], "at": current["at"]},
+            "previous": {"id": previous["id"], "at": previous["at"]} if previous is not None else None,
+            "snapshots": len(history),
+            "count": current.get("count", 0),
+            "changes": current.get("changes", []),
+        }
+        self._recorded = (outputs, stream, summary)
+        return summary
+
+    # -- reading ---------------------------------------------------------
+
+    def _node(self, digest: str) -> Dict[str, Any]:
+        node = self._nodes.get(digest)
+        if node is not None:
+            return node
+        try:
+            node = json.loads(zlib.decompress(self._object_path(digest).read_bytes()))
+        except (OSError, zlib.error, json.JSONDecodeError) as exc:
+            raise SnapshotError(f"snapshot object {digest[:12]} is missing or corrupt: {exc}") from exc
+        if len(self._nodes) >= NODE_CACHE_SIZE:
+            self._nodes.clear()
+        self._nodes[digest] = node
+        return node
+
+    def _shape(self, entry: Entry) -> Tuple[str, Any]:
+        # ("dict", {key: entry}) / ("list", [entry]) / ("scalar", value)
+        flag, payload = entry
+        if flag == 1:
+            node = self._node(payload)
+            if "d" in node:
+                return "dict", {key: tuple(child) for key, child in node["d"]}
+            if "l" in node:
+                return "list", [tuple(child) for child in node["l"]]
+            return self._shape((0, node["v"]))
+        if isinstance(payload, dict):
+            return "dict", {str(key): (0, item) for key, item in payload.items()}
+        if isinstance(payload, list):
+            return "list", [(0, item) for item in payload]
+        return "scalar", payload
+
+    def _summary(self, path: Tuple[str, ...], entry: Entry) -> str:
+        return _display(path, self._shape(entry)[1])
+
+    def load(self, root: str) -> Any:
+        """Materialise the snapshot ``root``."""
+        return self._value((1, root))
+
+    def _value(self, entry: Entry) -> Any:
+        shape, payload = self._shape(entry)
+        if shape == "dict":
+            return {key: self._value(child) for key, child in payload.items()}
+        if shape == "list":
+            return [self._value(child) for child in payload]
+        return payload
+
+    def diff(self, old_root: str, new_root: str, prune: Callable[[Tuple[str, ...]], bool] = type_block) -> Iterator[Change]:
+        """Yield changes from ``old_root`` to ``new_root`` in key order, skipping pruned paths."""
+        yield from self._diff((), (1, old_root), (1, new_root), prune)
+
+    def _diff(
+        self,
+        path: Tuple[str, ...],
+        old: Entry,
+        new: Entry,
+        prune: Callable[[Tuple[str, ...]], bool],
+    ) -> Iterator[Change]:
+        if old == new or prune(path):
+            # Same hash, or the same inline literal: nothing below differs.
+            return
+        old_shape, old_payload = self._shape(old)
+        new_shape, new_payload = self._shape(new)
+        if old_shape == new_shape == "dict":
+            for key in sorted(old_payload.keys() | new_payload.keys()):
+                child = (*path, key)
+                if key not in new_payload:
+                    yield Change(child, "removed", self._summary(child, old_payload[key]), None)
+                elif key not in old_payload:
+                    yield Change(child, "added", None, self._summary(child, new_payload[key]))
+                else:
+                    yield from self._diff(child, old_payload[key], new_payload[key], prune)
+        elif old_shape == new_shape == "list":
+            for index in range(max(len(old_payload), len(new_payload))):
+                child = (*path, str(index))
+                if index >= len(new_payload):
+                    yield Change(child, "removed", self._summary(child, old_payload[index]), None)
+                elif index >= len(old_payload):
+                    yield Change(child, "added", None, self._summary(child, new_payload[index]))
+                else:
+                    yield from self._diff(child, old_payload[index], new_payload[index], prune)
+        elif old_shape == new_shape == "scalar" and old_payload == new_payload:
+            return
+        else:
+            yield Change(path, "changed", self._summary(path, old), self._summary(path, new))
+
+    def resolve(self, ref: str) -> Tuple[str, Dict[str, Any]]:
+        """``(stream, record)`` for ``[stream:]latest|previous|<index>|<hash prefix>``."""
+        stream, _, name = ref.rpartition(":")
+        stream = stream or DEFAULT_STREAM
+        history = self.history(stream)
+        if not history:
+            raise SnapshotError(f"no snapshots recorded for {stream!r}")
+        if name in ("", "latest"):
+            return stream, history[-1]
+        if name == "previous":
+            if len(history) < 2:
+                raise SnapshotError(f"{stream!r} has only one snapshot")
+            return stream, history[-2]
+        matches = {record["id"]: record for record in history if record["id"].startswith(name)}
+        if len(name) >= 4 and len(matches) == 1:
+            return stream, next(iter(matches.values()))
+        if re.fullmatch(r"-?\d+", name):
+            try:
+                return stream, history[int(name)]
+            except IndexError:
+                raise SnapshotError(f"{stream!r} has {len(history)} snapshots; no index {name}") from None
+        found = "more than one" if len(name) >= 4 and matches else "no"
+        raise SnapshotError(f"{found} snapshot in {stream!r} matches {name!r}")
+
+
+def format_path(path: Tuple[str, ...]) -> str:
+    # Outputs are {"value": ..., "type": ..., "sensitive": ...}; show the
+    # output name followed by the path inside its value.
+    if len(path) >= 2 and path[1] == "value":
+        path = (path[0], *path[2:])
+    return ".".join(path)
+
+
+def format_change(change: Change) -> str:
+    path = format_path(change.path)
+    if change.kind == "added":
+        return f"added `{path}` = `{change.new}`"
+    if change.kind == "removed":
+        return f"removed `{path}` (was `{change.old}`)"
+    return f"`{path}`: `{change.old}` → `{change.new}`"
+
+
+def render_changes(summary: Optional[Dict[str, Any]]) -> Iterator[str]:
+    """Markdown lines for the doc's "what changed" section."""
+    if not summary:
+        yield "No outputs snapshot for this run (outputs unavailable or `--no-cache`)."
+        return
+    current, previous = summary["current"], summary["previous"]
+    if previous is None:
+        yield f"First recorded snapshot (`{current['id'][:12]}`, {current['at']}); changes show up from the next deployment."
+        return
+    count = summary["count"]
+    yield (
+        f"Snapshot `{current['id'][:12]}` ({current['at']}) against `{previous['id'][:12]}` ({previous['at']}): "
+        f"{count} change{'s' if count != 1 else ''}."
+    )
+    for path, kind, old, new in summary["changes"]:
+        yield f"- {format_change(Change(tuple(path), kind, old, new))}"
+    if count > len(summary["changes"]):
+        yield f"- … {count - len(summary['changes'])} more (`./scripts/generate_demo_doc.py --diff`)"
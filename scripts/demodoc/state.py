@@ -0,0 +1,183 @@
+"""Read Terraform outputs straight from a state file, with an on-disk cache.
+
+A local ``terraform.tfstate`` (or the result of ``terraform state pull``)
+already carries the ``outputs`` block that ``terraform output -json`` prints,
+so the doc generator can skip the terraform subprocess entirely. Parsed
+outputs are cached under a key built from the state lineage, serial and a
+content hash, so repeat runs against an unchanged state never re-parse it.
+The cache also remembers each state's key against its stat signature, so
+the content is only hashed again once the file has been written.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from . import jsonstream
+
+HEADER_BYTES = 4096
+HASH_CHUNK = 1 << 20
+# Fingerprints by state path and stat signature, next to the cached outputs.
+FINGERPRINTS = "fingerprints.json"
+
+_SERIAL_RE = re.compile(rb'"serial"\s*:\s*(\d+)')
+_LINEAGE_RE = re.compile(rb'"lineage"\s*:\s*"([^"]*)"')
+
+
+class StateError(Exception):
+    """Raised when a state file cannot be read or lacks an outputs block."""
+
+
+def default_state_path(root: pathlib.Path, workspace: Optional[str] = None) -> Optional[pathlib.Path]:
+    """Return the local state for ``workspace`` (default: the selected one), if any."""
+    workspace = workspace or os.environ.get("TF_WORKSPACE")
+    if not workspace:
+        env_file = root / ".terraform" / "environment"
+        try:
+            workspace = env_file.read_text(encoding="utf-8").strip()
+        except OSError:
+            workspace = ""
+    if workspace and workspace != "default":
+        candidate = root / "terraform.tfstate.d" / workspace / "terraform.tfstate"
+    else:
+        candidate = root / "terraform.tfstate"
+    return candidate if candidate.is_file() else None
+
+
+def _stat_signature(path: pathlib.Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def fingerprint(state_path: pathlib.Path) -> str:
+    """Return ``<lineage>-<serial>-<sha256>`` for ``state_path``.
+
+    Lineage and serial come from the file header, which Terraform always
+    writes ahead of ``outputs`` and ``resources``; the hash covers the whole
+    file so hand-edited or pulled copies with a stale serial still miss.
+    """
+    digest = hashlib.sha256()
+    try:
+        with state_path.open("rb") as handle:
+            header = handle.read(HEADER_BYTES)
+            digest.update(header)
+            for chunk in iter(lambda: handle.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+    except OSError as exc:
+        raise StateError(f"Failed to read {state_path}: {exc}") from exc
+
+    serial = _SERIAL_RE.search(header)
+    lineage = _LINEAGE_RE.search(header)
+    serial_part = serial.group(1).decode("ascii") if serial else "noserial"
+    lineage_part = lineage.group(1).decode("ascii", "replace") if lineage else "nolineage"
+    lineage_part = re.sub(r"[^A-Za-z0-9_.-]", "_", lineage_part)
+    return f"{lineage_part}-{serial_part}-{digest.hexdigest()}"
+
+
+def read_state_outputs(
+    state_path: pathlib.Path, keys: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """Return the ``outputs`` block of a Terraform state file.
+
+    The block has the same ``{"value": ..., "type": ...}`` shape per output as
+    ``terraform output -json``, so callers can treat both interchangeably.
+    When ``keys`` is given only those outputs are decoded; the state is
+    streamed and reading stops at the end of the outputs block.
+    """
+    try:
+        with state_path.open("rb") as handle:
+            return jsonstream.select(handle, keys, path=("outputs",))
+    except OSError as exc:
+        raise StateError(f"Failed to read {state_path}: {exc}") from exc
+    except jsonstream.JSONStreamError as exc:
+        raise StateError(f"Failed to decode {state_path}: {exc}") from exc
+
+
+class OutputsCache:
+    """Directory of parsed outputs keyed by state fingerprint."""
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints: Optional[Dict[str, Any]] = None
+
+    def _entry(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}.json"
+
+    def fingerprint(self, state_path: pathlib.Path) -> str:
+        """``fingerprint(state_path)``, hashed again only when the file's stat signature moves."""
+        if self._fingerprints is None:
+            try:
+                with (self.directory / FINGERPRINTS).open("r", encoding="utf-8") as handle:
+                    stored = json.load(handle)
+            except (OSError, json.JSONDecodeError):
+                stored = None
+            self._fingerprints = stored if isinstance(stored, dict) else {}
+        name = str(state_path.resolve())
+        signature = _stat_signature(state_path)
+        known = self._fingerprints.get(name)
+        if signature is not None and isinstance(known, list) and len(known) == 2 and tuple(known[0]) == signature:
+            return known[1]
+        key = fingerprint(state_path)
+        # Only a file left alone while it was hashed is recorded under its signature.
+        if signature is not None and _stat_signature(state_path) == signature:
+            self._fingerprints[name] = [list(signature), key]
+            self._write(self.directory / FINGERPRINTS, dict(self._fingerprints))
+        return key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._entry(key).open("r", encoding="utf-8") as handle:
+                cached = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return cached if isinstance(cached, dict) else None
+
+    def put(self, key: str, outputs: Dict[str, Any]) -> None:
+        self._write(self._entry(key), outputs)
+
+    def _write(self, entry: pathlib.Path, value: Any) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Outputs include credentials and PSKs; keep the cache owner-only.
+            os.chmod(self.directory, 0o700)
+            tmp = entry.with_suffix(f".tmp{os.getpid()}")
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(value, handle, separators=(",", ":"))
+            os.replace(tmp, entry)
+        except OSError:
+            # The cache is an optimisation; a read-only checkout still works.
+            return
+
+
+def load_state_outputs(
+    state_path: pathlib.Path,
+    cache: Optional[OutputsCache] = None,
+    keys: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """Return outputs for ``state_path``, consulting ``cache`` first."""
+    wanted = sorted(set(keys)) if keys is not None else None
+    if cache is None:
+        return read_state_outputs(state_path, wanted)
+    key = cache.fingerprint(state_path)
+    if wanted is not None:
+        selection = hashlib.sha256("\0".join(wanted).encode("utf-8")).hexdigest()[:12]
+        key = f"{key}-{selection}"
+    cached = cache.get(key)
+    if cached is not None:
+        cache.hits += 1
+        return cached
+    cache.misses += 1
+    outputs = read_state_outputs(state_path, wanted)
+    cache.put(key, outputs)
+    return outputs
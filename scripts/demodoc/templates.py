@@ -0,0 +1,303 @@
+"""Document templates compiled to Python code objects and cached on disk.
+
+A template is plain text with three kinds of tags:
+
+- ``{{ name }}`` or ``{{ name.attr }}`` writes a value; a value that is a
+  callable (a doc section) is called and its chunks are streamed;
+- ``{% for item in name %}`` / ``{% for key, value in name %}`` ...
+  ``{% endfor %}`` loops over a list or a mapping (``loop.index``,
+  ``loop.first`` and ``loop.last`` are set inside), and ``{% if [not] name %}``
+  ... ``{% elif ... %}`` ... ``{% else %}`` ... ``{% endif %}`` branches;
+- ``{# ... #}`` is a comment.
+
+A ``{% %}`` or ``{# #}`` tag alone on its line takes the whole line with
+it, so block tags do not leave blank lines behind. Expressions are names
+and attribute lookups only; a template cannot run arbitrary code.
+
+``load`` compiles a template into one generator function and keeps its
+marshalled code object under the cache directory, named after the hash of
+the template text. Loading an unchanged template again is a ``marshal``
+load, and rendering is the generator filling its slots.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import pathlib
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Bump when the generated code changes so cached code objects are rebuilt.
+ENGINE_VERSION = 1
+_TAG = re.compile(r"\{\{(.*?)\}\}|\{%(.*?)%\}|\{#.*?#\}", re.DOTALL)
+_EXPR = re.compile(r"^(not\s+)?([A-Za-z_]\w*)((?:\.\w+)*)$")
+_FOR = re.compile(r"^for\s+([A-Za-z_]\w*)(?:\s*,\s*([A-Za-z_]\w*))?\s+in\s+(.+)$")
+_IF = re.compile(r"^(if|elif)\s+(.+)$")
+
+
+class TemplateError(ValueError):
+    """Raised for a template that does not parse, or that names a value the doc does not have."""
+
+
+class Loop:
+    """``loop`` inside a ``{% for %}`` block."""
+
+    __slots__ = ("index", "length")
+
+    def __init__(self, index: int, length: int) -> None:
+        self.index = index
+        self.length = length
+
+    @property
+    def first(self) -> bool:
+        return self.index == 1
+
+    @property
+    def last(self) -> bool:
+        return self.index == self.length
+
+
+class _Compiler:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.code: List[str] = ["def render(_scope, _get, _attr, _emit, _iterate):"]
+        self.depth = 1
+        # (tag, line, local names) for each open block; an ``if`` past its
+        # ``else`` is tagged "else".
+        self.blocks: List[Tuple[str, int, Dict[str, str]]] = []
+        self.names: Dict[str, int] = {}
+        self.loops = 0
+
+    def error(self, line: int, message: str) -> TemplateError:
+        return TemplateError(f"{self.name}:{line}: {message}")
+
+    def emit(self, statement: str) -> None:
+        self.code.append("    " * self.depth + statement)
+
+    def local(self, name: str) -> Optional[str]:
+        for _, _, names in reversed(self.blocks):
+            if name in names:
+                return names[name]
+        return None
+
+    def expression(self, text: str, line: int) -> str:
+        match = _EXPR.match(text.strip())
+        if match is None:
+            raise self.error(line, f"expected a name or name.attr, got {text.strip()!r}")
+        negate, name, attrs = match.groups()
+        code = self.local(name)
+        if code is None:
+            self.names.setdefault(name, line)
+            code = f"_get(_scope, {name!r}, {line})"
+        for attr in attrs.split(".")[1:]:
+            code = f"_attr({code}, {attr!r}, {line})"
+        return f"(not {code})" if negate else code
+
+    def statement(self, text: str, line: int) -> None:
+        text = text.strip()
+        keyword = text.split(None, 1)[0] if text else ""
+        if keyword == "for":
+            match = _FOR.match(text)
+            if match is None:
+                raise self.error(line, f"expected 'for item in name' or 'for key, value in name', got {text!r}")
+            first, second, source = match.groups()
+            iterable = self.expression(source, line)
+            self.loops += 1
+            loop = f"_loop{self.loops}"
+            names = {"loop": loop, first: f"_{first}{self.loops}"}
+            if second:
+                names[second] = f"_{second}{self.loops}"
+                target = f"({names[first]}, {names[second]})"
+            else:
+                target = names[first]
+            self.emit(f"for {loop}, {target} in _iterate({iterable}, {2 if second else 1}):")
+            self.blocks.append(("for", line, names))
+            self.depth += 1
+            self.emit("pass")
+        elif keyword in ("if", "elif"):
+            match = _IF.match(text)
+            if match is None:
+                raise self.error(line, f"expected '{keyword} name', got {text!r}")
+            if keyword == "elif":
+                self.close("if", line, keep_open=True)
+            self.emit(f"{keyword} {self.expression(match.group(2), line)}:")
+            if keyword == "if":
+                self.blocks.append(("if", line, {}))
+            self.depth += 1
+            self.emit("pass")
+        elif text == "else":
+            self.close("if", line, keep_open=True)
+            # The block stays open as "else" so a second else or elif is refused.
+            _, start, names = self.blocks.pop()
+            self.blocks.append(("else", start, names))
+            self.emit("else:")
+            self.depth += 1
+            self.emit("pass")
+        elif text in ("endfor", "endif"):
+            self.close(text[3:], line)
+        else:
+            raise self.error(line, f"unknown tag {{% {text} %}}")
+
+    def close(self, tag: str, line: int, keep_open: bool = False) -> None:
+        if keep_open and self.blocks and self.blocks[-1][0] == "else":
+            raise self.error(line, f"'if' block from line {self.blocks[-1][1]} already has its 'else'")
+        if not self.blocks or self.blocks[-1][0] not in ((tag, "else") if tag == "if" else (tag,)):
+            raise self.error(line, f"'{tag}' block closed here is not open")
+        self.depth -= 1
+        if not keep_open:
+            self.blocks.pop()
+
+    def finish(self) -> str:
+        if self.blocks:
+            tag, line, _ = self.blocks[-1]
+            raise self.error(line, f"'{'if' if tag == 'else' else tag}' block is never closed")
+        self.emit("return")
+        self.emit("yield")
+        return "\n".join(self.code) + "\n"
+
+
+def translate(source: str, name: str = "<template>") -> Tuple[str, Dict[str, int]]:
+    """Python source of the template's generator function, and the names it reads (with their first line)."""
+    compiler = _Compiler(name)
+    position = 0
+    for match in _TAG.finditer(source):
+        start, end = match.start(), match.end()
+        line = source.count("\n", 0, start) + 1
+        is_value = match.group(1) is not None
+        if not is_value:
+            # A block tag or comment alone on its line removes the line.
+            line_start = source.rfind("\n", 0, start) + 1
+            line_end = source.find("\n", end)
+            line_end = len(source) if line_end == -1 else line_end + 1
+            if line_start >= position and not source[line_start:start].strip() and not source[end:line_end].strip():
+                start, end = line_start, line_end
+        if start > position:
+            compiler.emit(f"yield {source[position:start]!r}")
+        if is_value:
+            compiler.emit(f"yield from _emit({compiler.expression(match.group(1), line)})")
+        elif match.group(2) is not None:
+            compiler.statement(match.group(2), line)
+        position = end
+    if position < len(source):
+        compiler.emit(f"yield {source[position:]!r}")
+    return compiler.finish(), compiler.names
+
+
+def _emit(value: Any) -> Iterable[str]:
+    if value is None:
+        return ()
+    if callable(value):
+        # A section: its text, or its chunks as they are produced.
+        chunks = value()
+        return (chunks,) if isinstance(chunks, str) else chunks
+    return (value if isinstance(value, str) else str(value),)
+
+
+def _iterate(value: Any, arity: int) -> Iterator[Tuple[Loop, Any]]:
+    items = list(value.items() if arity == 2 and isinstance(value, dict) else value or ())
+    for index, item in enumerate(items, 1):
+        yield Loop(index, len(items)), item
+
+
+class Template:
+    """A compiled template; ``render`` yields the text as chunks."""
+
+    def __init__(self, name: str, code: Any, names: Dict[str, int]) -> None:
+        self.name = name
+        self.names = names
+        namespace: Dict[str, Any] = {}
+        exec(code, namespace)
+        self._render: Callable[..., Iterator[str]] = namespace["render"]
+
+    def _get(self, scope: Dict[str, Any], name: str, line: int) -> Any:
+        try:
+            return scope[name]
+        except KeyError:
+            raise TemplateError(f"{self.name}:{line}: no value named {name!r}") from None
+
+    def _attr(self, value: Any, attr: str, line: int) -> Any:
+        if isinstance(value, dict):
+            if attr in value:
+                return value[attr]
+        elif hasattr(value, attr):
+            return getattr(value, attr)
+        raise TemplateError(f"{self.name}:{line}: {type(value).__name__} has no {attr!r}")
+
+    def check(self, scope: Dict[str, Any]) -> None:
+        """Raise ``TemplateError`` for the first name the template reads that ``scope`` lacks."""
+        for name, line in sorted(self.names.items(), key=lambda item: item[1]):
+            if name not in scope:
+                raise TemplateError(f"{self.name}:{line}: no value named {name!r}")
+
+    def render(self, scope: Dict[str, Any]) -> Iterator[str]:
+        return self._render(scope, self._get, self._attr, _emit, _iterate)
+
+
+def _compile(python: str, name: str) -> Any:
+    try:
+        return compile(python, name, "exec")
+    except SyntaxError as exc:
+        # translate() should only produce valid Python; report it against
+        # the template rather than the generated line.
+        raise TemplateError(f"{name}: template does not compile: {exc.msg}") from exc
+
+
+def compile_template(source: str, name: str = "<template>") -> Template:
+    python, names = translate(source, name)
+    return Template(name, _compile(python, name), names)
+
+
+def _cache_key(source: bytes) -> str:
+    # Code objects are specific to the interpreter's bytecode version.
+    digest = hashlib.sha256(b"%d:" % ENGINE_VERSION + importlib.util.MAGIC_NUMBER + source)
+    return digest.hexdigest()[:32]
+
+
+_loaded: Dict[pathlib.Path, Tuple[Tuple[int, int, int], Template]] = {}
+_lock = threading.Lock()
+
+
+def load(path: pathlib.Path, cache_dir: Optional[pathlib.Path] = None) -> Template:
+    """The compiled template at ``path``, from memory, then ``cache_dir``, compiling it only when its text is new."""
+    try:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        source = path.read_bytes()
+    except OSError as exc:
+        raise TemplateError(f"cannot read template {path}: {exc.strerror or exc}") from exc
+    name = str(path)
+    key = _cache_key(source)
+    template = None
+    if cache_dir is not None:
+        try:
+            names, code = marshal.loads((cache_dir / f"{key}.marshal").read_bytes())
+            template = Template(name, code, names)
+        except (OSError, ValueError, EOFError, TypeError):
+            template = None
+    if template is None:
+        try:
+            text = source.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise TemplateError(f"template {path} is not UTF-8: {exc}") from exc
+        python, names = translate(text, name)
+        code = _compile(python, name)
+        template = Template(name, code, names)
+        if cache_dir is not None:
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                target = cache_dir / f"{key}.marshal"
+                tmp = target.with_name(f".{target.name}.tmp{os.getpid()}")
+                tmp.write_bytes(marshal.dumps((names, code)))
+                os.replace(tmp, target)
+            except OSError:
+                pass
+    with _lock:
+        _loaded[path] = (signature, template)
+    return template
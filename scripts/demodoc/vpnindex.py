@@ -0,0 +1,364 @@
+"""Memory-mapped lookup index for the VPN endpoint manifest.
+
+``outputs/vpn-endpoints.json`` carries PSKs, tunnel metadata and on-prem
+site entries for every mesh and VNF link, and finding one tunnel in it
+means parsing the whole file. ``compile_index`` turns the manifest into a
+binary file with one record per key:
+
+- ``tunnel``: a cloud link tunnel id (``aws-us-east-1-to-azure-uswest2-a``)
+  with its tunnel entry and link id;
+- ``link``: a cloud link id with its ends, BGP ASNs, tunnel ids and
+  deployed status (PSKs included), stored once for all of its tunnels;
+- ``site``: a VNF site with its manifest entry and links;
+- ``hub``: a hub_id with the links, tunnels and sites attached to it.
+
+The file is a header, an open-addressed hash table of fixed-size slots and
+the records as compact JSON, each stored after its key::
+
+    header   magic, version, record count, slot count, manifest stat signature
+    slots    (key hash, offset, key length, record length) * slot count
+    data     key bytes + record bytes, back to back
+
+``VpnIndex`` maps the file read-only: a lookup hashes the key, probes a
+slot or two and returns the record bytes as a ``memoryview`` of the
+mapping, so nothing is parsed and every process reading the index shares
+the same page cache. Compiles write a new file and rename it into place,
+so open readers keep the version they mapped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+DEFAULT_MANIFEST = REPO_ROOT / "outputs" / "vpn-endpoints.json"
+KINDS = ("tunnel", "link", "site", "hub")
+MAGIC = b"SKYVPNIX"
+# Bump when the layout or the record shapes change; older files are recompiled.
+VERSION = 1
+# magic, version, records, slots, manifest size, mtime_ns, inode
+HEADER = struct.Struct("<8sIIQQqQ")
+# key hash, data offset, key length, record length
+SLOT = struct.Struct("<QQII")
+# Slots per record, rounded up to a power of two; probes stay short.
+LOAD_FACTOR = 2
+MIN_SLOTS = 8
+
+
+class VpnIndexError(ValueError):
+    """Raised for a file that is not a VPN endpoint index, or a manifest that cannot be compiled."""
+
+
+def default_index_path(manifest_path: pathlib.Path) -> pathlib.Path:
+    return manifest_path.with_suffix(".idx")
+
+
+def _key(kind: str, key: str) -> bytes:
+    return f"{kind}\0{key}".encode("utf-8")
+
+
+def _hash(key: bytes) -> int:
+    # Stable across processes, unlike hash(); 0 marks an empty slot.
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+def _stat_signature(path: pathlib.Path) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else []
+
+
+def _link_id(link: Dict[str, Any]) -> str:
+    # Deployed links carry the id the mesh module gives them; the tfvars copy does not.
+    if link.get("link_id"):
+        return str(link["link_id"])
+    source, target = _dict(link.get("source")), _dict(link.get("target"))
+    return f"{source.get('cloud')}-{source.get('region')}__{target.get('cloud')}-{target.get('region')}"
+
+
+def records(manifest: Dict[str, Any]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """(kind, key, record) for every tunnel, link, site and hub in ``manifest``."""
+    mesh = _dict(_dict(manifest.get("clouds")).get("mesh"))
+    link_status = _dict(mesh.get("link_status"))
+    sites = _dict(manifest.get("sites"))
+    hubs: Dict[str, Dict[str, Any]] = {}
+
+    def hub(end: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hub_id = end.get("hub_id")
+        if not hub_id:
+            return None
+        entry = hubs.setdefault(
+            str(hub_id),
+            {"hub_id": str(hub_id), "cloud": end.get("cloud"), "region": end.get("region"), "links": [], "tunnels": [], "sites": []},
+        )
+        return entry
+
+    for link in _list(mesh.get("cloud_links")):
+        link = _dict(link)
+        link_id = _link_id(link)
+        source, target = _dict(link.get("source")), _dict(link.get("target"))
+        ends = [entry for entry in (hub(source), hub(target)) if entry is not None]
+        tunnel_ids = []
+        for tunnel in _list(link.get("tunnels")):
+            tunnel = _dict(tunnel)
+            if not tunnel.get("id"):
+                continue
+            tunnel_ids.append(str(tunnel["id"]))
+            yield "tunnel", tunnel_ids[-1], {"link_id": link_id, "tunnel": tunnel}
+        for entry in ends:
+            entry["links"].append(link_id)
+            entry["tunnels"].extend(tunnel_ids)
+        yield "link", link_id, {
+            "link_id": link_id,
+            "source": source,
+            "target": target,
+            "bgp": link.get("bgp"),
+            "tunnels": tunnel_ids,
+            "status": link_status.get(link_id),
+        }
+
+    site_links: Dict[str, List[Dict[str, Any]]] = {}
+    for link in _list(mesh.get("vnf_links")):
+        link = _dict(link)
+        if not link.get("site"):
+            continue
+        site = str(link["site"])
+        site_links.setdefault(site, []).append(link)
+        entry = hub(link)
+        if entry is not None and site not in entry["sites"]:
+            entry["sites"].append(site)
+    for site in list(sites) + [site for site in site_links if site not in sites]:
+        yield "site", site, {"site": site, "details": sites.get(site), "links": site_links.get(site, [])}
+
+    for hub_id, entry in hubs.items():
+        yield "hub", hub_id, entry
+
+
+def _write_table(out: Any, entries: List[Tuple[bytes, bytes]], signature: Tuple[int, int, int]) -> None:
+    slots = MIN_SLOTS
+    while slots < len(entries) * LOAD_FACTOR:
+        slots <<= 1
+    table = bytearray(slots * SLOT.size)
+    data_start = HEADER.size + len(table)
+    offset = data_start
+    mask = slots - 1
+    for key, record in entries:
+        key_hash = _hash(key)
+        position = key_hash & mask
+        while SLOT.unpack_from(table, position * SLOT.size)[0]:
+            position = (position + 1) & mask
+        SLOT.pack_into(table, position * SLOT.size, key_hash, offset, len(key), len(record))
+        offset += len(key) + len(record)
+    out.write(HEADER.pack(MAGIC, VERSION, len(entries), slots, *signature))
+    out.write(table)
+    for key, record in entries:
+        out.write(key)
+        out.write(record)
+
+
+def compile_index(manifest_path: pathlib.Path, index_path: Optional[pathlib.Path] = None) -> Dict[str, int]:
+    """Build the index for ``manifest_path``; counts per kind plus the file size."""
+    index_path = index_path or default_index_path(manifest_path)
+    signature = _stat_signature(manifest_path)
+    try:
+        with manifest_path.open("r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except ValueError as exc:
+        raise VpnIndexError(f"{manifest_path} is not valid JSON: {exc}") from exc
+    if not isinstance(manifest, dict):
+        raise VpnIndexError(f"{manifest_path} is not a VPN endpoint manifest")
+    counts = dict.fromkeys(KINDS, 0)
+    entries: List[Tuple[bytes, bytes]] = []
+    seen = set()
+    for kind, key, record in records(manifest):
+        encoded = _key(kind, key)
+        # A tunnel id repeated across links keeps its first definition, as a scan would.
+        if encoded in seen:
+            continue
+        seen.add(encoded)
+        entries.append((encoded, json.dumps(record, separators=(",", ":")).encode("utf-8")))
+        counts[kind] += 1
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = index_path.with_name(f".{index_path.name}.tmp{os.getpid()}")
+    # The records hold pre-shared keys.
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as out:
+        _write_table(out, entries, signature)
+    os.replace(tmp, index_path)
+    counts["bytes"] = index_path.stat().st_size
+    return counts
+
+
+class VpnIndex:
+    """Read-only mapping of a compiled index; lookups are a hash and a slot probe."""
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        with path.open("rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size < HEADER.size:
+                raise VpnIndexError(f"{path} is not a VPN endpoint index")
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.slots, *signature = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or size < HEADER.size + self.slots * SLOT.size:
+            self._map.close()
+            raise VpnIndexError(f"{path} is not a version {VERSION} VPN endpoint index")
+        self.source_signature = tuple(signature)
+        self._view = memoryview(self._map)
+        self._mask = self.slots - 1
+
+    def close(self) -> None:
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> "VpnIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def raw(self, kind: str, key: str) -> Optional[memoryview]:
+        """The record's JSON bytes, sliced from the mapping without a copy; None when absent.
+
+        Release the view (or copy it) before ``close``.
+        """
+        wanted = _key(kind, key)
+        key_hash = _hash(wanted)
+        position = key_hash & self._mask
+        while True:
+            slot_hash, offset, key_length, record_length = SLOT.unpack_from(self._map, HEADER.size + position * SLOT.size)
+            if not slot_hash:
+                return None
+            if slot_hash == key_hash and key_length == len(wanted) and self._view[offset : offset + key_length] == wanted:
+                start = offset + key_length
+                return self._view[start : start + record_length]
+            position = (position + 1) & self._mask
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """The decoded record; a tunnel's comes with its link's record under ``link``."""
+        raw = self.raw(kind, key)
+        if raw is None:
+            return None
+        record = json.loads(bytes(raw))
+        raw.release()
+        if kind == "tunnel":
+            record["link"] = self.get("link", record["link_id"])
+        return record
+
+    def keys(self, kind: str) -> List[str]:
+        """Keys of one kind in manifest order."""
+        prefix = f"{kind}\0".encode("utf-8")
+        found = []
+        for position in range(self.slots):
+            slot_hash, offset, key_length, _ = SLOT.unpack_from(self._map, HEADER.size + position * SLOT.size)
+            if slot_hash and self._view[offset : offset + len(prefix)] == prefix:
+                found.append((offset, bytes(self._view[offset + len(prefix) : offset + key_length]).decode("utf-8")))
+        return [key for _, key in sorted(found)]
+
+
+def is_current(index_path: pathlib.Path, manifest_path: pathlib.Path) -> bool:
+    """True when ``index_path`` was compiled from the manifest as it is now."""
+    try:
+        with index_path.open("rb") as handle:
+            header = handle.read(HEADER.size)
+        signature = _stat_signature(manifest_path)
+    except OSError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, version, _, _, *source = HEADER.unpack(header)
+    return magic == MAGIC and version == VERSION and tuple(source) == signature
+
+
+def open_index(manifest_path: pathlib.Path = DEFAULT_MANIFEST, index_path: Optional[pathlib.Path] = None) -> VpnIndex:
+    """The index for ``manifest_path``, compiled first when missing or stale.
+
+    Without the manifest, an existing index is used as it is.
+    """
+    index_path = index_path or default_index_path(manifest_path)
+    if manifest_path.exists() and not is_current(index_path, manifest_path):
+        compile_index(manifest_path, index_path)
+    return VpnIndex(index_path)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Look up tunnels, sites and hubs in the VPN endpoint manifest")
+    parser.add_argument(
+        "--manifest", type=pathlib.Path, default=DEFAULT_MANIFEST, help=f"Manifest written by Terraform (default: {DEFAULT_MANIFEST})"
+    )
+    parser.add_argument("--index", type=pathlib.Path, help="Compiled index (default: the manifest path with an .idx suffix)")
+    commands = parser.add_subparsers(dest="op", required=True)
+    build = commands.add_parser("compile", help="Compile the index, unless it is already current")
+    build.add_argument("--force", action="store_true", help="Compile even when the index is current")
+    get = commands.add_parser("get", help="Print one record as JSON")
+    get.add_argument("kind", choices=KINDS)
+    get.add_argument("key", help="Tunnel id, link id, site name or hub_id")
+    listing = commands.add_parser("list", help="Print every key of one kind")
+    listing.add_argument("kind", choices=KINDS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    index_path = args.index or default_index_path(args.manifest)
+    if not args.manifest.exists() and not index_path.exists():
+        print(f"error: {args.manifest} not found; it is written by `terraform apply`", file=sys.stderr)
+        return 1
+    try:
+        if args.op == "compile":
+            if not args.force and is_current(index_path, args.manifest):
+                print(f"{index_path} is current")
+                return 0
+            started = time.perf_counter()
+            counts = compile_index(args.manifest, index_path)
+            print(
+                f"Compiled {counts['tunnel']} tunnels, {counts['link']} links, {counts['site']} sites and {counts['hub']} hubs into {index_path} "
+                f"({counts['bytes'] / 1024:.0f} KiB) in {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+            return 0
+        with open_index(args.manifest, index_path) as index:
+            if args.op == "list":
+                for key in index.keys(args.kind):
+                    print(key)
+                return 0
+            raw = index.raw(args.kind, args.key)
+            if raw is None:
+                print(f"error: no {args.kind} {args.key!r} in {index_path}", file=sys.stderr)
+                return 1
+            # Records are copied to stdout as stored; a tunnel's link record
+            # is spliced in front of its own fields.
+            parts = [raw]
+            if args.kind == "tunnel":
+                link = index.raw("link", json.loads(bytes(raw))["link_id"])
+                if link is not None:
+                    parts = [memoryview(b'{"link":'), link, memoryview(b","), raw[1:]]
+            try:
+                out = sys.stdout.buffer
+                for part in parts:
+                    out.write(part)
+                out.write(b"\n")
+                out.flush()
+            finally:
+                for part in parts:
+                    part.release()
+                raw.release()
+            return 0
+    except (OSError, VpnIndexError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
@@ -0,0 +1,62 @@
+"""Poll a Terraform state file and report when the rendered outputs change.
+
+Each poll is a single ``stat``; the state is only re-read (through the
+fingerprint-keyed outputs cache) when its stat signature moves, and the
+caller only gets new outputs when their content actually differs. An apply
+that rewrites state without touching outputs therefore costs a hash, not a
+render.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .state import StateError
+
+
+def _stat_signature(path: pathlib.Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def outputs_digest(outputs: Optional[Dict[str, Any]]) -> str:
+    canonical = json.dumps(outputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class OutputsPoller:
+    """Return new outputs from ``poll`` only when they differ from the last seen."""
+
+    def __init__(
+        self,
+        state_path: pathlib.Path,
+        load: Callable[[], Dict[str, Any]],
+        outputs: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.state_path = state_path
+        self._load = load
+        self._signature = _stat_signature(state_path)
+        self._digest = outputs_digest(outputs) if outputs is not None else None
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        signature = _stat_signature(self.state_path)
+        if signature is None or signature == self._signature:
+            return None
+        try:
+            outputs = self._load()
+        except StateError:
+            # Terraform may be mid-write; keep the old signature and retry.
+            return None
+        self._signature = signature
+        digest = outputs_digest(outputs)
+        if digest == self._digest:
+            return None
+        self._digest = digest
+        return outputs
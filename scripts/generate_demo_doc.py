@@ -9,558 +9,1612 @@ in the path catalog.
 from __future__ import annotations
 
 import argparse
+import contextlib
 import datetime as _dt
-import html
+import hashlib
 import json
+import os
 import pathlib
+import signal
 import socket
-import socketserver
 import subprocess
-from http import HTTPStatus
-from typing import Any, Dict, Optional
-
-import http.server
+import sys
+import tempfile
+import threading
+import time
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from demodoc import catalog as doccatalog
+from demodoc import export as docexport
+from demodoc import fragments as docfragments
+from demodoc import jsonstream
+from demodoc import mesh as docmesh
+from demodoc import metrics as docmetrics
+from demodoc import model as docmodel
+from demodoc import plan as docplan
+from demodoc import probe as docprobe
+from demodoc import reachability as docreach
+from demodoc import sections as docsections
+from demodoc import state as tfstate
+from demodoc import watch as docwatch
+
+if TYPE_CHECKING:
+    # Imported where used, so a run pays only for the stages it reaches:
+    # http.server when serving, multiprocessing for batches and the address
+    # plan, compression for the site, and the template and snapshot machinery.
+    from demodoc import batch as docbatch
+    from demodoc import prefixes as docprefixes
+    from demodoc import server as docserver
+    from demodoc import site as docsite
+    from demodoc import snapshots as docsnapshots
+    from demodoc import templates as doctemplates
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
 DOC_PATH = REPO_ROOT / "docs" / "demo-workflow.md"
+BATCH_DOC_DIR = REPO_ROOT / "docs" / "workspaces"
+SITE_DIR = REPO_ROOT / "docs" / "site"
 TF_CANDIDATES = (REPO_ROOT / "bin" / "terraform", pathlib.Path("terraform"))
-
-
-def _run(cmd: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(cmd, capture_output=True, text=True, check=False)
-
-
-def _load_outputs() -> tuple[Optional[Dict[str, Any]], Optional[str]]:
-    last_error: Optional[str] = None
+CACHE_DIR = REPO_ROOT / ".cache" / "generate_demo_doc"
+OUTPUTS_CACHE = tfstate.OutputsCache(CACHE_DIR / "outputs")
+# Plan summaries, keyed by the plan file's stat signature.
+PLAN_CACHE = tfstate.OutputsCache(CACHE_DIR / "plans")
+# Live endpoint checks, reused for --probe-ttl seconds.
+PROBE_CACHE = CACHE_DIR / "probes.json"
+# Appliance management UIs (Fortinet, Palo Alto, ASA, Check Point) listen on HTTPS.
+MANAGEMENT_PORT = 443
+ALB_PORT = 80
+# Keep in sync with demodoc.client.DEFAULT_SOCKET.
+DAEMON_SOCKET = CACHE_DIR / "daemon.sock"
+# The doc heading whose table the static site splits into one page per cloud.
+PATH_CATALOG_HEADING = "### L4–L7 Path Catalog (use Forward Path Search)"
+PATH_CATALOG_TITLE = "L4–L7 Path Catalog"
+SITE_CLOUDS = (("aws", "AWS"), ("azure", "Azure"), ("gcp", "GCP"))
+# The doc skeleton: prose, commands and slots for SECTIONS (see demodoc.templates).
+TEMPLATE_PATH = pathlib.Path(__file__).resolve().parent / "templates" / "demo-workflow.md"
+# Compiled templates, keyed by the hash of their text.
+TEMPLATE_CACHE = CACHE_DIR / "templates"
+# The var-files every terraform command in the doc passes, in order.
+VAR_FILES = tuple(path.as_posix() for path in doccatalog.CONFIG_FILES.values())
+# Per-section, per-cloud and per-region fragments for the server's filtered views.
+FRAGMENTS_DIR = CACHE_DIR / "fragments"
+# Reachability names listed per region before the doc points at the API.
+REACHABILITY_LIST_LIMIT = 25
+# Top-level outputs read by render(); everything else is skipped while parsing.
+OUTPUT_KEYS = ("multi_cloud_load_balancing", "reachability", "vpn_endpoint_manifest")
+# Memoized sections are invalidated whenever this script changes.
+RENDER_SALT = hashlib.sha256(pathlib.Path(__file__).read_bytes()).hexdigest()[:16]
+# Lines that change on every run and must not force a rewrite on their own.
+VOLATILE_LINES = docsections.volatile_lines(r"> Generated by `scripts/generate_demo_doc\.py` on .*")
+
+
+def _select_outputs(stream: IO[bytes]) -> Dict[str, Any]:
+    return jsonstream.select(stream, OUTPUT_KEYS)
+
+
+def _run_output(
+    cmd: list[str],
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    timings: Optional[docmetrics.PhaseTimings] = None,
+    parse: Callable[[IO[bytes]], Dict[str, Any]] = _select_outputs,
+    label: str = "terraform output",
+) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Run ``cmd`` and ``parse`` its stdout as it arrives (by default, the wanted outputs)."""
+    timings = timings if timings is not None else docmetrics.PhaseTimings()
+    # stderr goes to a file so a chatty terraform cannot block on a full pipe
+    # while we are still consuming stdout.
+    with tempfile.TemporaryFile() as stderr_file:
+        # A session of its own lets a deadline kill terraform and any plugin
+        # children that would otherwise keep the stdout pipe open.
+        with timings.phase("load.terraform.spawn"):
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, env=env, start_new_session=True)
+        with proc:
+            assert proc.stdout is not None
+            # The pipe is read incrementally, so a deadline has to kill the
+            # process rather than rely on communicate(timeout=...).
+            timed_out = threading.Event()
+
+            def _expire() -> None:
+                timed_out.set()
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except OSError:
+                    proc.kill()
+
+            killer = threading.Timer(timeout, _expire) if timeout else None
+            if killer is not None:
+                killer.start()
+            outputs: Optional[Dict[str, Any]] = None
+            decode_error: Optional[str] = None
+            # Decoding overlaps the read, so "stream" covers both up to the
+            # last wanted key; "drain" is the rest of the pipe.
+            with timings.phase("load.terraform.stream"):
+                try:
+                    outputs = parse(proc.stdout)
+                except ValueError as exc:
+                    # JSONStreamError and PlanError are both ValueErrors.
+                    decode_error = f"Failed to decode {label}: {exc}"
+            with timings.phase("load.terraform.drain"):
+                for _ in iter(lambda: proc.stdout.read(jsonstream.CHUNK_SIZE), b""):
+                    pass
+            with timings.phase("load.terraform.wait"):
+                proc.wait()
+            if killer is not None:
+                killer.cancel()
+        if timed_out.is_set():
+            return None, f"{cmd[0]} output timed out after {timeout:g}s"
+        if proc.returncode != 0:
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode("utf-8", "replace").strip()
+            return None, stderr or f"{label} failed"
+    return outputs, decode_error
+
+
+def _terraform_commands(args: List[str], timings: docmetrics.PhaseTimings) -> Iterator[List[str]]:
+    # The repo's pinned binary first, then whatever is on PATH.
     for tf_bin in TF_CANDIDATES:
         if tf_bin == pathlib.Path("terraform"):
-            cmd = ["terraform", "output", "-json"]
+            yield ["terraform", *args]
+        elif not tf_bin.exists():
+            timings.phases.append({"phase": "load.terraform", "binary": str(tf_bin), "outcome": "missing", "seconds": 0.0})
         else:
-            if not tf_bin.exists():
-                continue
-            cmd = [str(tf_bin), "output", "-json"]
+            yield [str(tf_bin), *args]
+
+
+def _load_outputs(
+    state_path: Optional[pathlib.Path] = None,
+    use_cache: bool = True,
+    workspace: Optional[str] = None,
+    workdir: Optional[pathlib.Path] = None,
+    timeout: Optional[float] = None,
+    timings: Optional[docmetrics.PhaseTimings] = None,
+) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    timings = timings if timings is not None else docmetrics.PhaseTimings()
+    last_error: Optional[str] = None
+    if state_path is not None:
+        cache = OUTPUTS_CACHE if use_cache else None
+        with timings.phase("load.state", path=str(state_path)) as phase:
+            hits = OUTPUTS_CACHE.hits
+            try:
+                outputs = tfstate.load_state_outputs(state_path, cache, OUTPUT_KEYS)
+            except tfstate.StateError as exc:
+                last_error = str(exc)
+                phase.update(outcome="error", error=last_error)
+            else:
+                phase["outcome"] = "cache hit" if OUTPUTS_CACHE.hits > hits else "parsed"
+                return outputs, None
+
+    env = None
+    if workspace is not None:
+        env = dict(os.environ, TF_WORKSPACE=workspace)
+    chdir = [f"-chdir={workdir}"] if workdir is not None else []
+    for cmd in _terraform_commands([*chdir, "output", "-json"], timings):
+        with timings.phase("load.terraform", binary=cmd[0]) as phase:
+            try:
+                outputs, last_error = _run_output(cmd, env, timeout, timings)
+            except OSError as exc:
+                last_error = f"Failed to run {cmd[0]}: {exc.strerror or exc}"
+                outputs = None
+            phase["outcome"] = "ok" if outputs is not None and last_error is None else "error"
+            if last_error is not None:
+                phase["error"] = last_error
+        if outputs is not None and last_error is None:
+            return outputs, None
+    return None, last_error
+
 
-        result = _run(cmd)
-        if result.returncode == 0:
+def _checked(outputs: Optional[Dict[str, Any]], error: Optional[str]) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """``outputs`` when the doc can be rendered from them, else None and what is wrong with them."""
+    try:
+        docmodel.load(outputs)
+    except docmodel.OutputsError as exc:
+        return None, str(exc)
+    return outputs, error
+
+
+def _load_plan(
+    plan_path: pathlib.Path,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    timings: Optional[docmetrics.PhaseTimings] = None,
+) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Summarise a saved plan: plan JSON is streamed from the file, a binary plan through `terraform show -json`."""
+    timings = timings if timings is not None else docmetrics.PhaseTimings()
+    with timings.phase("load.plan", path=str(plan_path)) as phase:
+        try:
+            key = docplan.cache_key(plan_path)
+            is_json = docplan.is_json(plan_path)
+        except OSError as exc:
+            phase["outcome"] = "error"
+            return None, f"cannot read plan {plan_path}: {exc.strerror or exc}"
+        cached = PLAN_CACHE.get(key) if use_cache else None
+        if cached is not None:
+            phase["outcome"] = "cache hit"
+            return cached, None
+
+        summary: Optional[Dict[str, Any]] = None
+        error: Optional[str] = None
+        if is_json:
             try:
-                return json.loads(result.stdout), None
-            except json.JSONDecodeError as exc:  # pragma: no cover - defensive
-                last_error = f"Failed to decode terraform output: {exc}"
+                with plan_path.open("rb") as handle:
+                    summary = docplan.summarize(handle)
+            except (OSError, docplan.PlanError) as exc:
+                error = f"cannot read plan {plan_path}: {exc}"
         else:
-            stderr = result.stderr.strip()
-            last_error = stderr or "terraform output failed"
-    return None, last_error
+            for cmd in _terraform_commands(["show", "-json", str(plan_path.resolve())], timings):
+                with timings.phase("load.terraform", binary=cmd[0]) as attempt:
+                    try:
+                        summary, error = _run_output(cmd, None, timeout, timings, docplan.summarize, "terraform show")
+                    except OSError as exc:
+                        summary, error = None, f"Failed to run {cmd[0]}: {exc.strerror or exc}"
+                    attempt["outcome"] = "ok" if summary is not None and error is None else "error"
+                if summary is not None and error is None:
+                    break
+        if summary is None or error is not None:
+            phase.update(outcome="error", error=error)
+            return None, error
+        phase["outcome"] = "parsed"
+        summary["path"] = str(plan_path)
+        if use_cache:
+            PLAN_CACHE.put(key, summary)
+        return summary, None
+
+
+PATH_TABLE_HEADER = (
+    "| Flow | Source → Destination | Protocols / Ports | Forward Path Search Focus |"
+    "\n|------|---------------------|--------------------|------------------------------|"
+)
+
+
+def _path_row(flow: Dict[str, Any]) -> str:
+    return f"\n{_path_cells(flow)}"
+
+
+def _path_cells(flow: Dict[str, Any]) -> str:
+    route = f"{flow['source']} → {flow['destination']}" if flow["destination"] else flow["source"]
+    return f"| {flow['name']} | {route} | {flow['protocol']} | {flow['focus']} |"
+
+
+def _path_pieces(context: Dict[str, Any]) -> Iterator[docfragments.Piece]:
+    Piece = docfragments.Piece
+    yield Piece(PATH_TABLE_HEADER, heading=True)
+    for flow in doccatalog.build_flows(context, context.get("catalog_config") or {}):
+        # A flow is listed under both of its ends.
+        src, dst = flow["src"], flow["dst"]
+        source, destination = (src[1], src[2]), (dst[1], dst[2])
+        if source == destination or not dst[1]:
+            scopes = (source,) if src[1] else ()
+        else:
+            scopes = (source, destination) if src[1] else (destination,)
+        yield Piece(_path_cells(flow), scopes)
 
 
-def _unwrap(outputs: Dict[str, Any], key: str, default: Any = None) -> Any:
-    if not outputs or key not in outputs:
-        return default
-    value_block = outputs[key]
-    if isinstance(value_block, dict) and "value" in value_block:
-        return value_block["value"]
-    return value_block
-
-
-def _format_path_table(context: Dict[str, Any]) -> str:
-    aggregator = context.get("global_accelerator_dns")
-    albs: Dict[str, Dict[str, Any]] = context.get("application_albs", {})
-
-    def alb_dns(region: str) -> str:
-        entry = albs.get(region)
-        dns = entry.get("dns_name") if entry else None
-        return dns or f"ALB {region} (pending)"
-
-    flows = [
-        {
-            "name": "Global App Ingress (us-east-1)",
-            "source": aggregator or "Internet client",
-            "destination": f"{alb_dns('us-east-1')} → Web ASG → PostgreSQL",  # noqa: E501
-            "protocol": "TCP 80/443 → backend 80 → TCP 5432",
-            "focus": "Forward Path Search – multi-tier reachability, SGs, NACL",  # noqa: E501
-        },
-        {
-            "name": "Global App Ingress (eu-central-1)",
-            "source": aggregator or "Internet client",
-            "destination": f"{alb_dns('eu-central-1')} → Web ASG → Network Firewall → PostgreSQL",  # noqa: E501
-            "protocol": "TCP 80/443 → backend 80 → TCP 5432",
-            "focus": "Forward Path Search – AWS Network Firewall inspection",  # noqa: E501
-        },
-        {
-            "name": "Global App Ingress (ap-northeast-1)",
-            "source": aggregator or "Internet client",
-            "destination": f"{alb_dns('ap-northeast-1')} → GWLB → Palo Alto → EKS service",  # noqa: E501
-            "protocol": "TCP 80/443 → NodePort 30080/30443",
-            "focus": "Forward Path Search – GWLB inline firewall + Kubernetes",  # noqa: E501
-        },
-        {
-            "name": "DMZ to App (us-east-1)",
-            "source": "DMZ frontend subnet",
-            "destination": "Shared-services app subnet",
-            "protocol": "TCP 8080/8443 (ephemeral return)",
-            "focus": "Security group `skyforge-us-east-1-app-sg` + NACL `dmz-frontend-web`",  # noqa: E501
-        },
-        {
-            "name": "Application to Database",
-            "source": "Shared-services app subnet",
-            "destination": "Shared-services data subnet",
-            "protocol": "TCP 5432",
-            "focus": "Forward Path Search – Data-tier ACL `data-tier` enforcement",  # noqa: E501
-        },
-        {
-            "name": "Logging Ingest Pipeline",
-            "source": "App/DMZ tier",
-            "destination": "Logging VPC ingest subnet",
-            "protocol": "TCP 6514, UDP 514",
-            "focus": "Security group `logging-ingest` + ACL `logging-ingress-acl`",  # noqa: E501
-        },
-        {
-            "name": "Lambda Controlled Egress",
-            "source": "Serverless private subnet",
-            "destination": "Internet + internal APIs",
-            "protocol": "TCP 443, TCP 8443",
-            "focus": "Security group `lambda-egress` + NAT/TGW routing",
-        },
-        {
-            "name": "Bastion Administration",
-            "source": "Corporate IPs",
-            "destination": "Bastion hosts",
-            "protocol": "TCP 22 / TCP 3389",
-            "focus": "Security group `bastion-admin`, ACL `bastion-acl`",
-        },
-        {
-            "name": "GWLB Inline Inspection",
-            "source": "Internet client",
-            "destination": "Palo Alto → app subnet",
-            "protocol": "TCP 80/443",
-            "focus": "GWLB endpoint chaining + security group `gwlb-management`",
-        },
-        {
-            "name": "Transit Gateway Connect Overlay",
-            "source": "Fortinet FortiGate (us-east-1 transport)",
-            "destination": "AWS Transit Gateway Connect attachment",
-            "protocol": "GRE 47 + BGP TCP 179",
-            "focus": "Forward Path Search – TGW Connect GRE overlay and BGP route advertisement",
-        },
-        {
-            "name": "PrivateLink SSM Access",
-            "source": "Shared-services app subnet",
-            "destination": "SSM interface endpoint",
-            "protocol": "TCP 443",
-            "focus": "Forward Path Search – PrivateLink interface endpoint coverage",
-        },
-        {
-            "name": "San Jose On-Prem → Azure",
-            "source": "VNF San Jose",
-            "destination": "Azure vWAN hub (uswest2)",
-            "protocol": "IPsec/BGP, tunneled HTTPS",
-            "focus": "Forward Path Search – VPN manifest, TGW → vWAN connectivity",
-        },
-        {
-            "name": "Dubai On-Prem → GCP",
-            "source": "VNF Dubai",
-            "destination": "GCP HA VPN (us-central1)",
-            "protocol": "IPsec/BGP, tunneled HTTPS",
-            "focus": "Forward Path Search – Multi-cloud VPN routing",
-        },
-        {
-            "name": "Azure Front Door Path",
-            "source": "Azure Front Door endpoint",
-            "destination": "Azure Application Gateway → App Service",
-            "protocol": "HTTPS 443 (health probes HTTP)",
-            "focus": "Forward Path Search – Azure WAF policy + hub reachability",
-        },
-        {
-            "name": "GCP Global HTTP LB",
-            "source": "GCP HTTPS LB",
-            "destination": "Cloud Run service",
-            "protocol": "HTTPS 443",
-            "focus": "Forward Path Search – GCP firewall rules + Cloud Run IAM",
-        },
-        {
-            "name": "Blocked Path Sanity Check",
-            "source": "Bastion subnet",
-            "destination": "Logging ops subnet",
-            "protocol": "TCP 22",
-            "focus": "Forward Path Search – detect intentional violation (expect DENY)",  # noqa: E501
-        },
-    ]
+def _format_path_table(context: Dict[str, Any]) -> Iterator[str]:
+    return docfragments.lines(_path_pieces(context))
 
-    rows = ["| Flow | Source → Destination | Protocols / Ports | Forward Path Search Focus |"]
-    rows.append("|------|---------------------|--------------------|------------------------------|")
-    for flow in flows:
-        source = flow["source"]
-        destination = flow.get("destination", "")
-        rows.append(
-            f"| {flow['name']} | {source} → {destination} | {flow['protocol']} | {flow['focus']} |"
-        )
-    return "\n".join(rows)
 
+def workspace_outputs(state_path: Optional[pathlib.Path]) -> bool:
+    """Whether outputs read from ``state_path`` (None: ``terraform output``) were applied from this workspace.
 
-def render(outputs: Optional[Dict[str, Any]], error: Optional[str]) -> str:
-    timestamp = _dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    Only those are described by the demo tfvars; any other state file is
+    documented from its outputs alone.
+    """
+    if state_path is None:
+        return True
+    default = tfstate.default_state_path(REPO_ROOT)
+    return default is not None and state_path.resolve() == default.resolve()
+
+
+def _catalog_config(tfvars: bool) -> Dict[str, Any]:
+    return doccatalog.load_config(REPO_ROOT) if tfvars else doccatalog.NO_CONFIG
 
-    multi_lb = _unwrap(outputs or {}, "multi_cloud_load_balancing", {}) if outputs else {}
-    reachability = _unwrap(outputs or {}, "reachability", {}) if outputs else {}
-    vpn_manifest = _unwrap(outputs or {}, "vpn_endpoint_manifest", {}) if outputs else {}
-    clouds = vpn_manifest.get("clouds", {}) if isinstance(vpn_manifest, dict) else {}
-    aws_stack = {}
-    if isinstance(clouds, dict):
-        aws_cloud = clouds.get("aws", {}) or {}
-        if isinstance(aws_cloud, dict):
-            for region, data in aws_cloud.items():
-                if isinstance(data, dict):
-                    aws_stack[region] = data.get("application_stack") or {}
-
-    application_albs = multi_lb.get("application_albs") or {}
-    for region, info in application_albs.items():
-        if isinstance(info, dict):
-            application_albs[region] = {
-                "dns_name": info.get("dns_name"),
-                "zone_id": info.get("zone_id"),
-            }
-    aws_block = multi_lb.get("aws", {}) if isinstance(multi_lb, dict) else {}
-    azure_block = multi_lb.get("azure", {}) if isinstance(multi_lb, dict) else {}
-    gcp_block = multi_lb.get("gcp", {}) if isinstance(multi_lb, dict) else {}
-
-    global_app = aws_block.get("global_application_accelerator") or {}
-    accelerator_dns = None
-    if isinstance(global_app, dict):
-        accelerator_dns = global_app.get("custom_domain") or global_app.get("dns_name")
-
-    context = {
-        "global_accelerator_dns": accelerator_dns,
-        "global_accelerator_alias": global_app.get("custom_domain") if isinstance(global_app, dict) else None,
-        "global_accelerator_listener_ports": global_app.get("listener_ports") if isinstance(global_app, dict) else [],
-        "application_albs": application_albs,
-        "tgw_connect": aws_block.get("transit_gateway_connect", {}),
-        "gwlb": aws_block.get("gateway_load_balancers", {}),
-        "azure_asa": azure_block.get("asa", {}),
-        "gcp_checkpoint": gcp_block.get("checkpoint_firewalls", {}),
-        "aws_stack": aws_stack,
-        "reachability": reachability,
+
+def _address_plan(tfvars: bool) -> Optional[Dict[str, Any]]:
+    # Like the catalog config, the environment tfvars only describe this workspace.
+    if not tfvars:
+        return None
+    from demodoc import prefixes as docprefixes
+
+    return docprefixes.check(REPO_ROOT)
+
+
+def catalog_flows(outputs: Optional[Dict[str, Any]], tfvars: bool = True) -> Iterator[Dict[str, Any]]:
+    """Path catalog flows for ``outputs``, as rendered in the doc's table."""
+    context = _build_context(outputs, _catalog_config(tfvars))
+    return doccatalog.build_flows(context, context["catalog_config"])
+
+
+def reachability_index(outputs: Optional[Dict[str, Any]], tfvars: bool = True) -> docreach.ReachabilityIndex:
+    """Deployed reachability tests joined with their tfvars definitions, indexed once per outputs."""
+    tests = _catalog_config(tfvars).get("reachability_tests")
+    return docreach.index_for(docmodel.load(outputs).reachability, tests)
+
+
+# The outputs snapshot history, opened on first use.
+_snapshots: Optional[docsnapshots.SnapshotStore] = None
+
+
+def _snapshot_store() -> docsnapshots.SnapshotStore:
+    global _snapshots
+    from demodoc import snapshots as docsnapshots
+
+    if _snapshots is None:
+        _snapshots = docsnapshots.SnapshotStore(CACHE_DIR / "snapshots")
+    return _snapshots
+
+
+def record_snapshot(
+    outputs: Optional[Dict[str, Any]],
+    stream: Optional[str] = None,
+    enabled: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """Add ``outputs`` to the snapshot history; the changes since the previous snapshot, or None.
+
+    ``stream`` defaults to the main doc's history.
+    """
+    if outputs is None or not enabled:
+        return None
+    from demodoc import snapshots as docsnapshots
+
+    try:
+        return _snapshot_store().record(outputs, stream or docsnapshots.DEFAULT_STREAM)
+    except (OSError, docsnapshots.SnapshotError) as exc:
+        # History is a convenience; a full disk must not stop the doc.
+        print(f"warning: outputs snapshot not recorded: {exc}", file=sys.stderr)
+        return None
+
+
+def _management_target(ip: Optional[str]) -> Optional[docprobe.Target]:
+    return docprobe.Target("tcp", ip, MANAGEMENT_PORT) if ip else None
+
+
+def _accelerator_target(accelerator: docmodel.Accelerator, port: int) -> docprobe.Target:
+    return docprobe.Target("http" if port == ALB_PORT else "tcp", accelerator.address, port)
+
+
+def _probe_targets(context: Dict[str, Any]) -> Iterator[Tuple[str, docprobe.Target, Tuple[str, Optional[str]]]]:
+    # (label, target, (cloud, region)) for every endpoint the doc names, in doc order.
+    for region, alb in sorted(context["application_albs"].items()):
+        if alb.dns_name:
+            yield f"ALB {region}", docprobe.Target("http", alb.dns_name, ALB_PORT), ("aws", region)
+    accelerator = context["accelerator"]
+    if accelerator is not None and accelerator.address:
+        for port in accelerator.listener_ports:
+            yield "Global Accelerator", _accelerator_target(accelerator, port), ("aws", None)
+    for region, connect in sorted(context["tgw_connect"].items()):
+        connector = connect.connector if connect is not None else None
+        if connector is not None:
+            target = _management_target(connector.management_ip or connector.private_ip)
+            if target is not None:
+                yield f"Fortinet {region}", target, ("aws", region)
+    for region, gwlb in sorted(context["gwlb"].items()):
+        for ip in gwlb.private_ips if gwlb is not None else ():
+            target = _management_target(ip)
+            if target is not None:
+                yield f"Palo Alto {region}", target, ("aws", region)
+    for region, asa in sorted(context["azure_asa"].items()):
+        if asa is None:
+            continue
+        for side, ip in (("private", asa.private_ip), ("public", asa.public_ip)):
+            target = _management_target(ip)
+            if target is not None:
+                yield f"Azure ASA {region} ({side})", target, ("azure", region)
+    for region, checkpoint in sorted(context["gcp_checkpoint"].items()):
+        target = _management_target(checkpoint.private_ip) if checkpoint is not None else None
+        if target is not None:
+            yield f"Check Point {region}", target, ("gcp", region)
+
+
+def run_probes(
+    outputs: Optional[Dict[str, Any]],
+    prober: Optional[docprobe.Prober],
+    timings: Optional[docmetrics.PhaseTimings] = None,
+) -> Optional[Dict[str, docprobe.Result]]:
+    """Check every endpoint the doc names for ``outputs``; None when probing is off."""
+    if prober is None:
+        return None
+    timings = timings if timings is not None else docmetrics.PhaseTimings()
+    with timings.phase("probe") as phase:
+        probed, reused = prober.probed, prober.reused
+        targets = [target for _, target, _ in _probe_targets(_build_context(outputs))]
+        results = prober.run(targets)
+        phase.update(
+            targets=len(results),
+            probed=prober.probed - probed,
+            reused=prober.reused - reused,
+            up=sum(result.status == "up" for result in results.values()),
+        )
+    return results
+
+
+def _doc_sections(handle: IO[str]) -> Iterator[Tuple[str, int, List[str]]]:
+    # (title, heading level, lines) for the doc text before the first heading
+    # and under each `##`/`###` heading. The path catalog's rows are skipped:
+    # the site rebuilds them per cloud from the flows.
+    title, level, lines = "Overview", 1, []
+    for line in handle:
+        if line.startswith(("## ", "### ")):
+            yield title, level, lines
+            level = line.index(" ")
+            title, lines = line[level + 1 :].strip(), [line]
+            if line.rstrip("\n") == PATH_CATALOG_HEADING:
+                title = ""
+        elif title or not lines:
+            lines.append(line)
+    yield title, level, lines
+
+
+def _write_catalog_pages(
+    builder: docsite.SiteBuilder,
+    outputs: Optional[Dict[str, Any]],
+    group: Optional[str],
+    tfvars: bool = True,
+) -> None:
+    # One pass over the flows; a flow is listed on the page of every cloud
+    # it touches, and flows that touch none on a last "Other" page.
+    heading = PATH_CATALOG_TITLE
+    with contextlib.ExitStack() as stack:
+        writers = {}
+        for cloud, label in SITE_CLOUDS:
+            writers[cloud] = stack.enter_context(builder.page(f"{heading} – {label}", group))
+            writers[cloud](f"{PATH_CATALOG_HEADING} – {label}\n\n{PATH_TABLE_HEADER}")
+        other = None
+        for flow in catalog_flows(outputs, tfvars):
+            clouds = {flow["src"][1], flow["dst"][1]} & writers.keys()
+            if not clouds:
+                if other is None:
+                    other = stack.enter_context(builder.page(f"{heading} – Other", group))
+                    other(f"{PATH_CATALOG_HEADING} – Other\n\n{PATH_TABLE_HEADER}")
+                other(_path_row(flow))
+            for cloud in clouds:
+                writers[cloud](_path_row(flow))
+        for write in writers.values():
+            write("\n")
+        if other is not None:
+            other("\n")
+
+
+def build_site(
+    outputs: Optional[Dict[str, Any]],
+    directory: pathlib.Path,
+    doc_path: pathlib.Path = DOC_PATH,
+    tfvars: bool = True,
+) -> Tuple[Dict[str, Any], int]:
+    """Split the written doc into pages under ``directory``; the manifest and the pages written.
+
+    Nothing is rebuilt while the doc file is the one the manifest came from.
+    """
+    st = os.stat(doc_path)
+    source = {"doc": str(doc_path), "signature": [st.st_mtime_ns, st.st_size, st.st_ino], "salt": RENDER_SALT}
+    from demodoc import site as docsite
+
+    previous = docsite.load_manifest(directory / docsite.MANIFEST)
+    if previous is not None and previous.get("source") == source:
+        return previous, 0
+    builder = docsite.SiteBuilder(directory, "Skyforge Demo Workflow", source)
+    group: Optional[str] = None
+    with doc_path.open("r", encoding="utf-8") as handle:
+        for title, level, lines in _doc_sections(handle):
+            if level == 2:
+                group = title
+            elif level < 2:
+                group = None
+            if not title:
+                _write_catalog_pages(builder, outputs, group, tfvars)
+                continue
+            with builder.page(title, group if level > 2 else None) as write:
+                write("".join(lines))
+    return builder.finish(), builder.written
+
+
+def _build_context(
+    outputs: Optional[Dict[str, Any]],
+    config: Optional[Dict[str, Any]] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    probes: Optional[Dict[str, docprobe.Result]] = None,
+    address_plan: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    model = docmodel.load(outputs)
+    return {
+        "accelerator": model.accelerator,
+        "application_albs": model.albs,
+        "tgw_connect": model.tgw_connect,
+        "gwlb": model.gwlb,
+        "azure_asa": model.asa,
+        "gcp_checkpoint": model.checkpoint,
+        "reachability": model.reachability,
+        "mesh": model.mesh,
+        "catalog_config": config if config is not None else doccatalog.load_config(REPO_ROOT),
+        "address_plan": address_plan,
+        "changes": changes,
+        "plan": plan,
+        "probes": probes,
     }
 
-    path_table = _format_path_table(context)
 
-    accelerator_label = "the accelerator DNS name"
-    if accelerator_dns:
-        accelerator_label = f"`{accelerator_dns}`"
-    accelerator_alias = context.get("global_accelerator_alias")
-    if accelerator_alias:
-        accelerator_label = f"`{accelerator_alias}` (alias for `{accelerator_dns}`)"
-    ga_ports = context.get("global_accelerator_listener_ports") or []
-    ports_note = ""
-    if ga_ports:
-        ports_note = f" on listener ports {', '.join(str(p) for p in ga_ports)}"
+def _render_credentials(creds: Optional[docmodel.Credentials]) -> str:
+    if creds is None:
+        return "user n/a / pass n/a"
+    return f"user {creds.username or 'n/a'} / pass {creds.password or 'n/a'}"
 
-    outputs_section = "Terraform outputs available." if outputs else "Terraform outputs unavailable (run `terraform apply` to populate dynamic values)."
-    if error:
-        outputs_section = f"Terraform outputs unavailable: {error.strip()}"
 
-    def _render_credentials(creds: Optional[Dict[str, Any]]) -> str:
-        if not isinstance(creds, dict):
-            return "user n/a / pass n/a"
-        username = creds.get("username") or "n/a"
-        password = creds.get("password") or "n/a"
-        return f"user {username} / pass {password}"
-
-    security_lines: list[str] = []
-
-    tgw_connect = context.get("tgw_connect") or {}
-    if isinstance(tgw_connect, dict) and tgw_connect:
-        security_lines.append("#### AWS Transit Gateway Connect (Fortinet)")
-        for region in sorted(tgw_connect.keys()):
-            entry = tgw_connect.get(region) or {}
-            connector = entry.get("connector") or {}
-            mgmt_ip = connector.get("management_ip") or connector.get("private_ip") or "pending"
-            creds = _render_credentials(connector.get("admin_credentials"))
+def _probed(context: Dict[str, Any], ip: Optional[str]) -> str:
+    # Status and latency after a management IP, or "" when probing is off.
+    target = _management_target(ip)
+    return docprobe.note(context.get("probes"), target) if target is not None else ""
+
+
+def _probed_ips(context: Dict[str, Any], ips: Tuple[str, ...]) -> str:
+    if context.get("probes") is not None and ips:
+        return ", ".join(f"`{ip}`{_probed(context, ip)}" for ip in ips)
+    return f"`{', '.join(ips) or 'pending'}`"
+
+
+def _render_accelerator_note(context: Dict[str, Any]) -> str:
+    accelerator = context["accelerator"]
+    if accelerator is None or not accelerator.address:
+        return "the accelerator DNS name"
+    accelerator_label = f"`{accelerator.address}`"
+    if accelerator.custom_domain and accelerator.dns_name:
+        accelerator_label = f"`{accelerator.custom_domain}` (alias for `{accelerator.dns_name}`)"
+    ports_note = ""
+    if accelerator.listener_ports:
+        probes = context.get("probes")
+        ports = [
+            f"{port}{docprobe.note(probes, _accelerator_target(accelerator, port)) if probes is not None else ''}"
+            for port in accelerator.listener_ports
+        ]
+        ports_note = f" on listener ports {', '.join(ports)}"
+    return f"{accelerator_label}{ports_note}"
+
+
+def _security_pieces(context: Dict[str, Any]) -> Iterator[docfragments.Piece]:
+    Piece = docfragments.Piece
+    tgw_connect = context["tgw_connect"]
+    if tgw_connect:
+        yield Piece("#### AWS Transit Gateway Connect (Fortinet)", (("aws", None),), heading=True)
+        for region, connect in sorted(tgw_connect.items()):
+            connector = connect.connector if connect is not None else None
+            mgmt_ip = (connector.management_ip or connector.private_ip) if connector is not None else None
+            creds = _render_credentials(connector.credentials if connector is not None else None)
             route_bits: list[str] = []
-            if entry.get("inspection_route_table_id"):
-                route_bits.append(f"inspection RT `{entry['inspection_route_table_id']}`")
-            if entry.get("appliance_route_table_id"):
-                route_bits.append(f"appliance RT `{entry['appliance_route_table_id']}`")
+            if connect is not None and connect.inspection_route_table_id:
+                route_bits.append(f"inspection RT `{connect.inspection_route_table_id}`")
+            if connect is not None and connect.appliance_route_table_id:
+                route_bits.append(f"appliance RT `{connect.appliance_route_table_id}`")
             route_note = f" ({', '.join(route_bits)})" if route_bits else ""
-            security_lines.append(f"- **{region}** — mgmt IP `{mgmt_ip}`{route_note} ({creds})")
-
-    gwlb = context.get("gwlb") or {}
-    if isinstance(gwlb, dict) and gwlb:
-        security_lines.append("\n#### AWS GWLB Palo Alto")
-        for region in sorted(gwlb.keys()):
-            entry = gwlb.get(region) or {}
-            firewalls = entry.get("firewalls") or {}
-            private_ips = firewalls.get("private_ips") or []
-            ip_display = ", ".join(private_ips) if private_ips else "pending"
-            creds = _render_credentials(firewalls.get("admin_credentials"))
-            security_lines.append(f"- **{region}** — firewalls `{ip_display}` ({creds})")
-
-    azure_asa = context.get("azure_asa") or {}
-    if isinstance(azure_asa, dict) and any(azure_asa.values()):
-        security_lines.append("\n#### Azure ASA NVAs")
-        for region in sorted(azure_asa.keys()):
-            info = azure_asa.get(region)
-            if not info:
+            yield Piece(
+                f"- **{region}** — mgmt IP `{mgmt_ip or 'pending'}`{_probed(context, mgmt_ip)}{route_note} ({creds})",
+                (("aws", region),),
+            )
+
+    gwlb = context["gwlb"]
+    if gwlb:
+        yield Piece("\n#### AWS GWLB Palo Alto", (("aws", None),), heading=True)
+        for region, entry in sorted(gwlb.items()):
+            private_ips = entry.private_ips if entry is not None else ()
+            creds = _render_credentials(entry.credentials if entry is not None else None)
+            yield Piece(f"- **{region}** — firewalls {_probed_ips(context, private_ips)} ({creds})", (("aws", region),))
+
+    azure_asa = context["azure_asa"]
+    if any(azure_asa.values()):
+        yield Piece("\n#### Azure ASA NVAs", (("azure", None),), heading=True)
+        for region, asa in sorted(azure_asa.items()):
+            if asa is None:
                 continue
-            private_ip = info.get("private_ip") or "pending"
-            public_ip = info.get("public_ip") or "n/a"
-            creds = _render_credentials(
-                {
-                    "username": info.get("admin_username"),
-                    "password": info.get("admin_password"),
-                }
+            yield Piece(
+                f"- **{region}** — private `{asa.private_ip or 'pending'}`{_probed(context, asa.private_ip)} "
+                f"/ public `{asa.public_ip or 'n/a'}`{_probed(context, asa.public_ip)} ({_render_credentials(asa.credentials)})",
+                (("azure", region),),
             )
-            security_lines.append(f"- **{region}** — private `{private_ip}` / public `{public_ip}` ({creds})")
-
-    gcp_checkpoint = context.get("gcp_checkpoint") or {}
-    if isinstance(gcp_checkpoint, dict) and any(gcp_checkpoint.values()):
-        security_lines.append("\n#### GCP Check Point Firewalls")
-        for region in sorted(gcp_checkpoint.keys()):
-            info = gcp_checkpoint.get(region)
-            if not info:
+
+    gcp_checkpoint = context["gcp_checkpoint"]
+    if any(gcp_checkpoint.values()):
+        yield Piece("\n#### GCP Check Point Firewalls", (("gcp", None),), heading=True)
+        for region, checkpoint in sorted(gcp_checkpoint.items()):
+            if checkpoint is None:
                 continue
-            private_ip = info.get("private_ip") or "pending"
-            creds = _render_credentials(
-                {
-                    "username": info.get("admin_username"),
-                    "password": info.get("admin_password"),
-                }
+            yield Piece(
+                f"- **{region}** — private `{checkpoint.private_ip or 'pending'}`{_probed(context, checkpoint.private_ip)} "
+                f"({_render_credentials(checkpoint.credentials)})",
+                (("gcp", region),),
             )
-            security_lines.append(f"- **{region}** — private `{private_ip}` ({creds})")
 
-    security_section = "\n".join(security_lines) if security_lines else "Security appliance outputs unavailable."
+    if not (tgw_connect or gwlb or any(azure_asa.values()) or any(gcp_checkpoint.values())):
+        yield Piece("Security appliance outputs unavailable.")
+
+
+def _render_security(context: Dict[str, Any]) -> str:
+    return "".join(docfragments.lines(_security_pieces(context)))
+
+
+def _first(regions: Dict[str, Any], preferred: str) -> Optional[str]:
+    # The region the demo script uses, else the first one with an appliance deployed.
+    if regions.get(preferred):
+        return preferred
+    return next((region for region in sorted(regions) if regions[region]), None)
 
-    appliance_inventory: list[str] = []
 
+def _appliance_pieces(context: Dict[str, Any]) -> Iterator[docfragments.Piece]:
+    Piece = docfragments.Piece
     default_fortinet_name = "skyforge-us-east-1-fortinet"
     default_paloalto_name = "skyforge-us-east-1-gwlb"
     default_asa_name = "vm-skyforge-uswest2-asa"
     default_checkpoint_name = "cp-us-central1-firewall"
 
-    if isinstance(context.get("tgw_connect"), dict) and context["tgw_connect"]:
-        fortinet_name = default_fortinet_name
-        fortinet = context["tgw_connect"].get("us-east-1") or {}
-        instance = fortinet.get("connector", {}).get("instance_id") or fortinet_name
-        appliance_inventory.append(f"- **Fortinet TGW Connect** (`{instance}`) — management IP `{fortinet.get('connector', {}).get('management_ip', 'pending')}`")
+    tgw_connect = context["tgw_connect"]
+    if tgw_connect:
+        connect = tgw_connect.get("us-east-1")
+        connector = connect.connector if connect is not None else None
+        instance = connector.instance_id if connector is not None else None
+        mgmt_ip = connector.management_ip if connector is not None else None
+        yield Piece(
+            f"- **Fortinet TGW Connect** (`{instance or default_fortinet_name}`) — management IP "
+            f"`{mgmt_ip or 'pending'}`{_probed(context, mgmt_ip)}",
+            (("aws", "us-east-1"),),
+        )
     else:
-        appliance_inventory.append(f"- **Fortinet TGW Connect** (`{default_fortinet_name}`) — deploy via `transit_gateway_connect.connector`")
+        yield Piece(
+            f"- **Fortinet TGW Connect** (`{default_fortinet_name}`) — deploy via `transit_gateway_connect.connector`",
+            (("aws", None),),
+        )
 
-    gwlb = context.get("gwlb") or {}
-    if isinstance(gwlb, dict) and gwlb:
-        palo = gwlb.get("ap-northeast-1") or gwlb.get("us-east-1") or {}
-        palo_instances = ", ".join(palo.get("firewalls", {}).get("private_ips", []) or []) or "pending"
-        appliance_inventory.append(f"- **Palo Alto GWLB** (`{default_paloalto_name}`) — endpoint IPs `{palo_instances}`")
+    gwlb = context["gwlb"]
+    if gwlb:
+        region = "ap-northeast-1" if gwlb.get("ap-northeast-1") else "us-east-1"
+        palo = gwlb.get(region)
+        palo_ips = palo.private_ips if palo is not None else ()
+        yield Piece(
+            f"- **Palo Alto GWLB** (`{default_paloalto_name}`) — endpoint IPs {_probed_ips(context, palo_ips)}",
+            (("aws", region),),
+        )
     else:
-        appliance_inventory.append(f"- **Palo Alto GWLB** (`{default_paloalto_name}`) — enable `enable_gateway_lb` in AWS regions")
-
-    asa_map = context.get("azure_asa") or {}
-    if isinstance(asa_map, dict) and asa_map:
-        asa = asa_map.get("uswest2") or next((asa_map[k] for k in sorted(asa_map) if asa_map[k]), None)
-        if asa:
-            appliance_inventory.append(f"- **Azure ASA** (`{asa.get('vm_id', default_asa_name)}`) — private `{asa.get('private_ip', 'pending')}` public `{asa.get('public_ip', 'n/a')}`")
+        yield Piece(f"- **Palo Alto GWLB** (`{default_paloalto_name}`) — enable `enable_gateway_lb` in AWS regions", (("aws", None),))
+
+    asa_map = context["azure_asa"]
+    if asa_map:
+        region = _first(asa_map, "uswest2")
+        if region is not None:
+            asa = asa_map[region]
+            yield Piece(
+                f"- **Azure ASA** (`{asa.vm_id or default_asa_name}`) — private `{asa.private_ip or 'pending'}`"
+                f"{_probed(context, asa.private_ip)} public `{asa.public_ip or 'n/a'}`{_probed(context, asa.public_ip)}",
+                (("azure", region),),
+            )
     else:
-        appliance_inventory.append(f"- **Azure ASA** (`{default_asa_name}`) — configure `asa_nva` per region")
-
-    checkpoint_map = context.get("gcp_checkpoint") or {}
-    if isinstance(checkpoint_map, dict) and checkpoint_map:
-        cp = checkpoint_map.get("us-central1") or next((checkpoint_map[k] for k in sorted(checkpoint_map) if checkpoint_map[k]), None)
-        if cp:
-            appliance_inventory.append(f"- **GCP Check Point** (`{cp.get('instance_id', default_checkpoint_name)}`) — private `{cp.get('private_ip', 'pending')}`")
+        yield Piece(f"- **Azure ASA** (`{default_asa_name}`) — configure `asa_nva` per region", (("azure", None),))
+
+    checkpoint_map = context["gcp_checkpoint"]
+    if checkpoint_map:
+        region = _first(checkpoint_map, "us-central1")
+        if region is not None:
+            checkpoint = checkpoint_map[region]
+            yield Piece(
+                f"- **GCP Check Point** (`{checkpoint.instance_id or default_checkpoint_name}`) — private "
+                f"`{checkpoint.private_ip or 'pending'}`{_probed(context, checkpoint.private_ip)}",
+                (("gcp", region),),
+            )
     else:
-        appliance_inventory.append(f"- **GCP Check Point** (`{default_checkpoint_name}`) — set `checkpoint_firewall` in GCP region config")
-
-    appliance_section = "\n".join(appliance_inventory)
-
-    reachability_lines: list[str] = []
-    if isinstance(reachability, dict) and reachability:
-        aws_reach = reachability.get("aws", {}) if isinstance(reachability.get("aws", {}), dict) else {}
-        if aws_reach:
-            aws_paths = aws_reach.get("paths", {}) or {}
-            aws_analysis = aws_reach.get("analyses", {}) or {}
-            if aws_paths or aws_analysis:
-                reachability_lines.append("#### AWS Reachability Analyzer")
-                if isinstance(aws_paths, dict) and aws_paths:
-                    for region in sorted(aws_paths.keys()):
-                        names = ", ".join(sorted(aws_paths[region].keys())) if isinstance(aws_paths[region], dict) else "--"
-                        reachability_lines.append(f"- **{region}** paths: {names}")
-                if isinstance(aws_analysis, dict) and aws_analysis:
-                    for region in sorted(aws_analysis.keys()):
-                        names = ", ".join(sorted(aws_analysis[region].keys())) if isinstance(aws_analysis[region], dict) else "--"
-                        reachability_lines.append(f"  - Analyses: {names}")
-        azure_reach = reachability.get("azure", {})
-        if isinstance(azure_reach, dict) and azure_reach:
-            reachability_lines.append("\n#### Azure Network Watcher")
-            for region in sorted(azure_reach.keys()):
-                monitor_names = ", ".join(sorted(azure_reach[region].keys())) if isinstance(azure_reach[region], dict) else "--"
-                reachability_lines.append(f"- **{region}** monitors: {monitor_names}")
-        gcp_reach = reachability.get("gcp", {})
-        if isinstance(gcp_reach, dict) and gcp_reach:
-            reachability_lines.append("\n#### GCP Connectivity Tests")
-            for region in sorted(gcp_reach.keys()):
-                test_names = ", ".join(sorted(gcp_reach[region].keys())) if isinstance(gcp_reach[region], dict) else "--"
-                reachability_lines.append(f"- **{region}** tests: {test_names}")
-
-    reachability_section = "\n".join(reachability_lines) if reachability_lines else "Reachability outputs unavailable."
-
-    validation_section = """1. `./bin/terraform fmt` (runs via pre-commit)
-2. `./bin/terraform validate`
-3. `./bin/terraform plan -var-file=...` for each environment
-4. `./bin/terraform apply -var-file=...` (staged per cloud if required)
-5. `./bin/terraform destroy -var-file=...`
-6. `python3 scripts/generate_demo_doc.py --no-serve`
-7. Run Forward reachability tests against published path catalog"""
-
-    return f"""# Skyforge Demo Workflow
-
-> Generated by `scripts/generate_demo_doc.py` on {timestamp}.
-> {outputs_section}
-
-## 1. Bootstrap & Planning
-
-```bash
-source .env.local
-./bin/terraform init
-./bin/terraform plan \\
-  -var-file="environments/aws/demo.auto.tfvars.json" \\
-  -var-file="environments/azure/demo.auto.tfvars.json" \\
-  -var-file="environments/gcp/demo.auto.tfvars.json" \\
-  -var-file="environments/vnfs/demo.auto.tfvars.json" \\
-  -var-file="environments/network/demo.mesh.auto.tfvars.json"
-```
-
-Review the plan output to confirm:
-
-- AWS builds three application regions (us-east-1, eu-central-1, ap-northeast-1) with VPCs for shared services, DMZ, bastion, logging, and serverless workloads.
-- TGW mesh peering connects the regions and TGW Connect is provisioned in us-east-1.
-- Azure and GCP stacks are staged for mesh integration.
-- The VNF manifest generates VPN connectivity for the on-prem sites.
-
-## 2. Apply the Demo Environment
-
-```bash
-./bin/terraform apply -auto-approve \\
-  -var-file="environments/aws/demo.auto.tfvars.json" \\
-  -var-file="environments/azure/demo.auto.tfvars.json" \\
-  -var-file="environments/gcp/demo.auto.tfvars.json" \\
-  -var-file="environments/vnfs/demo.auto.tfvars.json" \\
-  -var-file="environments/network/demo.mesh.auto.tfvars.json"
-```
-
-Expect the apply to take 20–30 minutes depending on quotas and regional capacity. Key components include:
-
-- Three-tier application stacks (ALB/ASG/EKS/RDS) in each AWS region.
-- Regional security constructs (TGW mesh, Network Firewall, GWLB/Palo Alto).
-- Additional security groups, network ACLs, and subnet tiers in the bastion/logging/serverless VPCs.
-- Azure vWAN + workloads and GCP HA VPN + workloads for cross-cloud paths.
-- Updated VNF manifest in `outputs/vpn-endpoints.json`.
-
-## 3. Post-Deploy Validation
-
-1. **Check Terraform outputs**
-   ```bash
-   ./bin/terraform output -json | jq '.multi_cloud_load_balancing'
-   ./bin/terraform output vpn_endpoint_manifest | jq '.'
-   ```
-2. **Application reachability**
-   - Resolve the DNS names for each regional ALB (returned in the `application_albs` output).
-- If Global Accelerator is enabled, test {accelerator_label}{ports_note} and confirm traffic fails over when you stop an ALB or GWLB endpoint.
-3. **Security posture**
-   - Inspect the security groups (`bastion-admin`, `logging-ingest`, `lambda-egress`, `gwlb-management`, etc.) and the network ACLs generated for DMZ/data/logging tiers.
-   - Check TGW peering attachments and route tables to ensure each region advertises the new VPC CIDRs.
-4. **Cross-cloud mesh**
-   - Review Azure vWAN connections and GCP HA VPN tunnels to confirm they picked up the new mesh links.
-5. **VNF inventory**
-   - Inspect `outputs/vpn-endpoints.json` for generated PSKs, tunnel metadata, and on-prem connectivity entries for San Jose, Atlanta, and Dubai sites.
-
-## 4. Demo Scenarios
-
-Use the environment to highlight typical Forward Networks analyses:
-
-### L4–L7 Path Catalog (use Forward Path Search)
-
-{path_table}
-
-### Security Appliance Credentials
-
-{security_section}
-
-### Appliance Inventory (Names & Tags)
+        yield Piece(
+            f"- **GCP Check Point** (`{default_checkpoint_name}`) — set `checkpoint_firewall` in GCP region config",
+            (("gcp", None),),
+        )
 
-{appliance_section}
 
-### Reachability Outputs
+def _render_appliances(context: Dict[str, Any]) -> str:
+    return "".join(docfragments.lines(_appliance_pieces(context)))
 
-{reachability_section}
 
-### Validation Checklist
+def _test_names(index: docreach.ReachabilityIndex, cloud: str, region: str, kind: str) -> str:
+    names = index.names(cloud, region, kind)
+    if not names:
+        return "--"
+    if len(names) <= REACHABILITY_LIST_LIMIT:
+        return ", ".join(names)
+    # Hundreds of names are unreadable inline; the API pages through them.
+    shown = ", ".join(names[:REACHABILITY_LIST_LIMIT])
+    return f"{shown} … {len(names) - REACHABILITY_LIST_LIMIT} more (`/api/reachability?cloud={cloud}&region={region}`)"
 
-{validation_section}
 
-- **Security group & ACL audits** – verify the bastion/logging/serverless security policies and the DMZ/data network ACLs.
-- **Firewall policy review** – inspect Palo Alto address/service objects, AWS Network Firewall Suricata rules, and Azure Firewall collections for the expected demo flows.
-- **TGW mesh visualisation** – confirm the full-mesh peering and on-prem VPN stubs.
-- **Cross-cloud mesh checks** – validate AWS↔Azure and AWS↔GCP paths using the generated VPN credentials.
+def _reachability_pieces(context: Dict[str, Any]) -> Iterator[docfragments.Piece]:
+    Piece = docfragments.Piece
+    index = docreach.index_for(context.get("reachability"))
+    regions = index.regions
+    if regions.get(("aws", "path")) or regions.get(("aws", "analysis")):
+        yield Piece("#### AWS Reachability Analyzer", (("aws", None),), heading=True)
+        for region in regions.get(("aws", "path"), ()):
+            yield Piece(f"- **{region}** paths: {_test_names(index, 'aws', region, 'path')}", (("aws", region),))
+        for region in regions.get(("aws", "analysis"), ()):
+            yield Piece(f"  - Analyses: {_test_names(index, 'aws', region, 'analysis')}", (("aws", region),))
+    if regions.get(("azure", "monitor")):
+        yield Piece("\n#### Azure Network Watcher", (("azure", None),), heading=True)
+        for region in regions[("azure", "monitor")]:
+            yield Piece(f"- **{region}** monitors: {_test_names(index, 'azure', region, 'monitor')}", (("azure", region),))
+    if regions.get(("gcp", "test")):
+        yield Piece("\n#### GCP Connectivity Tests", (("gcp", None),), heading=True)
+        for region in regions[("gcp", "test")]:
+            yield Piece(f"- **{region}** tests: {_test_names(index, 'gcp', region, 'test')}", (("gcp", region),))
+    if not (regions.get(("aws", "path")) or regions.get(("aws", "analysis")) or regions.get(("azure", "monitor")) or regions.get(("gcp", "test"))):
+        yield Piece("Reachability outputs unavailable.")
 
-## 5. Teardown
 
-Always destroy the environment after the demo to minimise cloud spend:
+def _render_reachability(context: Dict[str, Any]) -> Iterator[str]:
+    return docfragments.lines(_reachability_pieces(context))
 
-```bash
-./bin/terraform destroy -auto-approve \\
-  -var-file="environments/aws/demo.auto.tfvars.json" \\
-  -var-file="environments/azure/demo.auto.tfvars.json" \\
-  -var-file="environments/gcp/demo.auto.tfvars.json" \\
-  -var-file="environments/vnfs/demo.auto.tfvars.json" \\
-  -var-file="environments/network/demo.mesh.auto.tfvars.json"
-```
 
-Validate in AWS, Azure, and GCP consoles that resources have been deleted (especially TGW peering attachments and Global Accelerator endpoints, which can take several minutes to release).
+def _render_mesh(context: Dict[str, Any]) -> str:
+    # Same precedence as the path catalog: deployed mesh first, then tfvars.
+    mesh = context.get("mesh") or (context.get("catalog_config") or {}).get("vpn_mesh") or {}
+    graph = docmesh.MeshGraph.from_mesh(mesh if isinstance(mesh, dict) else {})
+    return "\n".join(docmesh.render_report(docmesh.analyse(graph)))
 
----
 
-Keep this document alongside the Terraform configs so the demo workflow stays consistent with future changes. Update it as you introduce new regions, workloads, or validation steps – or simply rerun `python scripts/generate_demo_doc.py` after each deployment.
-"""
+def _render_address_plan(context: Dict[str, Any]) -> str:
+    report = context["address_plan"]
+    if report is None:
+        return "Not checked for this target: the environment tfvars describe this workspace, not these outputs."
+    from demodoc import prefixes as docprefixes
 
+    return "\n".join(docprefixes.render_report(report))
 
-def _start_server(host: str, doc_path: pathlib.Path) -> None:
-    class RequestHandler(http.server.BaseHTTPRequestHandler):
-        def do_GET(self) -> None:  # noqa: N802
-            if self.path not in ("/", "/index.html"):
-                self.send_error(HTTPStatus.NOT_FOUND)
-                return
-            try:
-                content = doc_path.read_text(encoding="utf-8")
-            except FileNotFoundError:
-                content = "# documentation not found\n"
-            body = f"<html><body><pre>{html.escape(content)}</pre></body></html>".encode("utf-8")
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-Type", "text/html; charset=utf-8")
-            self.send_header("Content-Length", str(len(body)))
-            self.end_headers()
-            self.wfile.write(body)
-
-        def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
+
+def _render_changes(context: Dict[str, Any]) -> str:
+    from demodoc import snapshots as docsnapshots
+
+    return "\n".join(docsnapshots.render_changes(context["changes"]))
+
+
+def _render_plan(context: Dict[str, Any]) -> str:
+    return "\n".join(docplan.render_plan(context["plan"]))
+
+
+def _probe_pieces(context: Dict[str, Any]) -> Iterator[docfragments.Piece]:
+    Piece = docfragments.Piece
+    probes = context.get("probes")
+    if probes is None:
+        yield Piece(
+            "Endpoints not probed. Run `./scripts/generate_demo_doc.py --probe` to check that each ALB, "
+            "the accelerator listeners and the appliance management IPs answer."
+        )
+        return
+    rows = [(label, target, scope, probes.get(target.key)) for label, target, scope in _probe_targets(context)]
+    if not rows:
+        yield Piece("No endpoints to probe in the current outputs.")
+        return
+    up = sum(result is not None and result.status == "up" for _, _, _, result in rows)
+    yield Piece(f"{up} of {len(rows)} endpoints answered.")
+    yield Piece("\n| Endpoint | Check | Status | Latency |", heading=True)
+    yield Piece("|---|---|---|---:|", heading=True)
+    for label, target, scope, result in rows:
+        status, latency = ("not probed", "") if result is None else (f"{result.status} ({result.detail})", "")
+        if result is not None and result.latency_ms is not None:
+            latency = f"{result.latency_ms} ms"
+        yield Piece(f"| {label} `{target.host}` | {target.kind.upper()} :{target.port} | {status} | {latency} |", (scope,))
+
+
+def _render_probes(context: Dict[str, Any]) -> Iterator[str]:
+    return docfragments.lines(_probe_pieces(context))
+
+
+# Each section lists the context keys it reads; its memo key is a hash of
+# exactly those values, so unrelated output changes leave it cached.
+# Renderers return the section text or an iterable of chunks for big sections.
+SECTIONS: Tuple[Tuple[str, Tuple[str, ...], Callable[[Dict[str, Any]], Union[str, Iterable[str]]]], ...] = (
+    (
+        "path_catalog",
+        (
+            "accelerator",
+            "application_albs",
+            "tgw_connect",
+            "gwlb",
+            "reachability",
+            "mesh",
+            "catalog_config",
+        ),
+        _format_path_table,
+    ),
+    ("mesh", ("mesh", "catalog_config"), _render_mesh),
+    ("address_plan", ("address_plan",), _render_address_plan),
+    ("accelerator_note", ("accelerator", "probes"), _render_accelerator_note),
+    ("security", ("tgw_connect", "gwlb", "azure_asa", "gcp_checkpoint", "probes"), _render_security),
+    ("appliances", ("tgw_connect", "gwlb", "azure_asa", "gcp_checkpoint", "probes"), _render_appliances),
+    (
+        "probes",
+        (
+            "application_albs",
+            "accelerator",
+            "tgw_connect",
+            "gwlb",
+            "azure_asa",
+            "gcp_checkpoint",
+            "probes",
+        ),
+        _render_probes,
+    ),
+    ("reachability", ("reachability",), _render_reachability),
+    ("changes", ("changes",), _render_changes),
+    ("plan", ("plan",), _render_plan),
+)
+
+
+_RENDERERS = {name: (keys, renderer) for name, keys, renderer in SECTIONS}
+
+# Sections the server answers filtered views of (/?section=&cloud=&region=),
+# with their doc headings. Those with a pieces function are also split per
+# cloud and region; the others are only served whole.
+FRAGMENT_SECTIONS: Tuple[Tuple[str, str, Optional[Callable[[Dict[str, Any]], Iterable[docfragments.Piece]]]], ...] = (
+    ("path_catalog", "L4–L7 Path Catalog (use Forward Path Search)", _path_pieces),
+    ("mesh", "VPN Mesh Topology", None),
+    ("address_plan", "Address Plan Overlaps", None),
+    ("security", "Security Appliance Credentials", _security_pieces),
+    ("appliances", "Appliance Inventory (Names & Tags)", _appliance_pieces),
+    ("probes", "Endpoint Probes", _probe_pieces),
+    ("reachability", "Reachability Outputs", _reachability_pieces),
+    ("changes", "Changes Since the Previous Snapshot", None),
+    ("plan", "Planned Resources", None),
+)
+
+
+def _header(timestamp: str, outputs: Optional[Dict[str, Any]], error: Optional[str]) -> Dict[str, str]:
+    outputs_section = "Terraform outputs available." if outputs else "Terraform outputs unavailable (run `terraform apply` to populate dynamic values)."
+    if error:
+        outputs_section = f"Terraform outputs unavailable: {error.strip()}"
+    return {"timestamp": timestamp, "outputs_section": outputs_section}
+
+
+def load_template(path: Optional[pathlib.Path] = None, use_cache: bool = True) -> doctemplates.Template:
+    """The compiled doc template at ``path`` (default: the demo workflow template)."""
+    from demodoc import templates as doctemplates
+
+    return doctemplates.load(path or TEMPLATE_PATH, TEMPLATE_CACHE if use_cache else None)
+
+
+def _template_scope(
+    context: Dict[str, Any],
+    fields: Dict[str, str],
+    sections: Optional[docsections.SectionCache],
+) -> Dict[str, Any]:
+    # Sections are callables, rendered only when the template reaches them;
+    # the model values stay available under their context names for loops.
+    scope: Dict[str, Any] = {**context, **fields, "var_files": VAR_FILES}
+    for name in _RENDERERS:
+        scope[name] = lambda name=name: _section_chunks(name, context, sections)
+    return scope
+
+
+def iter_render(
+    outputs: Optional[Dict[str, Any]],
+    error: Optional[str],
+    sections: Optional[docsections.SectionCache] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    probes: Optional[Dict[str, docprobe.Result]] = None,
+    template: Optional[doctemplates.Template] = None,
+    tfvars: bool = True,
+    address_plan: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """Yield the document as chunks: template text, section text and table rows.
+
+    Sections are produced lazily as the template reaches them, so a consumer
+    that writes each chunk out holds at most one chunk (plus the outputs)
+    in memory. ``tfvars`` is False for outputs that ``workspace_outputs``
+    says the demo tfvars do not describe. ``address_plan`` is a report
+    already checked this run; it is checked here otherwise.
+    """
+    if template is None:
+        template = load_template()
+    if address_plan is None:
+        address_plan = _address_plan(tfvars)
+    timestamp = _dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    context = _build_context(outputs, _catalog_config(tfvars), changes, plan, probes, address_plan)
+    scope = _template_scope(context, _header(timestamp, outputs, error), sections)
+    # A name the template cannot fill fails before anything is written.
+    template.check(scope)
+    yield from template.render(scope)
+
+
+def iter_section(
+    name: str,
+    outputs: Optional[Dict[str, Any]],
+    sections: Optional[docsections.SectionCache] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    probes: Optional[Dict[str, docprobe.Result]] = None,
+    tfvars: bool = True,
+    address_plan: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """Yield one ``SECTIONS`` entry exactly as it appears in the document."""
+    if address_plan is None and "address_plan" in _RENDERERS[name][0]:
+        address_plan = _address_plan(tfvars)
+    context = _build_context(outputs, _catalog_config(tfvars), changes, plan, probes, address_plan)
+    yield from _section_chunks(name, context, sections)
+
+
+def _section_chunks(
+    name: str,
+    context: Dict[str, Any],
+    sections: Optional[docsections.SectionCache],
+) -> Iterable[str]:
+    keys, renderer = _RENDERERS[name]
+    if sections is None:
+        return _chunks(renderer(context))
+    inputs = [context.get(key) for key in keys]
+    return sections.stream(name, inputs, lambda: _chunks(renderer(context)))
+
+
+def _chunks(rendered: Union[str, Iterable[str]]) -> Iterable[str]:
+    return (rendered,) if isinstance(rendered, str) else rendered
+
+
+def write_fragments(
+    outputs: Optional[Dict[str, Any]],
+    sections: Optional[docsections.SectionCache] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    probes: Optional[Dict[str, docprobe.Result]] = None,
+    directory: pathlib.Path = FRAGMENTS_DIR,
+    tfvars: bool = True,
+    address_plan: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Store the per-section, per-cloud and per-region fragments the server's filtered views are cut from.
+
+    Only sections whose inputs changed since the last call are split again.
+    """
+    if address_plan is None:
+        address_plan = _address_plan(tfvars)
+    context = _build_context(outputs, _catalog_config(tfvars), changes, plan, probes, address_plan)
+
+    def pieces(name: str, split: Optional[Callable[[Dict[str, Any]], Iterable[docfragments.Piece]]]) -> Iterable[docfragments.Piece]:
+        if split is not None:
+            return split(context)
+        # Served whole: the section text as the doc has it (memoized).
+        return (docfragments.Piece("".join(_section_chunks(name, context, sections))),)
+
+    entries = [
+        (name, title, [context.get(key) for key in _RENDERERS[name][0]], lambda name=name, split=split: pieces(name, split))
+        for name, title, split in FRAGMENT_SECTIONS
+    ]
+    return docfragments.write(directory, entries, RENDER_SALT)
+
+
+def render(
+    outputs: Optional[Dict[str, Any]],
+    error: Optional[str],
+    sections: Optional[docsections.SectionCache] = None,
+    changes: Optional[Dict[str, Any]] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    probes: Optional[Dict[str, docprobe.Result]] = None,
+    template: Optional[doctemplates.Template] = None,
+    tfvars: bool = True,
+    address_plan: Optional[Dict[str, Any]] = None,
+) -> str:
+    return "".join(iter_render(outputs, error, sections, changes, plan, probes, template, tfvars, address_plan))
+
+
+def _start_server(
+    host: str,
+    doc_path: pathlib.Path,
+    events: Optional[docserver.EventBroker] = None,
+    registry: Optional[docmetrics.Registry] = None,
+    catalog: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None,
+    reachability: Optional[Callable[[], docreach.ReachabilityIndex]] = None,
+    site: Optional[pathlib.Path] = None,
+) -> docserver.DocServer:
+    from demodoc import server as docserver
+    from demodoc import site as docsite
+
+    documents = docserver.DocumentCache(doc_path, live_reload=events is not None)
+    httpd = docserver.DocServer(
+        (host, 0),
+        documents,
+        events=events,
+        metrics=registry,
+        catalog=catalog,
+        reachability=reachability,
+        site=docsite.StaticSite(site) if site is not None else None,
+        fragments=docfragments.FragmentStore(FRAGMENTS_DIR),
+    )
+    port = httpd.server_address[1]
+    addr = f"http://{host}:{port}/"
+    print(f"Serving demo workflow at {addr} (Ctrl+C to stop)")
+    if site is not None:
+        print(f"Serving the static site build at {addr}{docserver.SITE_PREFIX.lstrip('/')}")
+    return httpd
+
+
+def _write_doc(chunks: Iterable[str], sections: Optional[docsections.SectionCache]) -> bool:
+    written = docsections.write_chunks_if_changed(DOC_PATH, chunks, VOLATILE_LINES, sections)
+    if sections is not None:
+        sections.save()
+    if written:
+        print(f"Updated {DOC_PATH.relative_to(REPO_ROOT)}")
+    else:
+        print(f"Unchanged {DOC_PATH.relative_to(REPO_ROOT)} (no content change since the last generation)")
+    return written
+
+
+def _regenerate(
+    outputs: Optional[Dict[str, Any]],
+    error: Optional[str],
+    sections: Optional[docsections.SectionCache],
+    timings: docmetrics.PhaseTimings,
+    snapshots: bool = True,
+    plan: Optional[Dict[str, Any]] = None,
+    prober: Optional[docprobe.Prober] = None,
+    site: Optional[pathlib.Path] = None,
+    template: Optional[doctemplates.Template] = None,
+    tfvars: bool = True,
+) -> bool:
+    with timings.phase("snapshot"):
+        changes = record_snapshot(outputs, enabled=snapshots)
+    probes = run_probes(outputs, prober, timings)
+    with timings.phase("prefixes"):
+        # Once for the doc and its fragments; memoised across runs on the tfvars' stat signatures.
+        address_plan = _address_plan(tfvars)
+    # Rendering is lazy, so render and write interleave chunk by chunk and
+    # are timed as one phase.
+    with timings.phase("render.write") as phase:
+        hits, misses = (sections.hits, sections.misses) if sections is not None else (0, 0)
+        written = _write_doc(
+            iter_render(outputs, error, sections, changes, plan, probes, template, tfvars, address_plan), sections
+        )
+        phase["written"] = written
+        if sections is not None:
+            phase.update(section_hits=sections.hits - hits, section_misses=sections.misses - misses)
+    with timings.phase("fragments") as phase:
+        phase["written"] = write_fragments(outputs, sections, changes, plan, probes, tfvars=tfvars, address_plan=address_plan)
+    if site is not None:
+        with timings.phase("site", path=str(site)) as phase:
+            manifest, pages_written = build_site(outputs, site, tfvars=tfvars)
+            phase.update(pages=len(manifest["pages"]), pages_written=pages_written)
+    return written
+
+
+def _emit_timings(destination: str, payload: Dict[str, Any]) -> None:
+    line = json.dumps(payload, sort_keys=False)
+    if destination == "-":
+        print(line, flush=True)
+        return
+    # One JSON object per line so watch sessions append a record per regeneration.
+    with open(destination, "a", encoding="utf-8") as handle:
+        handle.write(line + "\n")
+
+
+def _record(
+    timings: docmetrics.PhaseTimings,
+    written: bool,
+    registry: docmetrics.Registry,
+    destination: Optional[str],
+) -> None:
+    docmetrics.observe_regeneration(registry, timings, written)
+    if destination:
+        _emit_timings(destination, timings.as_dict())
+
+
+def _observe_caches(registry: docmetrics.Registry, sections: Optional[docsections.SectionCache]) -> None:
+    docmetrics.observe_cache(registry, "outputs", OUTPUTS_CACHE.hits, OUTPUTS_CACHE.misses)
+    if sections is not None:
+        docmetrics.observe_cache(registry, "sections", sections.hits, sections.misses)
+
+
+def _batch_job(job: docbatch.BatchJob) -> Dict[str, Any]:
+    timings = docmetrics.PhaseTimings()
+    with timings.phase("load"):
+        outputs, error = _checked(
+            *_load_outputs(
+                job.state_path,
+                use_cache=job.use_cache,
+                workspace=job.workspace,
+                workdir=job.workdir,
+                timeout=job.timeout,
+                timings=timings,
+            )
+        )
+    sections = None
+    if job.use_cache:
+        sections = docsections.SectionCache(CACHE_DIR / "batch" / f"{job.name}.sections.json", RENDER_SALT)
+    with timings.phase("snapshot"):
+        # One history per target, so each doc diffs against its own past.
+        changes = record_snapshot(outputs, job.name, job.use_cache)
+    with timings.phase("render.write"):
+        # Compiled in the parent before the pool forked, so this is a lookup.
+        template = load_template(job.template, job.use_cache)
+        job.doc_path.parent.mkdir(parents=True, exist_ok=True)
+        written = docsections.write_chunks_if_changed(
+            job.doc_path,
+            # Batch targets are other workspaces and state files: the demo
+            # tfvars do not describe them.
+            iter_render(outputs, error, sections, changes, template=template, tfvars=False),
+            VOLATILE_LINES,
+            sections,
+        )
+        if sections is not None:
+            sections.save()
+    return {
+        "name": job.name,
+        "status": "ok" if outputs else "no outputs",
+        "error": error,
+        "written": written,
+        "load_s": timings.seconds("load"),
+        "render_s": timings.seconds("render.write"),
+        "total_s": timings.total,
+        "timings": timings.as_dict(),
+    }
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    from demodoc import batch as docbatch
+
+    jobs = docbatch.resolve_targets(
+        args.batch,
+        REPO_ROOT,
+        args.batch_dir,
+        timeout=args.job_timeout or None,
+        use_cache=not args.no_cache,
+        template=args.template,
+        template_dir=args.template_dir,
+    )
+    # Each distinct template is compiled once here; workers only fill slots.
+    for path in sorted({job.template or TEMPLATE_PATH for job in jobs}):
+        _load_template_or_exit(path, not args.no_cache)
+    started = time.perf_counter()
+    results = docbatch.run_batch(_batch_job, jobs, args.jobs, args.job_timeout or None)
+    print(docbatch.format_summary(results, time.perf_counter() - started))
+    if args.timings:
+        for result in results:
+            _emit_timings(args.timings, {"job": result["name"], **result.get("timings", {})})
+    return 0 if all(result.get("status") == "ok" for result in results) else 1
+
+
+def _load_template_or_exit(path: Optional[pathlib.Path], use_cache: bool) -> doctemplates.Template:
+    from demodoc import templates as doctemplates
+
+    try:
+        template = load_template(path, use_cache)
+        # Every name a render offers, so a typo fails here rather than mid-run.
+        template.check(_template_scope(_build_context(None), _header("", None, None), None))
+    except doctemplates.TemplateError as exc:
+        raise SystemExit(f"error: {exc}")
+    return template
+
+
+def _export_catalog(outputs: Optional[Dict[str, Any]], fmt: str, destination: str, tfvars: bool = True) -> None:
+    chunks = docexport.iter_export(catalog_flows(outputs, tfvars), fmt)
+    if destination == "-":
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        sys.stdout.flush()
+        return
+    with open(destination, "w", encoding="utf-8", newline="") as handle:
+        for chunk in chunks:
+            handle.write(chunk)
+
+
+def _diff_snapshots(refs: List[str]) -> None:
+    from demodoc import snapshots as docsnapshots
+
+    store = _snapshot_store()
+    old_ref = refs[0] if refs else "previous"
+    stream, old = store.resolve(old_ref)
+    _, new = store.resolve(refs[1] if len(refs) > 1 else f"{stream}:latest")
+    print(f"{old['id'][:12]} ({old['at']}) → {new['id'][:12]} ({new['at']})")
+    count = 0
+    for change in store.diff(old["id"], new["id"]):
+        print(f"- {docsnapshots.format_change(change)}")
+        count += 1
+    print(f"{count} change{'s' if count != 1 else ''}")
+
+
+def _list_snapshots(stream: Optional[str]) -> None:
+    from demodoc import snapshots as docsnapshots
+
+    stream = stream or docsnapshots.DEFAULT_STREAM
+    history = _snapshot_store().history(stream)
+    if not history:
+        raise docsnapshots.SnapshotError(f"no snapshots recorded for {stream!r}")
+    for index, record in enumerate(history):
+        count = record.get("count")
+        changes = "first" if count is None else f"{count} change{'s' if count != 1 else ''}"
+        print(f"{index:>4}  {record['id'][:12]}  {record['at']}  {changes}")
+
+
+def _update_event(doc_path: pathlib.Path) -> str:
+    from demodoc import server as docserver
+
+    # Small docs are pushed inline; for streamed ones the page refetches.
+    try:
+        if doc_path.stat().st_size <= docserver.STREAM_THRESHOLD:
+            return json.dumps({"markdown": doc_path.read_text(encoding="utf-8")})
+    except OSError:
+        pass
+    return json.dumps({"reload": True})
+
+
+def _watch(
+    poller: docwatch.OutputsPoller,
+    events: Optional[docserver.EventBroker],
+    interval: float,
+    sections: Optional[docsections.SectionCache],
+    registry: docmetrics.Registry,
+    timings_destination: Optional[str] = None,
+    latest: Optional[Dict[str, Any]] = None,
+    snapshots: bool = True,
+    plan: Optional[Dict[str, Any]] = None,
+    prober: Optional[docprobe.Prober] = None,
+    site: Optional[pathlib.Path] = None,
+    template: Optional[doctemplates.Template] = None,
+    tfvars: bool = True,
+) -> None:
+    print(f"Watching {poller.state_path} for output changes every {interval:g}s")
+    while True:
+        time.sleep(interval)
+        timings = docmetrics.PhaseTimings()
+        with timings.phase("load.poll"):
+            outputs = poller.poll()
+        if outputs is None:
+            continue
+        outputs, error = _checked(outputs, None)
+        if error is not None:
+            print(f"warning: {error}", file=sys.stderr)
+        if latest is not None:
+            latest["outputs"] = outputs
+        written = _regenerate(outputs, error, sections, timings, snapshots, plan, prober, site, template, tfvars)
+        if written and events is not None:
+            with timings.phase("publish"):
+                events.publish("update", _update_event(DOC_PATH))
+        _record(timings, written, registry, timings_destination)
+
+
+def _prober(args: argparse.Namespace) -> Optional[docprobe.Prober]:
+    if not args.probe:
+        return None
+    return docprobe.Prober(
+        args.probe_timeout,
+        args.probe_concurrency,
+        args.probe_ttl,
+        None if args.no_cache else PROBE_CACHE,
+    )
+
+
+def _run_daemon(
+    args: argparse.Namespace,
+    state_path: Optional[pathlib.Path],
+    template: Optional[doctemplates.Template] = None,
+) -> None:
+    """Keep outputs and sections warm and answer requests on ``args.socket``.
+
+    Requests are serialised on one lock, except ``status``, which reports
+    while a regeneration is still running.
+    """
+    from demodoc import daemon as docdaemon
+
+    use_cache = not args.no_cache
+    cache = OUTPUTS_CACHE if use_cache else None
+    sections = docsections.SectionCache(CACHE_DIR / "sections.json", RENDER_SALT) if use_cache else None
+    registry = docmetrics.Registry()
+    registry.on_collect(lambda: _observe_caches(registry, sections))
+    prober = _prober(args)
+    tfvars = workspace_outputs(state_path)
+    lock = threading.Lock()
+    warm: Dict[str, Any] = {"outputs": None, "error": None, "loaded_at": None, "poller": None, "last": None}
+
+    def load(timings: docmetrics.PhaseTimings) -> None:
+        poller = warm["poller"]
+        if poller is not None:
+            # Once outputs came from the state file, a reload is one stat
+            # unless the state moved.
+            with timings.phase("load.poll"):
+                outputs = poller.poll()
+            if outputs is not None:
+                outputs, error = _checked(outputs, None)
+                warm.update(outputs=outputs, error=error, loaded_at=time.time())
             return
+        with timings.phase("load"):
+            outputs, error = _checked(*_load_outputs(state_path, use_cache=use_cache, timings=timings))
+        warm.update(outputs=outputs, error=error, loaded_at=time.time())
+        if outputs is not None and error is None and state_path is not None and state_path.is_file():
+            warm["poller"] = docwatch.OutputsPoller(
+                state_path,
+                lambda: tfstate.load_state_outputs(state_path, cache, OUTPUT_KEYS),
+                outputs,
+            )
 
-    with socketserver.TCPServer((host, 0), RequestHandler) as httpd:
-        port = httpd.server_address[1]
-        addr = f"http://{host}:{port}/"
-        print(f"Serving demo workflow at {addr} (Ctrl+C to stop)")
+    def regenerate(request: Dict[str, Any]) -> Tuple[Dict[str, Any], None]:
+        timings = docmetrics.PhaseTimings()
+        with lock:
+            if request.get("reload", True):
+                load(timings)
+            written = _regenerate(
+                warm["outputs"],
+                warm["error"],
+                sections,
+                timings,
+                use_cache,
+                prober=prober,
+                site=args.site,
+                template=template,
+                tfvars=tfvars,
+            )
+            _record(timings, written, registry, args.timings)
+            warm["last"] = {"at": time.time(), "written": written, "seconds": round(timings.total, 6)}
+        header = {
+            "doc": str(DOC_PATH.relative_to(REPO_ROOT)),
+            "written": written,
+            "outputs": warm["outputs"] is not None,
+            "error": warm["error"],
+            "seconds": timings.total,
+        }
+        return header, None
+
+    def get_section(request: Dict[str, Any]) -> Tuple[Dict[str, Any], Iterator[str]]:
+        name = request.get("name")
+        if name not in _RENDERERS:
+            raise docdaemon.RequestError(f"unknown section {name!r} (expected one of {', '.join(_RENDERERS)})")
+
+        with lock:
+            changes = record_snapshot(warm["outputs"], enabled=use_cache) if name == "changes" else None
+            # Fresh results come from the probe cache; stale ones are re-checked.
+            probes = run_probes(warm["outputs"], prober) if "probes" in _RENDERERS[name][0] else None
+            # Sections are small: render under the lock and stream after
+            # releasing it, so a client that stops reading blocks no one else.
+            chunks = list(iter_section(name, warm["outputs"], sections, changes, probes=probes, tfvars=tfvars))
+            if sections is not None:
+                sections.save()
+        return {"section": name}, iter(chunks)
+
+    def status() -> Dict[str, Any]:
+        return {
+            "busy": lock.locked(),
+            "doc": str(DOC_PATH.relative_to(REPO_ROOT)),
+            "source": str(state_path) if warm["poller"] is not None else "terraform output",
+            "outputs": warm["outputs"] is not None,
+            "error": warm["error"],
+            "loaded_at": warm["loaded_at"],
+            "last_regeneration": warm["last"],
+            "section_cache": {"hits": sections.hits, "misses": sections.misses} if sections is not None else None,
+            "sections": list(_RENDERERS),
+        }
+
+    try:
+        server = docdaemon.DocDaemon(args.socket, {"regenerate": regenerate, "get-section": get_section}, status)
+    except docdaemon.DaemonError as exc:
+        raise SystemExit(f"error: {exc}")
+    # Warm everything before the first request is accepted.
+    regenerate({"reload": True})
+
+    def _terminate(signum: int, frame: Any) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    print(f"Generator daemon listening on {args.socket} (pid {os.getpid()}, Ctrl+C to stop)", flush=True)
+    with server:
         try:
-            httpd.serve_forever()
+            server.serve_forever()
         except KeyboardInterrupt:
-            print("\nStopping documentation server")
+            print("\nStopping generator daemon")
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate demo doc and optionally serve it")
+    parser = argparse.ArgumentParser(description="Generate demo doc and optionally serve it", fromfile_prefix_chars="@")
     parser.add_argument("--no-serve", action="store_true", help="Do not launch the local documentation server")
     parser.add_argument("--host", default="127.0.0.1", help="Host interface for the local server (default: 127.0.0.1)")
+    parser.add_argument(
+        "--state",
+        type=pathlib.Path,
+        help="Read outputs from this state file, e.g. from `terraform state pull` (default: the local workspace state when present)",
+    )
+    parser.add_argument("--no-state", action="store_true", help="Always run `terraform output -json` instead of reading state")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the parsed outputs cache")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep polling the state file, regenerate when outputs change and push updates to open pages",
+    )
+    parser.add_argument("--watch-interval", type=float, default=2.0, help="Seconds between state polls (default: 2)")
+    parser.add_argument(
+        "--batch",
+        nargs="+",
+        metavar="TARGET",
+        help="Generate one doc per state file, Terraform directory or workspace name (use @file to read targets from a file)",
+    )
+    parser.add_argument(
+        "--batch-dir",
+        type=pathlib.Path,
+        default=BATCH_DOC_DIR,
+        help="Directory for batch docs, one <name>.md per target (default: docs/workspaces)",
+    )
+    parser.add_argument(
+        "--template",
+        type=pathlib.Path,
+        metavar="PATH",
+        help=f"Render the doc from this template instead of {TEMPLATE_PATH.relative_to(REPO_ROOT)} "
+        "({{ slot }}, {%% for %%} and {%% if %%} tags; see scripts/demodoc/templates.py)",
+    )
+    parser.add_argument(
+        "--template-dir",
+        type=pathlib.Path,
+        metavar="DIR",
+        help="With --batch, render each target from DIR/<name>.md when that template exists",
+    )
+    parser.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1), help="Concurrent batch jobs")
+    parser.add_argument("--job-timeout", type=float, default=300.0, help="Per-job time limit in seconds (0 disables)")
+    parser.add_argument(
+        "--timings",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Print a JSON breakdown of each phase (load, every terraform candidate tried, render, write); "
+        "with PATH, append one JSON line per regeneration there instead of stdout",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("markdown", *docexport.FORMATS),
+        default="markdown",
+        help="markdown regenerates the doc; ndjson, csv or json export the path catalog flows instead (default: markdown)",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        metavar="PATH",
+        help="Where --format ndjson/csv/json writes the export (default: stdout)",
+    )
+    parser.add_argument(
+        "--check-prefixes",
+        action="store_true",
+        help="Only check the environment tfvars for overlapping CIDR allocations; exit 1 when any are found",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay running, keep outputs and rendered sections in memory and answer "
+        "scripts/demo_doc_client.py requests (regenerate, get-section, status) on --socket; does not serve HTTP",
+    )
+    parser.add_argument(
+        "--socket",
+        type=pathlib.Path,
+        default=DAEMON_SOCKET,
+        help=f"Unix socket for --daemon (default: {DAEMON_SOCKET.relative_to(REPO_ROOT)})",
+    )
+    parser.add_argument(
+        "--plan",
+        type=pathlib.Path,
+        metavar="PLAN",
+        help="Document a saved plan before applying: a `terraform plan -out` file (read through "
+        "`terraform show -json`) or its JSON; adds planned resources per module, load balancers, firewalls and mesh links",
+    )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="Check that every ALB, Global Accelerator listener and appliance management IP in the doc answers "
+        "(TCP connect, or an HTTP HEAD on port 80) and annotate each row with its status and latency",
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=docprobe.DEFAULT_TIMEOUT,
+        help=f"Per-endpoint probe deadline in seconds, covering DNS, connect and response (default: {docprobe.DEFAULT_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=docprobe.DEFAULT_CONCURRENCY,
+        help=f"Endpoints probed at once (default: {docprobe.DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--probe-ttl",
+        type=float,
+        default=docprobe.DEFAULT_TTL,
+        help=f"Seconds a probe result is reused before the endpoint is checked again (default: {docprobe.DEFAULT_TTL:g})",
+    )
+    parser.add_argument(
+        "--site",
+        nargs="?",
+        type=pathlib.Path,
+        const=SITE_DIR,
+        metavar="DIR",
+        help="Also build a static multi-page site from the doc (one page per section, the path catalog per cloud; "
+        "precompressed .gz/.br and a manifest.json) and serve it at /site/ "
+        f"(default DIR: {SITE_DIR.relative_to(REPO_ROOT)})",
+    )
+    parser.add_argument(
+        "--diff",
+        nargs="*",
+        metavar="SNAPSHOT",
+        help="Print every output change between two recorded snapshots and exit: [stream:]latest, previous, "
+        "an index or a hash prefix (default: previous latest; batch targets are streams named after the target)",
+    )
+    parser.add_argument(
+        "--snapshots",
+        nargs="?",
+        const="",
+        metavar="STREAM",
+        help="List the recorded outputs snapshots of STREAM (default: the main doc) and exit",
+    )
     args = parser.parse_args()
 
-    outputs, error = _load_outputs()
-    content = render(outputs, error)
-    DOC_PATH.write_text(content, encoding="utf-8")
-    print(f"Updated {DOC_PATH.relative_to(REPO_ROOT)}")
+    if args.diff is not None or args.snapshots is not None:
+        if args.diff is not None and len(args.diff) > 2:
+            parser.error("--diff takes at most two snapshots")
+        from demodoc import snapshots as docsnapshots
 
+        try:
+            if args.diff is not None:
+                _diff_snapshots(args.diff)
+            else:
+                _list_snapshots(args.snapshots)
+        except docsnapshots.SnapshotError as exc:
+            raise SystemExit(f"error: {exc}")
+        return
+    if args.check_prefixes:
+        from demodoc import prefixes as docprefixes
+
+        report = docprefixes.check(REPO_ROOT)
+        print("\n".join(docprefixes.render_report(report)))
+        raise SystemExit(1 if report["collision_count"] or report["errors"] else 0)
+    if args.format != "markdown" and (args.batch or args.watch):
+        parser.error("--format exports once; it cannot be combined with --batch or --watch")
+    if args.daemon and (args.batch or args.watch or args.format != "markdown"):
+        parser.error("--daemon cannot be combined with --batch, --watch or --format")
+    if args.plan is not None and (args.batch or args.daemon or args.format != "markdown"):
+        parser.error("--plan documents one plan; it cannot be combined with --batch, --daemon or --format")
+    if args.probe and (args.batch or args.format != "markdown"):
+        parser.error("--probe annotates the doc; it cannot be combined with --batch or --format")
+    if args.site is not None and (args.batch or args.format != "markdown"):
+        parser.error("--site builds from the main doc; it cannot be combined with --batch or --format")
+    if args.probe_timeout <= 0 or args.probe_concurrency < 1:
+        parser.error("--probe-timeout must be positive and --probe-concurrency at least 1")
+    if args.template_dir is not None and not args.batch:
+        parser.error("--template-dir picks templates per batch target; use --template for one doc")
+    if args.batch:
+        if args.watch:
+            parser.error("--batch cannot be combined with --watch")
+        raise SystemExit(_run_batch(args))
+
+    state_path = None
+    if not args.no_state:
+        state_path = args.state or tfstate.default_state_path(REPO_ROOT)
+    if args.watch and state_path is None:
+        parser.error("--watch reads the state file directly; pass --state or run where terraform.tfstate exists")
+    tfvars = workspace_outputs(state_path)
+    template = _load_template_or_exit(args.template, not args.no_cache) if args.format == "markdown" else None
+    if args.daemon:
+        _run_daemon(args, state_path, template)
+        return
+
+    timings = docmetrics.PhaseTimings()
+    with timings.phase("load"):
+        outputs, error = _checked(*_load_outputs(state_path, use_cache=not args.no_cache, timings=timings))
+    if args.format != "markdown":
+        if error:
+            print(f"Terraform outputs unavailable: {error.strip()}", file=sys.stderr)
+        with timings.phase("export", format=args.format):
+            _export_catalog(outputs, args.format, args.output, tfvars)
+        if args.timings:
+            _emit_timings(args.timings, timings.as_dict())
+        return
+    plan = None
+    if args.plan is not None:
+        plan, plan_error = _load_plan(args.plan, not args.no_cache, timings=timings)
+        if plan_error is not None:
+            raise SystemExit(f"error: {plan_error}")
+    with timings.phase("sections.open"):
+        sections = None if args.no_cache else docsections.SectionCache(CACHE_DIR / "sections.json", RENDER_SALT)
+    prober = _prober(args)
+    written = _regenerate(outputs, error, sections, timings, not args.no_cache, plan, prober, args.site, template, tfvars)
+    registry = docmetrics.Registry()
+    registry.on_collect(lambda: _observe_caches(registry, sections))
+    _record(timings, written, registry, args.timings)
+
+    if args.no_serve and not args.watch:
+        return
+    from demodoc import server as docserver
+
+    events = docserver.EventBroker() if args.watch else None
+    # The outputs /catalog.ndjson and /api/reachability are built from;
+    # watch mode swaps in new ones.
+    latest: Dict[str, Any] = {"outputs": outputs}
+    httpd: Optional[docserver.DocServer] = None
     if not args.no_serve:
         host = args.host
         if host == "0.0.0.0":
@@ -569,7 +1623,49 @@ def main() -> None:
                 host = socket.gethostbyname(hostname)
             except OSError:
                 host = "0.0.0.0"
-        _start_server(host, DOC_PATH)
+        httpd = _start_server(
+            host,
+            DOC_PATH,
+            events,
+            registry,
+            lambda: catalog_flows(latest["outputs"], tfvars),
+            lambda: reachability_index(latest["outputs"], tfvars),
+            args.site,
+        )
+
+    try:
+        if args.watch:
+            assert state_path is not None
+            cache = OUTPUTS_CACHE if not args.no_cache else None
+            poller = docwatch.OutputsPoller(
+                state_path,
+                lambda: tfstate.load_state_outputs(state_path, cache, OUTPUT_KEYS),
+                outputs,
+            )
+            if httpd is not None:
+                threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            _watch(
+                poller,
+                events,
+                args.watch_interval,
+                sections,
+                registry,
+                args.timings,
+                latest,
+                not args.no_cache,
+                plan,
+                prober,
+                args.site,
+                template,
+                tfvars,
+            )
+        elif httpd is not None:
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping documentation server" if httpd is not None else "\nStopping watch")
+    finally:
+        if httpd is not None:
+            httpd.server_close()
 
 
 if __name__ == "__main__":
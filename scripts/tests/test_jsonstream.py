@@ -0,0 +1,35 @@
+"""Streaming reader checks against ``json.loads``, across chunk boundaries."""
+
+from __future__ import annotations
+
+import io
+import json
+import pathlib
+import sys
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from demodoc import jsonstream  # noqa: E402
+
+SCALARS = '{"zz": 0, "a": 1.5e10, "c": 12.75, "b": 1, "d": -0.5E-3, "t": true, "f": false, "n": null, "s": "x"}'
+
+
+class SelectTest(unittest.TestCase):
+    def test_scalar_members_at_every_chunk_size(self) -> None:
+        expected = json.loads(SCALARS)
+        for chunk_size in range(1, len(SCALARS) + 2):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(jsonstream.select(io.StringIO(SCALARS), None, chunk_size=chunk_size), expected)
+                self.assertEqual(
+                    jsonstream.select(io.BytesIO(SCALARS.encode("utf-8")), ["c", "n"], chunk_size=chunk_size),
+                    {"c": 12.75, "n": None},
+                )
+
+    def test_number_at_end_of_input(self) -> None:
+        reader = jsonstream.Reader(io.StringIO("12.75"), chunk_size=3)
+        self.assertEqual(reader.read_value(), 12.75)
+
+
+if __name__ == "__main__":
+    unittest.main()
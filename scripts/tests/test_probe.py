@@ -0,0 +1,125 @@
+"""Endpoint probes against stand-in listeners on loopback."""
+
+from __future__ import annotations
+
+import pathlib
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from typing import List
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from demodoc import probe  # noqa: E402
+
+
+class Listener:
+    """A loopback port that accepts connections and, after ``delay``, sends ``reply`` (if any)."""
+
+    def __init__(self, reply: bytes = b"", delay: float = 0.0, accept: bool = True) -> None:
+        self.socket = socket.create_server(("127.0.0.1", 0), backlog=16)
+        self.port = self.socket.getsockname()[1]
+        self.reply = reply
+        self.delay = delay
+        if accept:
+            threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._answer, args=(conn,), daemon=True).start()
+
+    def _answer(self, conn: socket.socket) -> None:
+        with conn:
+            try:
+                conn.recv(4096)
+                time.sleep(self.delay)
+                if self.reply:
+                    conn.sendall(self.reply)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self.socket.close()
+
+
+def _refused_port() -> int:
+    # A port that was just free; nothing listens on it any more.
+    with socket.create_server(("127.0.0.1", 0)) as sock:
+        return sock.getsockname()[1]
+
+
+class ProberTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.listeners: List[Listener] = []
+
+    def tearDown(self) -> None:
+        for listener in self.listeners:
+            listener.close()
+
+    def listen(self, reply: bytes = b"", delay: float = 0.0, accept: bool = True) -> Listener:
+        listener = Listener(reply, delay, accept)
+        self.listeners.append(listener)
+        return listener
+
+    def test_open_port_is_up(self) -> None:
+        target = probe.Target("tcp", "127.0.0.1", self.listen().port)
+        result = probe.Prober(timeout=2, ttl=0).run([target])[target.key]
+        self.assertEqual(result.status, "up")
+        self.assertIsNotNone(result.latency_ms)
+
+    def test_refused_port_is_down(self) -> None:
+        target = probe.Target("tcp", "127.0.0.1", _refused_port())
+        result = probe.Prober(timeout=2, ttl=0).run([target])[target.key]
+        self.assertEqual(result.status, "down")
+        self.assertIsNone(result.latency_ms)
+
+    def test_listener_that_never_answers_times_out(self) -> None:
+        # The kernel completes the handshake, but nothing reads the HEAD.
+        target = probe.Target("http", "127.0.0.1", self.listen(accept=False).port)
+        started = time.perf_counter()
+        result = probe.Prober(timeout=0.3, ttl=0).run([target])[target.key]
+        self.assertEqual(result.status, "timeout")
+        self.assertLess(time.perf_counter() - started, 2)
+
+    def test_http_status_line(self) -> None:
+        ok = probe.Target("http", "127.0.0.1", self.listen(b"HTTP/1.1 301 Moved Permanently\r\n\r\n").port)
+        junk = probe.Target("http", "127.0.0.1", self.listen(b"SSH-2.0-OpenSSH\r\n").port)
+        results = probe.Prober(timeout=2, ttl=0).run([ok, junk])
+        self.assertEqual((results[ok.key].status, results[ok.key].detail), ("up", "HTTP 301"))
+        self.assertEqual((results[junk.key].status, results[junk.key].detail), ("down", "no HTTP response"))
+
+    def test_fresh_results_are_reused_from_the_cache(self) -> None:
+        target = probe.Target("tcp", "127.0.0.1", self.listen().port)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = pathlib.Path(tmp) / "probes.json"
+            first = probe.Prober(timeout=2, ttl=60, cache_path=cache).run([target])
+            prober = probe.Prober(timeout=2, ttl=60, cache_path=cache)
+            self.assertEqual(prober.run([target]), first)
+            self.assertEqual((prober.probed, prober.reused), (0, 1))
+            expired = probe.Prober(timeout=2, ttl=0, cache_path=cache)
+            expired.run([target])
+            self.assertEqual((expired.probed, expired.reused), (1, 0))
+
+    def test_run_takes_about_the_slowest_probe(self) -> None:
+        delay = 0.4
+        targets = [
+            probe.Target("http", "127.0.0.1", self.listen(b"HTTP/1.1 200 OK\r\n\r\n", delay).port) for _ in range(8)
+        ]
+        started = time.perf_counter()
+        results = probe.Prober(timeout=5, ttl=0).run(targets)
+        elapsed = time.perf_counter() - started
+        self.assertTrue(all(result.status == "up" for result in results.values()))
+        self.assertGreaterEqual(elapsed, delay)
+        # Sequential probes would take 8 × delay.
+        self.assertLess(elapsed, 3 * delay)
+
+
+if __name__ == "__main__":
+    unittest.main()
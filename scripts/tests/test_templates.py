@@ -0,0 +1,29 @@
+"""Template parse errors point at the template, not the generated code."""
+
+from __future__ import annotations
+
+import pathlib
+import sys
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from demodoc import templates  # noqa: E402
+
+
+class BlockTest(unittest.TestCase):
+    def test_else_after_else_is_refused(self) -> None:
+        for source in (
+            "{% if plan %}x{% else %}y{% else %}z{% endif %}",
+            "{% if plan %}x\n{% else %}y\n{% elif other %}z\n{% endif %}",
+        ):
+            with self.subTest(source=source), self.assertRaisesRegex(templates.TemplateError, r"^bad\.md:\d+: 'if' block"):
+                templates.compile_template(source, "bad.md")
+
+    def test_if_elif_else(self) -> None:
+        template = templates.compile_template("{% if a %}x{% elif b %}y{% else %}z{% endif %}")
+        self.assertEqual(["".join(template.render({"a": a, "b": b})) for a, b in ((1, 0), (0, 1), (0, 0))], ["x", "y", "z"])
+
+
+if __name__ == "__main__":
+    unittest.main()
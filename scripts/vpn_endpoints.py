@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Look up one tunnel, site or hub in `outputs/vpn-endpoints.json`.
+
+The manifest is compiled once into a memory-mapped index beside it and
+recompiled when Terraform rewrites it, so a lookup reads one record instead
+of parsing the whole file. See ``demodoc/vpnindex.py``:
+
+    python3 scripts/vpn_endpoints.py get tunnel aws-us-east-1-to-azure-uswest2-a
+    python3 scripts/vpn_endpoints.py get site san_jose
+    python3 scripts/vpn_endpoints.py list hub
+"""
+
+from demodoc.vpnindex import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())